@@ -1,9 +1,43 @@
-from langchain_community.llms import HuggingFacePipeline
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from transformers import pipeline
-from typing import List, Dict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import copy
+import logging
+import queue
+import threading
+import time
 import requests
 
+logger = logging.getLogger(__name__)
+
+LLM_MODEL_ID = "openai-community/gpt2"
+DEFAULT_LLM_BACKEND = "hf"
+DEFAULT_MAX_NEW_TOKENS = 200
+DEFAULT_TEMPERATURE = 0.7
+EMBEDDING_MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+# Bump whenever the plan or final prompt in get_solutions changes, so cached results are not reused
+PROMPT_VERSION = 2
+NO_SIMILAR_INCIDENTS = "No similar past incidents found."
+
+# Seconds a plan step may run before the analysis continues without its output. Model-backed
+# steps get a longer default: a full predict() on CPU routinely takes more than 10s. A step that
+# times out is not cancelled; it keeps running on the tool pool and its output is discarded
+DEFAULT_TOOL_TIMEOUT = 10.0
+DEFAULT_TOOL_TIMEOUTS = {"Network_Diagnostic": 60.0}
+# Plan steps that need a model, loaded before their deadline starts
+MODEL_TOOLS = {"Network_Diagnostic": "llm", "Similar_Incidents": "embeddings"}
+
+# Seconds get_solutions waits for the model before answering with a fallback (0 = no limit);
+# this many consecutive failures or blown budgets open the circuit breaker for DEFAULT_BREAKER_RESET seconds
+DEFAULT_LATENCY_BUDGET = 60.0
+DEFAULT_BREAKER_FAILURES = 5
+DEFAULT_BREAKER_RESET = 30.0
+
+# Concurrent predict() calls are generated together: up to this many prompts,
+# gathered for at most this long (a batch size of 1 disables batching)
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_BATCH_WINDOW_MS = 20
+
 # --- Tool Definitions ---
 
 class WebSearchTool:
@@ -12,27 +46,125 @@ class WebSearchTool:
 
 class NetworkIncidentAgent:
     def __init__(self):
-        # Load a simple model
-        self.llm = HuggingFacePipeline(pipeline=pipeline(
-            "text-generation",
-            model="openai-community/gpt2",
-            max_new_tokens=200,
-            temperature=0.7
-        ))
-
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'}
-        )
+        # Models are loaded on first use (see the llm/embeddings properties)
+        self._llm = None
+        self._embeddings = None
+        self._llm_lock = threading.Lock()
+        self._embeddings_lock = threading.Lock()
+
+        # Optional SolutionCache, attached by solution_cache.init_solution_cache
+        self.cache = None
+
+        # Optional runbooks.RuleEngine; a matching runbook answers without the LLM
+        self.rules = None
+
+        # Optional cve_store.CveStore answering CVE_Search from local NVD feeds
+        self.cve_store = None
+
+        # Optional callable(text) -> [str] describing similar past incidents, set by similarity.init_similarity
+        self.similar_lookup = None
+
+        # Plan steps run concurrently on a shared pool; per-tool timeouts override tool_timeout
+        self.tool_timeout = DEFAULT_TOOL_TIMEOUT
+        self.tool_timeouts: Dict[str, float] = dict(DEFAULT_TOOL_TIMEOUTS)
+        self._tool_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ai-tool")
+        self._timings_lock = threading.Lock()
+        self._timings: Dict[str, Dict] = {}
+
+        # Optional single_flight.SingleFlight, set by single_flight.init_single_flight
+        self.flights = None
+
+        # Optional circuit_breaker.CircuitBreaker around the model; while it is open (or a call
+        # runs past latency_budget) get_solutions answers with a fallback instead of waiting
+        self.breaker = None
+        self.latency_budget = DEFAULT_LATENCY_BUDGET
+        self._analysis_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="ai-analysis")
+        self._fallback_stats = {"circuit_open": 0, "over_budget": 0}
+
+        # Generation backend and limits (see llm_backends); read when the model is first loaded
+        self.llm_backend = DEFAULT_LLM_BACKEND
+        self.llm_threads = 0
+        self.max_new_tokens = DEFAULT_MAX_NEW_TOKENS
+        self.temperature = DEFAULT_TEMPERATURE
+        # StubLLM keyword arguments (latency_ms, tokens_per_s, ...) for the "stub" backend
+        self.stub_options: Dict = {}
+
+        self.batch_size = DEFAULT_BATCH_SIZE
+        self.batch_window_ms = DEFAULT_BATCH_WINDOW_MS
+        self._dispatcher = None
+        self._dispatcher_lock = threading.Lock()
 
         # Tool instances
         self.tools = {
             "Search": WebSearchTool().run,
             "CVE_Search": self.search_cve,
-            "Network_Diagnostic": self.analyze_network_issue
+            "Network_Diagnostic": self.analyze_network_issue,
+            "Similar_Incidents": self.find_similar_incidents
         }
 
+    @property
+    def llm(self):
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    from llm_backends import STUB_BACKEND
+
+                    if self.llm_backend == STUB_BACKEND:
+                        from llm_backends import StubLLM
+
+                        logger.info("Using the stub LLM backend")
+                        self._llm = StubLLM(max_new_tokens=self.max_new_tokens, **self.stub_options)
+                        return self._llm
+
+                    from langchain_community.llms import HuggingFacePipeline
+                    from llm_backends import build_pipeline
+
+                    generator = build_pipeline(
+                        self.llm_backend,
+                        LLM_MODEL_ID,
+                        threads=self.llm_threads,
+                        max_new_tokens=self.max_new_tokens,
+                        temperature=self.temperature,
+                        batch_size=self.batch_size
+                    )
+                    self._llm = HuggingFacePipeline(pipeline=generator, batch_size=max(1, self.batch_size))
+        return self._llm
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            with self._embeddings_lock:
+                if self._embeddings is None:
+                    from llm_backends import STUB_BACKEND
+
+                    if self.llm_backend == STUB_BACKEND:
+                        from llm_backends import StubEmbeddings
+
+                        self._embeddings = StubEmbeddings()
+                        return self._embeddings
+
+                    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+                    logger.info("Loading embedding model")
+                    self._embeddings = HuggingFaceEmbeddings(
+                        model_name=EMBEDDING_MODEL_ID,
+                        model_kwargs={'device': 'cpu'}
+                    )
+        return self._embeddings
+
+    @property
+    def model_signature(self) -> str:
+        """Identifies the model and generation settings behind a result (part of the cache key)"""
+        return f"{LLM_MODEL_ID}:{self.llm_backend}:{self.max_new_tokens}:{self.temperature}"
+
+    @property
+    def is_ready(self) -> bool:
+        return self._llm is not None and self._embeddings is not None
+
     def search_cve(self, query: str) -> str:
+        if self.cve_store is not None:
+            from cve_store import format_cve_results
+            return format_cve_results(query, self.cve_store.search(query))
         return f"CVE results for '{query}':\n- CVE-2023-1234: Network buffer overflow\n- CVE-2023-5678: Denial of service vulnerability"
 
     def analyze_network_issue(self, description: str) -> str:
@@ -41,28 +173,256 @@ class NetworkIncidentAgent:
         {description}
         Consider: DNS, routing, firewalls, performance, and bottlenecks.
         """
-        return self.llm.predict(prompt)
+        return self.predict(prompt)
+
+    def predict(self, prompt: str) -> str:
+        """Generate a completion, batched with other concurrent callers when batching is on"""
+        if self.batch_size <= 1:
+            return self.llm.predict(prompt)
+        return self.dispatcher.predict(prompt)
+
+    @property
+    def dispatcher(self):
+        if self._dispatcher is None:
+            with self._dispatcher_lock:
+                if self._dispatcher is None:
+                    from inference import BatchingDispatcher
+
+                    self._dispatcher = BatchingDispatcher(
+                        self._generate_batch,
+                        max_batch_size=self.batch_size,
+                        max_wait_ms=self.batch_window_ms
+                    )
+        return self._dispatcher
+
+    def _generate_batch(self, prompts: List[str]) -> List[str]:
+        result = self.llm.generate(prompts)
+        return [generations[0].text for generations in result.generations]
+
+    def batching_stats(self) -> Optional[Dict]:
+        return self._dispatcher.stats() if self._dispatcher is not None else None
+
+    def find_similar_incidents(self, text: str, exclude_id: Optional[str] = None) -> str:
+        lines = self.similar_lookup(text, exclude_id) if self.similar_lookup else []
+        if not lines:
+            return NO_SIMILAR_INCIDENTS
+        return "\n".join(f"- {line}" for line in lines)
+
+    def get_solutions(self, title: str, description: str, severity: str, use_rules: bool = True,
+                      incident_id: Optional[str] = None) -> Dict:
+        """Analyse an incident: a matching runbook's answer, else a cached or freshly generated one.
+
+        incident_id, if given, keeps the incident itself out of its similar past incidents; an answer
+        that then draws on other similar incidents is specific to the incident and is not cached.
+
+        While the circuit breaker is open, or when generation overruns latency_budget, the answer is
+        _fallback_solutions() instead, marked with a "degraded" reason.
+        """
+        runbook = self._match_runbook(title, description) if use_rules else None
+        if runbook is not None:
+            return runbook.solutions()
+
+        from solution_cache import solution_cache_key
 
-    def get_solutions(self, title: str, description: str, severity: str) -> Dict:
+        key = solution_cache_key(title, description, severity, self.model_signature, PROMPT_VERSION)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        if self.flights is None:
+            return self._generate_solutions(title, description, severity, key, incident_id)
+        # An identical analysis already running is joined, not repeated; the excluded incident is part of
+        # what makes it identical, since it changes the similar incidents the answer is built on
+        flight_key = key if incident_id is None else f"{key}:{incident_id}"
+        solutions, shared = self.flights.do(
+            "get_solutions", flight_key,
+            lambda: self._generate_solutions(title, description, severity, key, incident_id)
+        )
+        return copy.deepcopy(solutions) if shared else solutions
+
+    def _generate_solutions(self, title: str, description: str, severity: str, key: str,
+                            incident_id: Optional[str] = None) -> Dict:
+        """Run the analysis within the latency budget and circuit breaker, caching the result under key"""
+        if self.breaker is not None and not self.breaker.allow():
+            return self._fallback_solutions(title, description, "circuit_open")
+
+        def store(future):
+            # Only results that depend on nothing but the key are kept; runs late for over-budget calls
+            if self.cache is not None and not future.cancelled() and future.exception() is None \
+                    and future.result()[1]:
+                self.cache.set(key, future.result()[0])
+
+        future = self._analysis_pool.submit(self._compute_solutions, title, description, severity, incident_id)
+        future.add_done_callback(store)
+        try:
+            solutions, _ = future.result(timeout=self.latency_budget or None)
+        except FutureTimeoutError:
+            logger.warning("Analysis exceeded its %gs latency budget; answering with a fallback", self.latency_budget)
+            self._record_outcome(False, "over latency budget")
+            return self._fallback_solutions(title, description, "over_budget")
+        except Exception as e:
+            self._record_outcome(False, str(e))
+            raise
+        self._record_outcome(True)
+        return solutions
+
+    def _compute_solutions(self, title: str, description: str, severity: str, incident_id: Optional[str] = None):
+        """Run the plan and final prompt; returns (solutions, whether the result may be cached)"""
         # --- PLAN ---
-        plan = [
-            {"tool": "Search", "input": title},
-            {"tool": "CVE_Search", "input": description},
-            {"tool": "Network_Diagnostic", "input": description}
-        ]
+        intermediate_steps, degraded = self._run_plan(self._plan(title, description, incident_id))
 
-        intermediate_steps = []
-        for step in plan:
-            tool_name = step["tool"]
-            tool_input = step["input"]
+        # --- EXECUTE ---
+        started = time.perf_counter()
+        final_answer = self.predict(self._final_prompt(title, description, severity, intermediate_steps))
+        self._record_timing("final_answer", time.perf_counter() - started)
+
+        return (self._build_solutions(final_answer, intermediate_steps),
+                self._cacheable(intermediate_steps, degraded, incident_id))
+
+    def stream_solutions(self, title: str, description: str, severity: str,
+                         use_rules: bool = True, incident_id: Optional[str] = None) -> Iterator[Tuple[str, Dict]]:
+        """Like get_solutions, but yields events as the analysis progresses:
+
+        ("step", {tool, output, elapsed, ok}) as each plan step finishes,
+        ("token", {text}) for each chunk of the final answer, then
+        ("done", {solutions, cached}), or ("done", {solutions, degraded}) with the fallback answer while
+        the circuit breaker is open. Streaming bypasses the batching dispatcher.
+        """
+        runbook = self._match_runbook(title, description) if use_rules else None
+        if runbook is not None:
+            yield "done", {"solutions": runbook.solutions(), "cached": True}
+            return
+
+        key = None
+        if self.cache is not None:
+            from solution_cache import solution_cache_key
+
+            key = solution_cache_key(title, description, severity, self.model_signature, PROMPT_VERSION)
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield "done", {"solutions": cached, "cached": True}
+                return
+
+        if self.breaker is not None and not self.breaker.allow():
+            yield "done", {"solutions": self._fallback_solutions(title, description, "circuit_open"),
+                           "degraded": "circuit_open"}
+            return
+
+        # Every allowed call must be reported to the breaker, however the stream ends; a client that
+        # goes away mid-stream says nothing about the model, so its probe is only released
+        outcome = None
+        try:
+            # Run the plan on a separate thread and relay its steps as they finish
+            events = queue.Queue()
+            plan_result = []
+
+            def run_plan():
+                try:
+                    plan_result.append(self._run_plan(self._plan(title, description, incident_id), on_step=events.put))
+                finally:
+                    events.put(None)
+
+            threading.Thread(target=run_plan, name="ai-plan", daemon=True).start()
+            while True:
+                step = events.get()
+                if step is None:
+                    break
+                yield "step", step
+            if not plan_result:
+                outcome = (False, "plan execution failed")
+                raise RuntimeError("Plan execution failed")
+            intermediate_steps, degraded = plan_result[0]
+
+            started = time.perf_counter()
+            chunks = []
             try:
-                output = self.tools[tool_name](tool_input)
-                intermediate_steps.append((tool_name, output))
+                for chunk in self.llm.stream(self._final_prompt(title, description, severity, intermediate_steps)):
+                    chunks.append(chunk)
+                    yield "token", {"text": chunk}
             except Exception as e:
-                intermediate_steps.append((tool_name, f"Error: {str(e)}"))
+                outcome = (False, str(e))
+                raise
+            elapsed = time.perf_counter() - started
+            self._record_timing("final_answer", elapsed)
+            # A stream is not cut off, but a slow one still counts against the model
+            if self.latency_budget and elapsed > self.latency_budget:
+                outcome = (False, "over latency budget")
+            else:
+                outcome = (True, None)
+        finally:
+            if outcome is not None:
+                self._record_outcome(*outcome)
+            elif self.breaker is not None:
+                self.breaker.release()
 
-        # --- EXECUTE ---
-        final_prompt = f"""
+        solutions = self._build_solutions("".join(chunks), intermediate_steps)
+        if key is not None and self._cacheable(intermediate_steps, degraded, incident_id):
+            self.cache.set(key, solutions)
+        yield "done", {"solutions": solutions, "cached": False}
+
+    def _cacheable(self, intermediate_steps: List, degraded: bool, incident_id: Optional[str]) -> bool:
+        """Whether a result can be reused for any request with the same cache key"""
+        if degraded:
+            return False  # built from a failed tool step
+        # Similar incidents found with the analysed incident left out belong to that incident, not its text
+        similar = dict(intermediate_steps).get("Similar_Incidents")
+        return incident_id is None or similar in (None, NO_SIMILAR_INCIDENTS)
+
+    def _fallback_solutions(self, title: str, description: str, reason: str) -> Dict:
+        """Immediate answer while the model is unavailable: the matching runbook's, else generic checks"""
+        with self._timings_lock:
+            self._fallback_stats[reason] += 1
+
+        runbook = self._match_runbook(title, description)
+        if runbook is not None:
+            solutions = runbook.solutions()
+        else:
+            solutions = {
+                "analysis": "The AI model is currently unavailable or overloaded, so no detailed analysis "
+                            "was generated. Start with the standard checks below and retry the analysis later.",
+                "confidence_score": 0.0,
+                "suggested_actions": self._extract_actions(""),
+                "references": []
+            }
+        solutions["degraded"] = reason
+        return solutions
+
+    def _record_outcome(self, ok: bool, reason: Optional[str] = None):
+        if self.breaker is None:
+            return
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure(reason)
+
+    def breaker_stats(self) -> Optional[Dict]:
+        if self.breaker is None:
+            return None
+        with self._timings_lock:
+            fallbacks = dict(self._fallback_stats)
+        return dict(self.breaker.stats(), fallbacks=fallbacks, latency_budget=self.latency_budget)
+
+    def _match_runbook(self, title: str, description: str):
+        if self.rules is None:
+            return None
+        try:
+            return self.rules.match(title, description)
+        except Exception:
+            logger.exception("Runbook matching failed, falling back to the LLM")
+            return None
+
+    def _plan(self, title: str, description: str, incident_id: Optional[str] = None) -> List[Dict]:
+        return [
+            {"tool": "Search", "input": title},
+            {"tool": "CVE_Search", "input": description},
+            {"tool": "Network_Diagnostic", "input": description},
+            {"tool": "Similar_Incidents", "input": f"{title}\n{description}".strip(),
+             "options": {"exclude_id": incident_id}}
+        ]
+
+    def _final_prompt(self, title: str, description: str, severity: str, intermediate_steps: List) -> str:
+        return f"""
 Given the incident:
 Title: {title}
 Description: {description}
@@ -77,14 +437,17 @@ CVE Info:
 Diagnostic:
 {intermediate_steps[2][1]}
 
+Similar Past Incidents:
+{intermediate_steps[3][1]}
+
 Now write:
 - Root cause analysis
 - Immediate steps to mitigate
 - Long-term recommendations
 - Related issues to monitor
 """
-        final_answer = self.llm.predict(final_prompt)
 
+    def _build_solutions(self, final_answer: str, intermediate_steps: List) -> Dict:
         return {
             "analysis": final_answer.strip(),
             "confidence_score": self._calculate_confidence(intermediate_steps),
@@ -92,6 +455,81 @@ Now write:
             "references": self._extract_references(intermediate_steps)
         }
 
+    def _run_plan(self, plan: List[Dict], on_step: Optional[Callable[[Dict], None]] = None):
+        """Run the (independent) plan steps concurrently; returns ([(tool, output)], any step failed).
+
+        on_step, if given, is called with each step's result in the order the steps finish.
+        A step past its timeout is reported as failed but not cancelled, so it still holds its
+        pool thread (and, for Network_Diagnostic, the model) until it finishes.
+        """
+        # A first-use model load can take far longer than any step timeout; do it before the clock starts
+        for step in plan:
+            model = MODEL_TOOLS.get(step["tool"])
+            if model == "llm" or (model == "embeddings" and self.similar_lookup is not None):
+                getattr(self, model)
+        started = time.perf_counter()
+        pending = {}
+        for step in plan:
+            future = self._tool_pool.submit(self._call_tool, step["tool"], step["input"], step.get("options"))
+            timeout = self.tool_timeouts.get(step["tool"], self.tool_timeout)
+            pending[future] = (step["tool"], timeout, started + timeout)
+
+        outputs = {}
+        degraded = False
+        while pending:
+            next_deadline = min(deadline for _, _, deadline in pending.values())
+            done, _ = wait(pending, timeout=max(0.0, next_deadline - time.perf_counter()), return_when=FIRST_COMPLETED)
+            now = time.perf_counter()
+            for future in list(pending):
+                tool_name, timeout, deadline = pending[future]
+                if future in done:
+                    output, elapsed, ok = future.result()
+                elif deadline <= now:
+                    # Not started yet: drop it. Already running: it finishes in the background and is ignored.
+                    future.cancel()
+                    output, elapsed, ok = f"Error: {tool_name} timed out after {timeout:g}s", timeout, False
+                    self._record_timing(tool_name, elapsed, timed_out=True)
+                    logger.warning("Plan step %s timed out after %gs", tool_name, timeout)
+                else:
+                    continue
+                del pending[future]
+                outputs[tool_name] = output
+                degraded = degraded or not ok
+                if on_step is not None:
+                    on_step({"tool": tool_name, "output": output, "elapsed": elapsed, "ok": ok})
+
+        logger.info("Plan finished in %.2fs", time.perf_counter() - started)
+        return [(step["tool"], outputs[step["tool"]]) for step in plan], degraded
+
+    def _call_tool(self, tool_name: str, tool_input: str, options: Optional[Dict] = None):
+        started = time.perf_counter()
+        try:
+            output, ok = self.tools[tool_name](tool_input, **(options or {})), True
+        except Exception as e:
+            output, ok = f"Error: {str(e)}", False
+        elapsed = time.perf_counter() - started
+        self._record_timing(tool_name, elapsed, failed=not ok)
+        return output, elapsed, ok
+
+    def _record_timing(self, step: str, elapsed: float, timed_out: bool = False, failed: bool = False):
+        with self._timings_lock:
+            timing = self._timings.setdefault(step, {"calls": 0, "total_s": 0.0, "max_s": 0.0, "timeouts": 0, "errors": 0})
+            if timed_out:
+                timing["timeouts"] += 1
+                return
+            timing["calls"] += 1
+            timing["total_s"] += elapsed
+            timing["max_s"] = max(timing["max_s"], elapsed)
+            timing["errors"] += int(failed)
+
+    def step_timings(self) -> Dict[str, Dict]:
+        """Per-step latency totals (plan tools and the final LLM call) since startup"""
+        with self._timings_lock:
+            timings = {step: dict(timing) for step, timing in self._timings.items()}
+        for timing in timings.values():
+            timing["avg_s"] = timing["total_s"] / timing["calls"] if timing["calls"] else 0.0
+        return timings
+
     def _calculate_confidence(self, steps: List) -> float:
         score = 0.5 + min(0.3, len(steps) * 0.1)
         if any('CVE-' in str(step[1]) for step in steps):
@@ -117,3 +555,92 @@ Now write:
                     'reference': output
                 })
         return refs
+
+
+# --- Process-wide agent ---
+
+_agent: Optional[NetworkIncidentAgent] = None
+_agent_lock = threading.Lock()
+_warmup_thread: Optional[threading.Thread] = None
+_warmup_error: Optional[str] = None
+
+
+def get_agent() -> NetworkIncidentAgent:
+    """Return the shared agent, creating it on first use (models still load lazily)"""
+    global _agent
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                _agent = NetworkIncidentAgent()
+    return _agent
+
+
+def _warm_up():
+    global _warmup_error
+    try:
+        agent = get_agent()
+        agent.llm
+        agent.embeddings
+        logger.info("AI agent models loaded")
+    except Exception as e:
+        _warmup_error = str(e)
+        logger.exception("AI agent warm-up failed")
+
+
+def warm_up(background: bool = True):
+    """Load the agent's models ahead of the first request, optionally in a daemon thread"""
+    global _warmup_thread, _warmup_error
+    with _agent_lock:
+        if _warmup_thread is not None and _warmup_thread.is_alive():
+            return
+        _warmup_error = None
+        if background:
+            _warmup_thread = threading.Thread(target=_warm_up, name="ai-agent-warmup", daemon=True)
+            _warmup_thread.start()
+            return
+    _warm_up()
+
+
+def agent_status() -> Dict:
+    """Readiness of the AI agent: 'ready', 'loading', 'failed' or 'idle' (loads on first use)"""
+    if _agent is not None and _agent.is_ready:
+        state = "ready"
+    elif _warmup_thread is not None and _warmup_thread.is_alive():
+        state = "loading"
+    elif _warmup_error:
+        state = "failed"
+    else:
+        state = "idle"
+    return {"state": state, "error": _warmup_error}
+
+
+def configure_agent(app):
+    """Apply the AI_LLM_*, AI_STUB_*, AI_TOOL_TIMEOUT(S), AI_BATCH_*, AI_LATENCY_BUDGET and AI_BREAKER_*
+    settings from the app config to the shared agent"""
+    agent = get_agent()
+    agent.llm_backend = app.config.get("AI_LLM_BACKEND", DEFAULT_LLM_BACKEND)
+    agent.llm_threads = app.config.get("AI_LLM_THREADS", 0)
+    agent.max_new_tokens = app.config.get("AI_MAX_NEW_TOKENS", DEFAULT_MAX_NEW_TOKENS)
+    agent.temperature = app.config.get("AI_TEMPERATURE", DEFAULT_TEMPERATURE)
+    agent.stub_options = {
+        "latency_ms": app.config.get("AI_STUB_LATENCY_MS", 50.0),
+        "tokens_per_s": app.config.get("AI_STUB_TOKENS_PER_S", 100.0),
+        "failure_rate": app.config.get("AI_STUB_FAILURE_RATE", 0.0),
+        "batch_overhead": app.config.get("AI_STUB_BATCH_OVERHEAD", 0.1),
+        "seed": app.config.get("AI_STUB_SEED", 0)
+    }
+    agent.tool_timeout = app.config.get("AI_TOOL_TIMEOUT", DEFAULT_TOOL_TIMEOUT)
+    agent.tool_timeouts = dict(DEFAULT_TOOL_TIMEOUTS, **app.config.get("AI_TOOL_TIMEOUTS", {}))
+    agent.batch_size = app.config.get("AI_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    agent.batch_window_ms = app.config.get("AI_BATCH_WINDOW_MS", DEFAULT_BATCH_WINDOW_MS)
+    agent.latency_budget = app.config.get("AI_LATENCY_BUDGET", DEFAULT_LATENCY_BUDGET)
+    if app.config.get("AI_BREAKER_ENABLED", True):
+        from circuit_breaker import CircuitBreaker
+
+        agent.breaker = CircuitBreaker(
+            failure_threshold=app.config.get("AI_BREAKER_FAILURES", DEFAULT_BREAKER_FAILURES),
+            reset_timeout=app.config.get("AI_BREAKER_RESET", DEFAULT_BREAKER_RESET)
+        )
+    else:
+        agent.breaker = None
+    return agent
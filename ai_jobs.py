@@ -0,0 +1,247 @@
+"""
+Background AI analysis jobs.
+
+Routes submit analysis jobs instead of calling NetworkIncidentAgent.get_solutions
+inline. A bounded pool of worker threads runs them in severity order (critical
+first); a second request for an incident whose job is still queued or running
+joins that job instead of queueing another. When a job that should be recorded
+finishes, its result is written as an IncidentUpdate.
+
+Job state is kept in memory per process, like the notification store.
+"""
+
+import datetime
+import itertools
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_PRIORITY = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+
+class QueueFullError(Exception):
+    """Raised when the analysis queue has no room for another job"""
+
+
+def format_analysis_update(solutions):
+    """Render get_solutions() output as the text of an IncidentUpdate"""
+    return f"""
+        AI Analysis Results:
+
+        Root Cause Analysis:
+        {solutions['analysis']}
+
+        Suggested Actions:
+        {chr(10).join(f'- {action}' for action in solutions['suggested_actions'])}
+
+        Confidence Score: {solutions['confidence_score']*100:.1f}%
+
+        References:
+        {chr(10).join(f'- {ref["type"].upper()}: {ref["reference"]}' for ref in solutions['references'] if 'type' in ref and 'reference' in ref)}
+        """
+
+
+class AnalysisJob:
+    def __init__(self, incident_id, title, description, severity, user_id, record_update, use_rules=True):
+        self.id = str(uuid.uuid4())
+        self.incident_id = incident_id
+        self.title = title
+        self.description = description
+        self.severity = severity
+        self.user_id = user_id
+        self.record_update = record_update  # write an IncidentUpdate when done
+        self.use_rules = use_rules  # answer from a matching runbook instead of the LLM
+        self.state = 'queued'  # queued -> running -> done | failed
+        self.result = None
+        self.error = None
+        self.update_id = None
+        self.created_at = datetime.datetime.now()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def active(self):
+        return self.state in ('queued', 'running')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'incident_id': self.incident_id,
+            'severity': self.severity,
+            'state': self.state,
+            'record_update': self.record_update,
+            'use_rules': self.use_rules,
+            'update_id': self.update_id,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class AnalysisJobQueue:
+    """Priority queue of analysis jobs served by a fixed pool of worker threads"""
+
+    def __init__(self, app, workers=2, max_queued=100, history=1000):
+        self.app = app
+        self.num_workers = workers
+        self.max_queued = max_queued
+        self.history = history
+
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # job id -> AnalysisJob, oldest first
+        self._active_by_incident = {}  # incident id -> job id of its queued/running job
+        self._workers = []
+        self._stats = {'submitted': 0, 'deduplicated': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+
+    def submit(self, incident, user_id, record_update=True, use_rules=True):
+        """Queue analysis of an incident, or join the job already pending for it"""
+        with self._lock:
+            job_id = self._active_by_incident.get(incident.id)
+            job = self._jobs[job_id] if job_id is not None else None
+            if job is not None:
+                if job.state == 'queued':
+                    if record_update and not job.record_update:
+                        # A suggestions-only job becomes a recorded analysis, credited to this requester
+                        job.record_update = True
+                        job.user_id = user_id
+                    if not use_rules:
+                        job.use_rules = False  # a full LLM analysis was asked for before the job started
+                elif (record_update and not job.record_update) or (not use_rules and job.use_rules):
+                    job = None  # a running job has fixed its options, so this request gets a job of its own
+            if job is not None:
+                self._stats['deduplicated'] += 1
+                return job
+
+            if self._queue.qsize() >= self.max_queued:
+                self._stats['rejected'] += 1
+                raise QueueFullError('AI analysis queue is full, please try again later')
+
+            job = AnalysisJob(incident.id, incident.title, incident.description, incident.severity,
+                              user_id, record_update, use_rules)
+            self._jobs[job.id] = job
+            self._active_by_incident[incident.id] = job.id
+            self._stats['submitted'] += 1
+            self._trim_history()
+
+        self._ensure_workers()
+        self._queue.put((SEVERITY_PRIORITY.get(incident.severity, len(SEVERITY_PRIORITY)), next(self._seq), job.id))
+        return job
+
+    def get_job(self, job_id):
+        return self._jobs.get(job_id)
+
+    def get_active_job(self, incident_id):
+        job_id = self._active_by_incident.get(incident_id)
+        return self._jobs.get(job_id) if job_id else None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queued'] = self._queue.qsize()
+            stats['running'] = sum(1 for job in self._jobs.values() if job.state == 'running')
+            stats['workers'] = self.num_workers
+        return stats
+
+    def _trim_history(self):
+        # Forget the oldest finished jobs once we keep more than `history`
+        excess = len(self._jobs) - self.history
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if not self._jobs[job_id].active:
+                del self._jobs[job_id]
+                excess -= 1
+
+    def _ensure_workers(self):
+        # Started lazily so threads live in the serving process, not a pre-fork parent
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            while len(self._workers) < self.num_workers:
+                worker = threading.Thread(target=self._work, name=f'ai-job-worker-{len(self._workers)}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _work(self):
+        while True:
+            _, _, job_id = self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._run(job)
+            self._queue.task_done()
+
+    def _run(self, job):
+        from ai_agent import get_agent
+        from models import IncidentUpdate
+
+        with self._lock:
+            # From here submit() no longer upgrades this job in place
+            job.state = 'running'
+            use_rules = job.use_rules
+        job.started_at = datetime.datetime.now()
+        started = time.perf_counter()
+
+        with self.app.app_context():
+            try:
+                result = get_agent().get_solutions(
+                    title=job.title,
+                    description=job.description,
+                    severity=job.severity,
+                    use_rules=use_rules,
+                    incident_id=job.incident_id
+                )
+                with self._lock:
+                    # Snapshot who to record for and stop accepting joiners in one step, so a
+                    # request upgrading the job can never land after the decision below
+                    record_update, user_id = job.record_update, job.user_id
+                    self._release(job)
+                job.result = result
+                # A fallback answer while the model is unavailable is shown, not kept in the timeline
+                if record_update and not result.get('degraded'):
+                    update = IncidentUpdate.create_update(
+                        incident_id=job.incident_id,
+                        user_id=user_id,
+                        content=format_analysis_update(result)
+                    )
+                    job.update_id = update.id
+                job.state = 'done'
+            except Exception as e:
+                logger.exception("AI analysis job %s for incident %s failed", job.id, job.incident_id)
+                job.error = str(e)
+                job.state = 'failed'
+
+        job.finished_at = datetime.datetime.now()
+        logger.info("AI analysis job %s %s in %.1fs", job.id, job.state, time.perf_counter() - started)
+
+        with self._lock:
+            self._stats['completed' if job.state == 'done' else 'failed'] += 1
+            self._release(job)
+
+    def _release(self, job):
+        # Called with self._lock held; a newer job for the incident may already own the entry
+        if self._active_by_incident.get(job.incident_id) == job.id:
+            del self._active_by_incident[job.incident_id]
+
+
+def init_ai_jobs(app):
+    job_queue = AnalysisJobQueue(
+        app,
+        workers=app.config.get('AI_JOB_WORKERS', 2),
+        max_queued=app.config.get('AI_JOB_QUEUE_SIZE', 100)
+    )
+    app.extensions['ai_jobs'] = job_queue
+    return job_queue
+
+
+def get_job_queue():
+    from flask import current_app
+
+    return current_app.extensions['ai_jobs']
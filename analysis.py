@@ -1,12 +1,15 @@
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, render_template, jsonify, request
 from flask_login import login_required, current_user
-from models import Incident, get_incident_stats
-import pandas as pd
-import numpy as np
+from models import get_incident_stats, get_incident_daily_totals
+from incident_frames import load_incident_frame, resolution_hours
+import datetime
 from ml_model import predict_incidents
+from single_flight import coalesce
 
 analysis_bp = Blueprint('analysis', __name__)
 
+TREND_GRANULARITIES = ('day', 'week', 'month')
+
 @analysis_bp.route('/analysis')
 @login_required
 def analysis_dashboard():
@@ -14,129 +17,103 @@ def analysis_dashboard():
     if current_user.role != 'admin':
         return render_template('analysis.html', admin_access=False)
     
-    # Get incidents data for analysis
-    all_incidents = Incident.get_all_incidents()
-    
     return render_template('analysis.html', admin_access=True)
 
 @analysis_bp.route('/api/analysis/incident-trends')
 @login_required
 def incident_trends():
-    # Get all incidents
-    all_incidents = Incident.get_all_incidents()
-    
-    # Convert to pandas DataFrame for easier analysis
-    data = []
-    for incident in all_incidents:
-        data.append({
-            'id': incident.id,
-            'title': incident.title,
-            'severity': incident.severity,
-            'status': incident.status,
-            'created_at': incident.created_at,
-            'resolved_at': incident.resolved_at,
-            'time_to_resolve': (incident.resolved_at - incident.created_at).total_seconds() / 3600 if incident.resolved_at else None
-        })
-    
-    df = pd.DataFrame(data)
-    
-    # If no incidents, return empty data
-    if df.empty:
-        return jsonify({
-            'incidents_by_day': [],
-            'incidents_by_severity': [],
-            'avg_resolution_time': 0
-        })
-    
-    # Convert datetime to date for grouping
-    if not df.empty and 'created_at' in df.columns:
-        df['date'] = df['created_at'].dt.date
-    
-    # Incidents by day
-    if not df.empty and 'date' in df.columns:
-        incidents_by_day = df.groupby('date').size().reset_index(name='count')
-        incidents_by_day['date'] = incidents_by_day['date'].astype(str)
-        incidents_by_day_data = incidents_by_day.to_dict('records')
-    else:
-        incidents_by_day_data = []
-    
-    # Incidents by severity
-    if not df.empty and 'severity' in df.columns:
-        incidents_by_severity = df.groupby('severity').size().reset_index(name='count')
-        incidents_by_severity_data = incidents_by_severity.to_dict('records')
-    else:
-        incidents_by_severity_data = []
-    
-    # Average resolution time (in hours)
-    avg_resolution_time = df['time_to_resolve'].mean() if 'time_to_resolve' in df.columns and not df['time_to_resolve'].isna().all() else 0
-    
-    return jsonify({
-        'incidents_by_day': incidents_by_day_data,
-        'incidents_by_severity': incidents_by_severity_data,
-        'avg_resolution_time': avg_resolution_time
-    })
+    include_archived = request.args.get('include_archived', 'false').lower() == 'true'
+    granularity = request.args.get('granularity', 'day').lower()
+    if granularity not in TREND_GRANULARITIES:
+        return jsonify({'error': f"granularity must be one of {', '.join(TREND_GRANULARITIES)}"}), 400
+    try:
+        start = datetime.date.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.date.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Concurrent identical requests (e.g. several admin tabs) share one computation
+    key = (include_archived, start, end, granularity)
+    return jsonify(coalesce('analysis.incident-trends', key,
+                            lambda: compute_incident_trends(include_archived, start, end, granularity)))
+
+def trend_period(day, granularity):
+    """First day of the day/week (Monday)/month bucket a day falls in"""
+    if granularity == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def compute_incident_trends(include_archived=False, start=None, end=None, granularity='day'):
+    # Read the daily roll-up only, so the cost follows the number of days, not incidents
+    by_period = {}
+    by_severity = {}
+    resolved_count = 0
+    resolution_hours = 0.0
+    
+    for day, severity, count, resolved, hours in get_incident_daily_totals(start, end, include_archived):
+        period = trend_period(day, granularity)
+        by_period[period] = by_period.get(period, 0) + count
+        by_severity[severity] = by_severity.get(severity, 0) + count
+        resolved_count += resolved
+        resolution_hours += hours
+    
+    return {
+        'granularity': granularity,
+        'incidents_by_day': [
+            {'date': period.isoformat(), 'count': count}
+            for period, count in sorted(by_period.items()) if count
+        ],
+        'incidents_by_severity': [
+            {'severity': severity, 'count': count}
+            for severity, count in sorted(by_severity.items()) if count
+        ],
+        'avg_resolution_time': resolution_hours / resolved_count if resolved_count else 0
+    }
 
 @analysis_bp.route('/api/analysis/prediction')
 @login_required
 def incident_prediction():
     # This would use our ML model to predict incidents
-    prediction_data = predict_incidents()
+    include_archived = request.args.get('include_archived', 'false').lower() == 'true'
+    prediction_data = coalesce('analysis.prediction', include_archived,
+                               lambda: predict_incidents(include_archived=include_archived))
     
     return jsonify(prediction_data)
 
 @analysis_bp.route('/api/analysis/performance')
 @login_required
 def team_performance():
-    # Get all incidents
-    all_incidents = Incident.get_all_incidents()
-    
-    # Convert to pandas DataFrame for easier analysis
-    data = []
-    for incident in all_incidents:
-        if incident.team_id is not None:
-            resolution_time = None
-            if incident.resolved_at and incident.created_at:
-                resolution_time = (incident.resolved_at - incident.created_at).total_seconds() / 3600  # hours
-            
-            data.append({
-                'id': incident.id,
-                'team_id': incident.team_id,
-                'severity': incident.severity,
-                'status': incident.status,
-                'created_at': incident.created_at,
-                'resolved_at': incident.resolved_at,
-                'resolution_time': resolution_time
-            })
-    
-    df = pd.DataFrame(data)
+    include_archived = request.args.get('include_archived', 'false').lower() == 'true'
+    return jsonify(coalesce('analysis.performance', include_archived,
+                            lambda: compute_team_performance(include_archived)))
+
+def compute_team_performance(include_archived=False):
+    # Only the three columns needed, for incidents with a team (archived ones only when asked for)
+    df = load_incident_frame(['team_id', 'created_at', 'resolved_at'], include_archived, require=['team_id'])
     
     # If no incidents with team assignments, return empty data
     if df.empty:
-        return jsonify({
+        return {
             'team_incident_counts': [],
             'team_resolution_times': []
-        })
+        }
     
     # Incident counts by team
-    if not df.empty and 'team_id' in df.columns:
-        team_counts = df.groupby('team_id').size().reset_index(name='count')
-        team_counts_data = team_counts.to_dict('records')
-    else:
-        team_counts_data = []
-    
-    # Average resolution time by team
-    if not df.empty and 'team_id' in df.columns and 'resolution_time' in df.columns:
-        resolution_times = df[~df['resolution_time'].isna()]
-        
-        if not resolution_times.empty:
-            team_resolution = resolution_times.groupby('team_id')['resolution_time'].mean().reset_index()
-            team_resolution_data = team_resolution.to_dict('records')
-        else:
-            team_resolution_data = []
+    team_counts = df.groupby('team_id').size().reset_index(name='count')
+    team_counts_data = team_counts.to_dict('records')
+    
+    # Average resolution time by team (hours)
+    df['resolution_time'] = resolution_hours(df)
+    resolved = df.dropna(subset=['resolution_time'])
+    if not resolved.empty:
+        team_resolution = resolved.groupby('team_id')['resolution_time'].mean().reset_index()
+        team_resolution_data = team_resolution.to_dict('records')
     else:
         team_resolution_data = []
     
-    return jsonify({
+    return {
         'team_incident_counts': team_counts_data,
         'team_resolution_times': team_resolution_data
-    })
+    }
@@ -1,12 +1,26 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
-from models import Incident, IncidentUpdate, Team, User, get_incident_stats, get_recent_activities
+from models import Incident, IncidentUpdate, Team, User, get_incident_stats, get_recent_activities, get_activity_summary, incident_filters_from_args, unit_of_work
+from audit import get_audit_sink
+from ai_agent import agent_status, get_agent
+from ai_jobs import get_job_queue
+from similarity import find_similar_incidents
 import datetime
 
 api_bp = Blueprint('api', __name__)
 
-# Helper function to format incident data
-def format_incident(incident):
+# Helper functions to format incident data
+def format_incident(incident, users=None, teams=None):
+    """Serialize one incident; pass pre-fetched id -> User/Team maps to avoid per-row lookups"""
+    if users is None:
+        users = User.get_users_by_ids([incident.reporter_id, incident.assignee_id])
+    if teams is None:
+        teams = Team.get_teams_by_ids([incident.team_id])
+    
+    reporter = users.get(incident.reporter_id)
+    assignee = users.get(incident.assignee_id)
+    team = teams.get(incident.team_id)
+    
     return {
         'id': incident.id,
         'title': incident.title,
@@ -14,49 +28,63 @@ def format_incident(incident):
         'severity': incident.severity,
         'status': incident.status,
         'reporter_id': incident.reporter_id,
-        'reporter': User.get_user_by_id(incident.reporter_id).username if User.get_user_by_id(incident.reporter_id) else None,
+        'reporter': reporter.username if reporter else None,
         'assignee_id': incident.assignee_id,
-        'assignee': User.get_user_by_id(incident.assignee_id).username if incident.assignee_id and User.get_user_by_id(incident.assignee_id) else None,
+        'assignee': assignee.username if assignee else None,
         'team_id': incident.team_id,
-        'team': Team.get_team_by_id(incident.team_id).name if incident.team_id and Team.get_team_by_id(incident.team_id) else None,
+        'team': team.name if team else None,
         'created_at': incident.created_at.isoformat(),
         'updated_at': incident.updated_at.isoformat(),
         'resolved_at': incident.resolved_at.isoformat() if incident.resolved_at else None,
         'closed_at': incident.closed_at.isoformat() if incident.closed_at else None
     }
 
+def format_incidents(incidents):
+    """Serialize a list of incidents with one user query and one team query in total"""
+    users = User.get_users_by_ids(
+        [inc.reporter_id for inc in incidents] + [inc.assignee_id for inc in incidents]
+    )
+    teams = Team.get_teams_by_ids([inc.team_id for inc in incidents])
+    
+    return [format_incident(inc, users, teams) for inc in incidents]
+
 @api_bp.route('/incidents', methods=['GET'])
 @login_required
 def get_incidents():
-    status = request.args.get('status')
-    severity = request.args.get('severity')
+    limit = request.args.get('limit', 50, type=int)
+    cursor = request.args.get('cursor')
     
-    incidents = Incident.get_all_incidents()
-    
-    if status:
-        incidents = [inc for inc in incidents if inc.status == status]
-    
-    if severity:
-        incidents = [inc for inc in incidents if inc.severity == severity]
+    try:
+        filters = incident_filters_from_args(request.args)
+        incidents, next_cursor = Incident.get_incidents_page(limit=limit, cursor=cursor, **filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
-        'incidents': [format_incident(inc) for inc in incidents]
+        'incidents': format_incidents(incidents),
+        'next_cursor': next_cursor
     })
 
 @api_bp.route('/incidents/<incident_id>', methods=['GET'])
 @login_required
 def get_incident(incident_id):
-    incident = Incident.get_incident_by_id(incident_id)
+    incident = Incident.get_incident_by_id(incident_id, include_archived=True)
     
     if not incident:
         return jsonify({'error': 'Incident not found'}), 404
     
     # Get updates for this incident
-    incident_updates = IncidentUpdate.get_updates_for_incident(incident_id)
+    incident_updates = IncidentUpdate.get_updates_for_incident(incident_id, include_archived=incident.is_archived)
     updates_data = []
     
+    # Resolve every user referenced by the incident and its updates in one query
+    users = User.get_users_by_ids(
+        [incident.reporter_id, incident.assignee_id] + [update.user_id for update in incident_updates]
+    )
+    teams = Team.get_teams_by_ids([incident.team_id])
+    
     for update in incident_updates:
-        user = User.get_user_by_id(update.user_id)
+        user = users.get(update.user_id)
         updates_data.append({
             'id': update.id,
             'content': update.content,
@@ -66,10 +94,27 @@ def get_incident(incident_id):
         })
     
     return jsonify({
-        'incident': format_incident(incident),
+        'incident': format_incident(incident, users, teams),
         'updates': updates_data
     })
 
+@api_bp.route('/incidents/<incident_id>/similar', methods=['GET'])
+@login_required
+def get_similar_incidents(incident_id):
+    incident = Incident.get_incident_by_id(incident_id, include_archived=True)
+    
+    if not incident:
+        return jsonify({'error': 'Incident not found'}), 404
+    
+    k = min(request.args.get('k', 5, type=int), 50)
+    similar = find_similar_incidents(incident, k)
+    
+    formatted = format_incidents([similar_incident for similar_incident, _ in similar])
+    return jsonify([
+        dict(incident_data, similarity=score)
+        for incident_data, (_, score) in zip(formatted, similar)
+    ])
+
 @api_bp.route('/incidents', methods=['POST'])
 @login_required
 def create_incident():
@@ -86,12 +131,13 @@ def create_incident():
         return jsonify({'error': 'Title and severity are required'}), 400
     
     # Create incident
-    incident = Incident.create_incident(
-        title=title,
-        description=description,
-        severity=severity,
-        reporter_id=current_user.id
-    )
+    with unit_of_work():
+        incident = Incident.create_incident(
+            title=title,
+            description=description,
+            severity=severity,
+            reporter_id=current_user.id
+        )
     
     return jsonify({
         'message': 'Incident created successfully',
@@ -111,18 +157,20 @@ def update_incident(incident_id):
     if not data:
         return jsonify({'error': 'No data provided'}), 400
     
-    # Update status
-    if 'status' in data:
-        incident.set_status(data['status'])
-    
-    # Update team assignment
-    if 'team_id' in data:
-        assignee_id = data.get('assignee_id')
-        incident.assign(data['team_id'], assignee_id)
-    
-    # Add update comment
-    if 'comment' in data:
-        IncidentUpdate.create_update(incident_id, current_user.id, data['comment'])
+    # Apply all changes in a single transaction
+    with unit_of_work():
+        # Update status
+        if 'status' in data:
+            incident.set_status(data['status'])
+        
+        # Update team assignment
+        if 'team_id' in data:
+            assignee_id = data.get('assignee_id')
+            incident.assign(data['team_id'], assignee_id)
+        
+        # Add update comment
+        if 'comment' in data:
+            IncidentUpdate.create_update(incident_id, current_user.id, data['comment'])
     
     return jsonify({
         'message': 'Incident updated successfully',
@@ -143,16 +191,56 @@ def get_teams():
 def get_stats():
     return jsonify(get_incident_stats())
 
+@api_bp.route('/ai/status', methods=['GET'])
+@login_required
+def get_ai_status():
+    cache = current_app.extensions.get('solution_cache')
+    runbooks = current_app.extensions.get('runbooks')
+    cve_store = current_app.extensions.get('cve_store')
+    return jsonify(dict(
+        agent_status(),
+        jobs=get_job_queue().stats(),
+        steps=get_agent().step_timings(),
+        batching=get_agent().batching_stats(),
+        breaker=get_agent().breaker_stats(),
+        cache=cache.stats() if cache else None,
+        runbooks=runbooks.stats() if runbooks else None,
+        cve=cve_store.stats() if cve_store else None
+    ))
+
+@api_bp.route('/audit/stats', methods=['GET'])
+@login_required
+def get_audit_stats():
+    sink = get_audit_sink()
+    
+    if sink is None:
+        return jsonify({'buffered': False})
+    
+    return jsonify(dict(sink.stats(), buffered=True))
+
+@api_bp.route('/single-flight/stats', methods=['GET'])
+@login_required
+def get_single_flight_stats():
+    # Per endpoint: calls, computations actually run, and calls collapsed onto an in-flight one
+    return jsonify(current_app.extensions['single_flight'].stats())
+
 @api_bp.route('/activities', methods=['GET'])
 @login_required
 def get_activities():
     limit = request.args.get('limit', 20, type=int)
     activities = get_recent_activities(limit)
     
-    # Format timestamps
-    for activity in activities:
-        activity['timestamp'] = activity['timestamp'].isoformat()
+    return jsonify({
+        'activities': [activity.to_dict() for activity in activities]
+    })
+
+@api_bp.route('/activities/summary', methods=['GET'])
+@login_required
+def get_activities_summary():
+    days = request.args.get('days', 30, type=int)
+    since = datetime.date.today() - datetime.timedelta(days=days)
     
     return jsonify({
-        'activities': activities
+        'since': since.isoformat(),
+        'summary': get_activity_summary(since)
     })
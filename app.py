@@ -21,6 +21,84 @@ def create_app():
         "pool_recycle": 300,
         "pool_pre_ping": True,
     }
+    
+    # Write-behind activity logging (off by default: every log_activity commits)
+    app.config["AUDIT_BUFFERED"] = os.environ.get("AUDIT_BUFFERED", "false").lower() == "true"
+    app.config["AUDIT_BATCH_SIZE"] = int(os.environ.get("AUDIT_BATCH_SIZE", 500))
+    app.config["AUDIT_FLUSH_INTERVAL"] = float(os.environ.get("AUDIT_FLUSH_INTERVAL", 1.0))
+    app.config["AUDIT_SPILL_PATH"] = os.environ.get("AUDIT_SPILL_PATH", os.path.join(app.instance_path, "audit_spill.jsonl"))
+    # Records kept in memory for retry while the database is unavailable; older ones are spilled
+    app.config["AUDIT_MAX_RETRY"] = int(os.environ.get("AUDIT_MAX_RETRY", 10000))
+    
+    # Closed incidents older than this are moved to the archive tables by `flask archive-incidents`
+    app.config["ARCHIVE_AFTER_DAYS"] = int(os.environ.get("ARCHIVE_AFTER_DAYS", 90))
+    
+    # Activity log retention budget for `flask roll-up-activity` (0 rows = no row limit)
+    app.config["ACTIVITY_RETENTION_DAYS"] = int(os.environ.get("ACTIVITY_RETENTION_DAYS", 30))
+    app.config["ACTIVITY_MAX_ROWS"] = int(os.environ.get("ACTIVITY_MAX_ROWS", 0))
+    app.config["ACTIVITY_EXPORT_PATH"] = os.environ.get("ACTIVITY_EXPORT_PATH")
+    
+    # Load the AI models in a background thread at startup instead of on first use
+    app.config["AI_WARMUP"] = os.environ.get("AI_WARMUP", "false").lower() == "true"
+    
+    # Background AI analysis: worker threads per process and maximum queued jobs
+    app.config["AI_JOB_WORKERS"] = int(os.environ.get("AI_JOB_WORKERS", 2))
+    app.config["AI_JOB_QUEUE_SIZE"] = int(os.environ.get("AI_JOB_QUEUE_SIZE", 100))
+    
+    # Seconds each agent plan step may take before the analysis continues without it, optionally
+    # per tool, e.g. AI_TOOL_TIMEOUTS="CVE_Search=5,Network_Diagnostic=90" (Network_Diagnostic,
+    # a model call, defaults to 60s; timed-out steps are not cancelled)
+    app.config["AI_TOOL_TIMEOUT"] = float(os.environ.get("AI_TOOL_TIMEOUT", 10))
+    app.config["AI_TOOL_TIMEOUTS"] = {
+        name.strip(): float(seconds)
+        for name, seconds in (item.split("=") for item in os.environ.get("AI_TOOL_TIMEOUTS", "").split(",") if item.strip())
+    }
+    
+    # Text-generation backend (hf, hf-int8, onnx or stub; see llm_backends.py), runtime threads and limits
+    app.config["AI_LLM_BACKEND"] = os.environ.get("AI_LLM_BACKEND", "hf")
+    app.config["AI_LLM_THREADS"] = int(os.environ.get("AI_LLM_THREADS", 0))
+    app.config["AI_MAX_NEW_TOKENS"] = int(os.environ.get("AI_MAX_NEW_TOKENS", 200))
+    app.config["AI_TEMPERATURE"] = float(os.environ.get("AI_TEMPERATURE", 0.7))
+    
+    # Behaviour of the stand-in "stub" backend used for load tests (no model weights, deterministic text)
+    app.config["AI_STUB_LATENCY_MS"] = float(os.environ.get("AI_STUB_LATENCY_MS", 50))
+    app.config["AI_STUB_TOKENS_PER_S"] = float(os.environ.get("AI_STUB_TOKENS_PER_S", 100))
+    app.config["AI_STUB_FAILURE_RATE"] = float(os.environ.get("AI_STUB_FAILURE_RATE", 0))
+    app.config["AI_STUB_BATCH_OVERHEAD"] = float(os.environ.get("AI_STUB_BATCH_OVERHEAD", 0.1))
+    app.config["AI_STUB_SEED"] = int(os.environ.get("AI_STUB_SEED", 0))
+    
+    # Seconds an analysis may wait for the model before a fallback answer is served (0 = no limit), and the
+    # circuit breaker that serves fallbacks at once after AI_BREAKER_FAILURES failures, for AI_BREAKER_RESET seconds
+    app.config["AI_LATENCY_BUDGET"] = float(os.environ.get("AI_LATENCY_BUDGET", 60))
+    app.config["AI_BREAKER_ENABLED"] = os.environ.get("AI_BREAKER_ENABLED", "true").lower() == "true"
+    app.config["AI_BREAKER_FAILURES"] = int(os.environ.get("AI_BREAKER_FAILURES", 5))
+    app.config["AI_BREAKER_RESET"] = float(os.environ.get("AI_BREAKER_RESET", 30))
+    
+    # Micro-batching of concurrent LLM generations (AI_BATCH_SIZE=1 turns it off)
+    app.config["AI_BATCH_SIZE"] = int(os.environ.get("AI_BATCH_SIZE", 8))
+    app.config["AI_BATCH_WINDOW_MS"] = float(os.environ.get("AI_BATCH_WINDOW_MS", 20))
+    
+    # Runbook catalogue answering well-known incident patterns without the LLM (re-read when it changes)
+    app.config["RUNBOOKS_ENABLED"] = os.environ.get("RUNBOOKS_ENABLED", "true").lower() == "true"
+    app.config["RUNBOOK_PATH"] = os.environ.get("RUNBOOK_PATH", os.path.join(app.root_path, "runbooks.json"))
+    app.config["RUNBOOK_RELOAD_INTERVAL"] = float(os.environ.get("RUNBOOK_RELOAD_INTERVAL", 5))
+    
+    # Similar-incident search: embeddings of every incident in a memory-mapped index
+    app.config["SIMILARITY_ENABLED"] = os.environ.get("SIMILARITY_ENABLED", "true").lower() == "true"
+    app.config["SIMILARITY_INDEX_PATH"] = os.environ.get("SIMILARITY_INDEX_PATH", os.path.join(app.instance_path, "similarity"))
+    app.config["SIMILARITY_BATCH_SIZE"] = int(os.environ.get("SIMILARITY_BATCH_SIZE", 64))
+    
+    # Local CVE database for the agent's CVE_Search tool, loaded by `flask ingest-cve-feeds`
+    app.config["CVE_DB_ENABLED"] = os.environ.get("CVE_DB_ENABLED", "true").lower() == "true"
+    app.config["CVE_DB_PATH"] = os.environ.get("CVE_DB_PATH", os.path.join(app.instance_path, "cve.db"))
+    app.config["CVE_FEED_DIR"] = os.environ.get("CVE_FEED_DIR")
+    
+    # Cache of get_solutions results: in-process LRU plus an on-disk tier that survives restarts
+    app.config["AI_CACHE_ENABLED"] = os.environ.get("AI_CACHE_ENABLED", "true").lower() == "true"
+    app.config["AI_CACHE_PATH"] = os.environ.get("AI_CACHE_PATH", os.path.join(app.instance_path, "solution_cache.db"))
+    app.config["AI_CACHE_TTL"] = int(os.environ.get("AI_CACHE_TTL", 7 * 24 * 3600))
+    app.config["AI_CACHE_MAX_ENTRIES"] = int(os.environ.get("AI_CACHE_MAX_ENTRIES", 1024))
+    app.config["AI_CACHE_MAX_DISK_MB"] = float(os.environ.get("AI_CACHE_MAX_DISK_MB", 64))
 
     # Initialize extensions
     from extentions import db, login_manager
@@ -28,6 +106,30 @@ def create_app():
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
     migrate = Migrate(app, db)
+    
+    from audit import init_audit
+    init_audit(app)
+    
+    from ai_jobs import init_ai_jobs
+    init_ai_jobs(app)
+    
+    from ai_agent import configure_agent
+    configure_agent(app)
+    
+    from single_flight import init_single_flight
+    init_single_flight(app)
+    
+    from solution_cache import init_solution_cache
+    init_solution_cache(app)
+    
+    from similarity import init_similarity
+    init_similarity(app)
+    
+    from runbooks import init_runbooks
+    init_runbooks(app)
+    
+    from cve_store import init_cve_store
+    init_cve_store(app)
     # Import models
     from models import User
 
@@ -47,6 +149,14 @@ def create_app():
     app.register_blueprint(analysis_bp)
     app.register_blueprint(api_bp, url_prefix='/api')
     #app.register_blueprint(kb_bp)
+    
+    if app.config["AI_WARMUP"]:
+        from ai_agent import warm_up
+        warm_up(background=True)
+
+    # Register CLI commands
+    from commands import register_commands
+    register_commands(app)
 
     @app.route('/')
     def home():
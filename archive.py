@@ -0,0 +1,102 @@
+"""
+Hot/cold archival of closed incidents.
+
+Incidents that have been closed for longer than ARCHIVE_AFTER_DAYS are moved,
+together with their updates, from incidents/incident_updates into
+incidents_archive/incident_updates_archive. Each batch is copied with
+INSERT ... SELECT and deleted in its own transaction, so the hot tables stay
+small and the job can be interrupted safely at any point.
+
+Archived incidents keep counting towards the dashboard counters, move to the
+archived side of the daily trends roll-up, and can still be fetched with Incident.get_incident_by_id(..., include_archived=True).
+"""
+
+import datetime
+import logging
+
+from sqlalchemy import delete, insert, select
+
+from extentions import db
+from models import (
+    Incident, IncidentUpdate, ArchivedIncident, ArchivedIncidentUpdate,
+    bump_incident_rollup_cell, incident_rollup_cells
+)
+
+logger = logging.getLogger(__name__)
+
+INCIDENT_COLUMNS = [
+    'id', 'title', 'description', 'severity', 'status', 'reporter_id', 'assignee_id',
+    'team_id', 'created_at', 'updated_at', 'resolved_at', 'closed_at'
+]
+UPDATE_COLUMNS = ['id', 'incident_id', 'user_id', 'content', 'created_at']
+
+
+def archive_batch(cutoff, batch_size=1000):
+    """Move one batch of incidents closed before cutoff; returns the number of incidents moved"""
+    incidents = Incident.__table__
+    updates = IncidentUpdate.__table__
+
+    # Lock the batch (FOR UPDATE on databases that have it, SQLite serialises writers anyway) so an
+    # incident cannot be reopened or given an update while it is moved
+    ids = db.session.execute(
+        select(incidents.c.id)
+        .where(incidents.c.status == 'closed', incidents.c.closed_at < cutoff)
+        .order_by(incidents.c.closed_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    if not ids:
+        return 0
+
+    # Every statement re-checks the archiving condition, so the copy, the roll-up shift and the
+    # delete all cover the same incidents even if one changed after the ids were read
+    movable = (incidents.c.id.in_(ids), incidents.c.status == 'closed', incidents.c.closed_at < cutoff)
+    movable_ids = select(incidents.c.id).where(*movable)
+
+    try:
+        # Shift the batch's roll-up cells to the archived side in the same transaction
+        for cell in incident_rollup_cells(Incident, *movable):
+            for archived, sign in ((False, -1), (True, 1)):
+                bump_incident_rollup_cell(
+                    cell['day'], cell['severity'], cell['status'], cell['team_id'], archived,
+                    count=sign * cell['count'], resolved_count=sign * cell['resolved_count'],
+                    resolution_hours=sign * cell['resolution_hours']
+                )
+        db.session.execute(
+            insert(ArchivedIncident.__table__).from_select(
+                INCIDENT_COLUMNS,
+                select(*[incidents.c[name] for name in INCIDENT_COLUMNS]).where(*movable)
+            )
+        )
+        db.session.execute(
+            insert(ArchivedIncidentUpdate.__table__).from_select(
+                UPDATE_COLUMNS,
+                select(*[updates.c[name] for name in UPDATE_COLUMNS]).where(updates.c.incident_id.in_(movable_ids))
+            )
+        )
+        db.session.execute(delete(updates).where(updates.c.incident_id.in_(movable_ids)))
+        moved = db.session.execute(delete(incidents).where(*movable)).rowcount
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return moved
+
+
+def archive_closed_incidents(older_than_days=90, batch_size=1000, max_batches=None):
+    """Archive every incident closed more than older_than_days ago, one transaction per batch"""
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=older_than_days)
+    total = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            break
+        total += moved
+        batches += 1
+        logger.info("Archived %d incidents (%d so far)", moved, total)
+
+    return total
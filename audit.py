@@ -0,0 +1,247 @@
+"""
+Write-behind audit sink for activity logs.
+
+When AUDIT_BUFFERED is enabled, log_activity() enqueues records here instead of
+committing an ActivityLog row per call. A background thread bulk-inserts the
+queue whenever it reaches AUDIT_BATCH_SIZE records or AUDIT_FLUSH_INTERVAL
+seconds have passed. When a bulk insert fails the batch is written row by row:
+a row the database rejects is spilled on its own, and rows left over because
+the database is unreachable are retried, up to AUDIT_MAX_RETRY records before
+the oldest are spilled. On shutdown anything still unwritten is appended to a
+JSON-lines spill file, which is loaded back the next time the sink starts.
+"""
+
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+
+class AuditSink:
+    """Buffers activity log records and flushes them to the database in batches"""
+
+    def __init__(self, engine, batch_size=500, flush_interval=1.0, spill_path=None, max_retry=10000):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.max_retry = max_retry
+
+        self._queue = queue.Queue()
+        self._retry = []  # records left unwritten by a failed flush, written before new records
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._atexit_registered = False
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'spilled': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0
+        }
+
+    def enqueue(self, action_type, description, user_id=None, timestamp=None):
+        """Queue one activity record; returns immediately"""
+        self._ensure_started()
+        self._queue.put({
+            'action_type': action_type,
+            'description': description,
+            'user_id': user_id,
+            'timestamp': timestamp or datetime.datetime.now()
+        })
+        with self._stats_lock:
+            self._stats['enqueued'] += 1
+
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write everything queued so far; returns the number of records written"""
+        with self._flush_lock:
+            batch = self._retry
+            self._retry = []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if not batch:
+                return 0
+
+            from models import ActivityLog
+
+            started = time.perf_counter()
+            written = len(batch)
+            try:
+                with self.engine.begin() as conn:
+                    for start in range(0, len(batch), self.batch_size):
+                        conn.execute(ActivityLog.__table__.insert(), batch[start:start + self.batch_size])
+            except Exception:
+                logger.exception("Audit flush of %d records failed, writing them one by one", len(batch))
+                self._stats['failed_flushes'] += 1
+                written, unwritten = self._insert_each(batch)
+                self._keep_for_retry(unwritten)
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._stats['flushes'] += 1
+            self._stats['written'] += written
+            self._stats['last_flush_ms'] = elapsed_ms
+            self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], elapsed_ms)
+            self._stats['total_flush_ms'] += elapsed_ms
+            return written
+
+    def _insert_each(self, records):
+        """Insert records one per transaction; returns (written, records left for a retry)"""
+        from models import ActivityLog
+
+        written = 0
+        for i, record in enumerate(records):
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(ActivityLog.__table__.insert(), [record])
+            except OperationalError:
+                # The database is unavailable rather than the row being bad; try the rest later
+                logger.exception("Audit database unavailable, %d records left for retry", len(records) - i)
+                return written, records[i:]
+            except Exception:
+                logger.exception("Audit record rejected by the database, spilling it: %r", record)
+                self._spill([record])
+            else:
+                written += 1
+        return written, []
+
+    def _keep_for_retry(self, records):
+        overflow = len(records) - self.max_retry
+        if overflow > 0:
+            logger.error("Audit retry buffer full, spilling the %d oldest records", overflow)
+            self._spill(records[:overflow])
+            records = records[overflow:]
+        self._retry = records
+
+    def stop(self):
+        """Stop the flusher thread and drain the queue; unwritten records go to the spill file"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval * 5 + 5)
+
+        self.flush()
+        if self._retry:
+            self._spill(self._retry)
+            self._retry = []
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize() + len(self._retry)
+        stats['avg_flush_ms'] = stats['total_flush_ms'] / stats['flushes'] if stats['flushes'] else 0.0
+        del stats['total_flush_ms']
+        return stats
+
+    def load_spill(self):
+        """Re-queue records spilled by a previous shutdown"""
+        if not self.spill_path:
+            return 0
+
+        # Claim the file first so only one worker process replays it
+        claimed = f"{self.spill_path}.{os.getpid()}"
+        try:
+            os.replace(self.spill_path, claimed)
+        except FileNotFoundError:
+            return 0
+
+        loaded = 0
+        with open(claimed) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    record['timestamp'] = datetime.datetime.fromisoformat(record['timestamp'])
+                    self._queue.put(record)
+                    loaded += 1
+        os.remove(claimed)
+
+        if loaded:
+            logger.info("Re-queued %d spilled audit records", loaded)
+            self._ensure_started()
+            self._wakeup.set()
+        return loaded
+
+    def _spill(self, records):
+        if not self.spill_path:
+            logger.error("Dropping %d unwritten audit records (no AUDIT_SPILL_PATH)", len(records))
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)
+        with open(self.spill_path, 'a') as f:
+            for record in records:
+                f.write(json.dumps(dict(record, timestamp=record['timestamp'].isoformat())) + '\n')
+        self._stats['spilled'] += len(records)
+        logger.warning("Spilled %d unwritten audit records to %s", len(records), self.spill_path)
+
+    def _ensure_started(self):
+        # Started lazily so the thread is created in the worker process, not a pre-fork parent
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='audit-sink', daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Unexpected error in audit sink")
+
+
+def init_audit(app):
+    """Attach an AuditSink to the app when AUDIT_BUFFERED is enabled"""
+    if not app.config.get('AUDIT_BUFFERED'):
+        return None
+
+    from extentions import db
+
+    with app.app_context():
+        sink = AuditSink(
+            db.engine,
+            batch_size=app.config.get('AUDIT_BATCH_SIZE', 500),
+            flush_interval=app.config.get('AUDIT_FLUSH_INTERVAL', 1.0),
+            spill_path=app.config.get('AUDIT_SPILL_PATH'),
+            max_retry=app.config.get('AUDIT_MAX_RETRY', 10000)
+        )
+    sink.load_spill()
+    app.extensions['audit_sink'] = sink
+    return sink
+
+
+def get_audit_sink():
+    """Return the current app's AuditSink, or None when audit logging is synchronous"""
+    from flask import current_app, has_app_context
+
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('audit_sink')
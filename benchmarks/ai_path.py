@@ -0,0 +1,122 @@
+"""
+Benchmark: the AI analysis path end to end, on the deterministic stub backend.
+
+Boots the app with AI_LLM_BACKEND=stub (no model weights), a throwaway database
+and cache, then submits --analyses jobs for --distinct different incidents
+through the analysis job queue and waits for them. It reports throughput, job
+latency percentiles, and the job, cache, batching, circuit breaker and
+plan-step counters.
+Results are identical between runs with the same settings (the digest line
+shows it), so configurations can be compared repeatably. Injected failures
+follow the order of model calls, so with --failure-rate they only repeat
+exactly when calls are serial (--workers 1 --batch-size 1).
+
+Usage:
+    python benchmarks/ai_path.py --analyses 200 --distinct 50 --workers 4 \
+        --latency-ms 50 --tokens-per-s 200 --failure-rate 0.02 --batch-size 8
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AI analysis path on the stub backend")
+    parser.add_argument("--analyses", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=50, help="different incidents among the analyses")
+    parser.add_argument("--workers", type=int, default=4, help="AI_JOB_WORKERS")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--tokens-per-s", type=float, default=200)
+    parser.add_argument("--max-new-tokens", type=int, default=100)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--tool-timeout", type=float, default=10)
+    parser.add_argument("--latency-budget", type=float, default=60, help="AI_LATENCY_BUDGET (0 = no limit)")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ai-path-bench-")
+    os.environ.update({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(workdir, 'app.db')}",
+        "AI_LLM_BACKEND": "stub",
+        "AI_STUB_LATENCY_MS": str(args.latency_ms),
+        "AI_STUB_TOKENS_PER_S": str(args.tokens_per_s),
+        "AI_STUB_FAILURE_RATE": str(args.failure_rate),
+        "AI_STUB_SEED": str(args.seed),
+        "AI_MAX_NEW_TOKENS": str(args.max_new_tokens),
+        "AI_BATCH_SIZE": str(args.batch_size),
+        "AI_TOOL_TIMEOUT": str(args.tool_timeout),
+        "AI_LATENCY_BUDGET": str(args.latency_budget),
+        "AI_JOB_WORKERS": str(args.workers),
+        "AI_JOB_QUEUE_SIZE": str(args.analyses),
+        "AI_CACHE_ENABLED": "false" if args.no_cache else "true",
+        "AI_CACHE_PATH": os.path.join(workdir, "solution_cache.db"),
+        "CVE_DB_PATH": os.path.join(workdir, "cve.db"),
+        # Every analysis should reach the model
+        "RUNBOOKS_ENABLED": "false",
+        "SIMILARITY_ENABLED": "false",
+    })
+
+    try:
+        from app import app
+        from ai_agent import get_agent
+        from dummy_data import INCIDENT_DESCRIPTIONS, INCIDENT_TITLES
+
+        # The app logs every job (and a traceback per injected failure); the counters below cover them
+        logging.disable(logging.ERROR)
+        job_queue = app.extensions["ai_jobs"]
+        incidents = [
+            SimpleNamespace(
+                id=i,
+                title=INCIDENT_TITLES[i % len(INCIDENT_TITLES)],
+                description=f"{INCIDENT_DESCRIPTIONS[i % len(INCIDENT_DESCRIPTIONS)]} (site {i})",
+                severity=("critical", "high", "medium", "low")[i % 4]
+            )
+            for i in range(args.distinct)
+        ]
+
+        # Submit one wave per distinct incident at a time, so repeats are real cache lookups, not dedupes
+        started = time.perf_counter()
+        jobs = []
+        for start in range(0, args.analyses, args.distinct):
+            wave = [job_queue.submit(incidents[i % args.distinct], user_id=None, record_update=False)
+                    for i in range(start, min(args.analyses, start + args.distinct))]
+            while any(job.active for job in wave):
+                time.sleep(0.005)
+            jobs.extend(wave)
+        elapsed = time.perf_counter() - started
+
+        latencies = [(job.finished_at - job.created_at).total_seconds() * 1000 for job in jobs]
+        results = sorted(json.dumps([job.incident_id, job.state, job.result], sort_keys=True) for job in jobs)
+        cache = app.extensions.get("solution_cache")
+
+        print(f"analyses:  {len(jobs)} in {elapsed:.2f}s ({len(jobs) / elapsed:.1f}/s)")
+        print(f"latency:   p50 {percentile(latencies, 0.5):.0f}ms  p95 {percentile(latencies, 0.95):.0f}ms")
+        print(f"jobs:      {job_queue.stats()}")
+        print(f"cache:     {cache.stats() if cache else None}")
+        print(f"batching:  {get_agent().batching_stats()}")
+        print(f"breaker:   {get_agent().breaker_stats()}")
+        print(f"steps:     {json.dumps(get_agent().step_timings())}")
+        print(f"digest:    {hashlib.sha256(''.join(results).encode('utf-8')).hexdigest()[:16]}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: loading incidents into a DataFrame for analysis, ORM objects vs
+incident_frames.load_incident_frame.
+
+Fills a throwaway SQLite database with --rows incidents (with realistic
+description sizes), then builds the team-performance input both ways: hydrating
+every Incident and copying fields into dicts, and selecting only the needed
+columns into a typed frame. Reports time and peak traced memory for each.
+
+Usage:
+    python benchmarks/analysis_frames.py --rows 200000
+"""
+
+import argparse
+import datetime
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from flask import Flask
+from extentions import db
+from models import User, Team, Incident, new_incident_id
+from incident_frames import load_incident_frame, resolution_hours
+
+SEVERITIES = ["critical", "high", "medium", "low"]
+BATCH_SIZE = 50000
+
+
+def orm_frame():
+    data = []
+    for incident in Incident.get_all_incidents():
+        if incident.team_id is not None:
+            data.append({
+                'team_id': incident.team_id,
+                'severity': incident.severity,
+                'status': incident.status,
+                'created_at': incident.created_at,
+                'resolved_at': incident.resolved_at,
+                'resolution_time': (incident.resolved_at - incident.created_at).total_seconds() / 3600
+                if incident.resolved_at else None
+            })
+    return pd.DataFrame(data)
+
+
+def projected_frame():
+    df = load_incident_frame(['team_id', 'created_at', 'resolved_at'], require=['team_id'])
+    df['resolution_time'] = resolution_hours(df)
+    return df
+
+
+def measure(fn):
+    db.session.expunge_all()
+    tracemalloc.start()
+    started = time.perf_counter()
+    frame = fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return frame, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incident DataFrame loading")
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="analysis-frames-bench-")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    db.init_app(app)
+
+    try:
+        with app.app_context():
+            db.create_all()
+            user = User(username="bench", email="bench@example.com", role="admin")
+            teams = [Team(name=f"team {i}") for i in range(5)]
+            db.session.add_all([user] + teams)
+            db.session.commit()
+
+            rng = random.Random(0)
+            start = datetime.datetime(2025, 1, 1)
+            for offset in range(0, args.rows, BATCH_SIZE):
+                rows = []
+                for _ in range(min(BATCH_SIZE, args.rows - offset)):
+                    created_at = start + datetime.timedelta(seconds=rng.randint(0, 365 * 86400))
+                    resolved_at = created_at + datetime.timedelta(minutes=rng.randint(5, 5000)) \
+                        if rng.random() < 0.6 else None
+                    rows.append({
+                        "id": new_incident_id(created_at), "title": "Synthetic incident",
+                        "description": "x" * rng.randint(200, 2000), "severity": rng.choice(SEVERITIES),
+                        "status": "resolved" if resolved_at else "open", "reporter_id": user.id,
+                        "team_id": rng.choice([None] + [team.id for team in teams]),
+                        "created_at": created_at, "resolved_at": resolved_at,
+                    })
+                db.session.bulk_insert_mappings(Incident, rows)
+                db.session.commit()
+
+            for label, fn in (("ORM objects", orm_frame), ("projected", projected_frame)):
+                frame, elapsed, peak = measure(fn)
+                print(f"{label:12} {len(frame):>9,} rows  {elapsed * 1000:8.0f}ms  "
+                      f"peak {peak / 2 ** 20:7.1f} MiB  frame {frame.memory_usage(deep=True).sum() / 2 ** 20:6.1f} MiB")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
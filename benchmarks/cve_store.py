@@ -0,0 +1,144 @@
+"""
+Benchmark: offline CVE database (cve_store.CveStore).
+
+Writes a synthetic NVD 1.1 feed (gzipped, like the published yearly files),
+ingests it, re-runs the ingest (the unchanged file is skipped), ingests a
+"modified" feed in which a fraction of the entries has a newer lastModified
+date, then times CVE_Search-style queries built from the dummy incident
+descriptions. Peak resident memory shows the feed is streamed, not loaded.
+
+Usage:
+    python benchmarks/cve_store.py --entries 200000 --modified 0.01 --queries 2000
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VENDORS = {
+    "cisco": ["ios", "ios xe", "asa", "nx-os", "anyconnect"],
+    "juniper": ["junos", "srx"],
+    "f5": ["big-ip", "nginx"],
+    "fortinet": ["fortios", "fortigate"],
+    "palo_alto_networks": ["pan-os", "globalprotect"],
+    "isc": ["bind", "dhcp"],
+    "openssl": ["openssl"],
+    "apache": ["http_server", "tomcat", "kafka"],
+    "microsoft": ["windows_server", "exchange_server", "active_directory"],
+    "kubernetes": ["kubernetes"],
+    "docker": ["docker"],
+    "postgresql": ["postgresql"],
+    "openvpn": ["openvpn"],
+    "linux": ["linux_kernel"],
+}
+WEAKNESSES = [
+    "buffer overflow", "denial of service", "memory leak", "improper certificate validation",
+    "authentication bypass", "dns cache poisoning", "packet processing crash", "privilege escalation",
+    "resource exhaustion", "tls handshake failure", "improper input validation", "race condition",
+]
+COMPONENTS = [
+    "the dns resolver", "the vpn gateway", "the ssl vpn portal", "the bgp daemon", "the load balancer",
+    "the web management interface", "the ipsec implementation", "the packet filter", "the snmp agent",
+    "the ldap client", "the container runtime", "the connection pool",
+]
+
+
+def entry(index, modified="2024-01-01T00:00Z"):
+    rng = random.Random(index)
+    vendor = rng.choice(list(VENDORS))
+    product = rng.choice(VENDORS[vendor])
+    score = round(rng.uniform(2.0, 10.0), 1)
+    severity = "CRITICAL" if score >= 9 else "HIGH" if score >= 7 else "MEDIUM" if score >= 4 else "LOW"
+    description = (f"A {rng.choice(WEAKNESSES)} in {rng.choice(COMPONENTS)} of {vendor.replace('_', ' ')} "
+                   f"{product.replace('_', ' ')} allows a remote attacker to cause {rng.choice(WEAKNESSES)} "
+                   f"via crafted packets.")
+    return {
+        "cve": {
+            "CVE_data_meta": {"ID": f"CVE-{2000 + index // 100000}-{index % 100000:05d}"},
+            "description": {"description_data": [{"lang": "en", "value": description}]},
+        },
+        "configurations": {"nodes": [{"operator": "OR", "cpe_match": [
+            {"vulnerable": True, "cpe23Uri": f"cpe:2.3:a:{vendor}:{product.replace(' ', '_')}:*:*:*:*:*:*:*:*"}
+        ]}]},
+        "impact": {"baseMetricV3": {"cvssV3": {"baseScore": score, "baseSeverity": severity}}},
+        "publishedDate": "2023-01-01T00:00Z",
+        "lastModifiedDate": modified,
+    }
+
+
+def write_feed(path, indices, modified="2024-01-01T00:00Z"):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write('{"CVE_data_type": "CVE", "CVE_data_format": "MITRE", "CVE_Items": [')
+        for n, index in enumerate(indices):
+            if n:
+                f.write(",")
+            json.dump(entry(index, modified), f)
+        f.write("]}")
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the offline CVE database")
+    parser.add_argument("--entries", type=int, default=200000)
+    parser.add_argument("--modified", type=float, default=0.01, help="fraction of entries in the modified feed")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    from cve_store import CveStore
+    from dummy_data import INCIDENT_DESCRIPTIONS, INCIDENT_TITLES
+
+    workdir = tempfile.mkdtemp(prefix="cve-bench-")
+    try:
+        feeds = os.path.join(workdir, "feeds")
+        os.makedirs(feeds)
+        write_feed(os.path.join(feeds, "nvdcve-1.1-all.json.gz"), range(args.entries))
+        feed_mb = os.path.getsize(os.path.join(feeds, "nvdcve-1.1-all.json.gz")) / 2 ** 20
+        store = CveStore(os.path.join(workdir, "cve.db"))
+
+        started = time.perf_counter()
+        counts = store.ingest([feeds])
+        print(f"initial ingest: {counts['added']} entries from a {feed_mb:.1f} MiB feed "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        counts = store.ingest([feeds])
+        print(f"re-ingest:      {counts['skipped_files']} unchanged file skipped in "
+              f"{(time.perf_counter() - started) * 1000:.1f}ms")
+
+        changed = random.Random(0).sample(range(args.entries), int(args.entries * args.modified))
+        write_feed(os.path.join(feeds, "nvdcve-1.1-modified.json.gz"), changed, modified="2024-06-01T00:00Z")
+        started = time.perf_counter()
+        counts = store.ingest([feeds])
+        print(f"modified feed:  {counts['updated']} updated, {counts['unchanged']} unchanged "
+              f"in {time.perf_counter() - started:.2f}s")
+
+        texts = INCIDENT_DESCRIPTIONS + INCIDENT_TITLES
+        latencies = []
+        answered = 0
+        for i in range(args.queries):
+            started = time.perf_counter()
+            answered += bool(store.search(texts[i % len(texts)]))
+            latencies.append((time.perf_counter() - started) * 1000)
+        print(f"search:         p50 {percentile(latencies, 0.5):.2f}ms  p95 {percentile(latencies, 0.95):.2f}ms "
+              f"over {args.queries} queries ({answered} with matches)")
+        # ru_maxrss is in KiB on Linux
+        print(f"peak RSS:       {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: insert rate and index size for incident primary key layouts.
+
+Compares random UUIDv4 vs time-ordered UUIDv7 keys, each stored as 36-character
+text (the old String(36) column) and in the compact UUIDKey form used by
+models.py (native uuid on PostgreSQL, 16-byte binary elsewhere). Every variant
+gets an incidents-like table plus an updates table with an indexed foreign key.
+
+Usage:
+    python benchmarks/incident_keys.py --rows 1000000
+    python benchmarks/incident_keys.py --database-uri postgresql://... --rows 1000000
+"""
+
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table, create_engine, text
+from models import UUIDKey, uuid7
+
+VARIANTS = [
+    ("uuid4_text", String(36), lambda: str(uuid.uuid4())),
+    ("uuid7_text", String(36), lambda: str(uuid7())),
+    ("uuid4_binary", UUIDKey(), lambda: str(uuid.uuid4())),
+    ("uuid7_binary", UUIDKey(), lambda: str(uuid7())),
+]
+
+
+def build_tables(metadata, name, key_type):
+    incidents = Table(
+        f"bench_{name}_incidents", metadata,
+        Column("id", key_type, primary_key=True),
+        Column("severity", String(20)),
+        Column("created_at", DateTime),
+    )
+    updates = Table(
+        f"bench_{name}_updates", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("incident_id", key_type, ForeignKey(incidents.c.id), nullable=False),
+        Column("created_at", DateTime),
+        Index(f"ix_bench_{name}_updates_incident_id", "incident_id"),
+    )
+    return incidents, updates
+
+
+def index_sizes(conn, incidents, updates):
+    """Return {index name: bytes} for the key indexes of one variant"""
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(text(
+            "SELECT indexrelname, pg_relation_size(indexrelid) FROM pg_stat_user_indexes "
+            "WHERE relname IN (:incidents, :updates)"
+        ), {"incidents": incidents.name, "updates": updates.name}).fetchall()
+        return dict(rows)
+
+    if conn.dialect.name == "sqlite":
+        try:
+            rows = conn.execute(text(
+                "SELECT s.name, SUM(s.pgsize) FROM dbstat s JOIN sqlite_master m ON m.name = s.name "
+                "WHERE m.type = 'index' AND m.tbl_name IN (:incidents, :updates) GROUP BY s.name"
+            ), {"incidents": incidents.name, "updates": updates.name}).fetchall()
+            return dict(rows)
+        except Exception:
+            return {}  # SQLite built without dbstat
+
+    return {}
+
+
+def run_variant(engine, name, key_type, make_key, num_rows, batch_size):
+    metadata = MetaData()
+    incidents, updates = build_tables(metadata, name, key_type)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    now = datetime.datetime.now()
+    started = time.perf_counter()
+    for start in range(0, num_rows, batch_size):
+        keys = [make_key() for _ in range(min(batch_size, num_rows - start))]
+        with engine.begin() as conn:
+            conn.execute(incidents.insert(), [{"id": key, "severity": "medium", "created_at": now} for key in keys])
+            conn.execute(updates.insert(), [{"incident_id": key, "created_at": now} for key in keys])
+    elapsed = time.perf_counter() - started
+
+    with engine.connect() as conn:
+        sizes = index_sizes(conn, incidents, updates)
+
+    metadata.drop_all(engine)
+    return num_rows / elapsed, sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare incident key layouts")
+    parser.add_argument("--rows", type=int, default=1000000, help="incidents to insert per variant")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per insert transaction")
+    parser.add_argument("--database-uri", help="database to use (default: temporary SQLite file)")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    uri = args.database_uri
+    if not uri:
+        tmp_dir = tempfile.mkdtemp(prefix="incident-keys-")
+        uri = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    engine = create_engine(uri)
+
+    print(f"Inserting {args.rows:,} incidents (+1 update each) per variant, {args.batch_size} per transaction\n")
+    print(f"{'variant':<14} {'rows/s':>12} {'index MiB':>10}  indexes")
+    for name, key_type, make_key in VARIANTS:
+        rate, sizes = run_variant(engine, name, key_type, make_key, args.rows, args.batch_size)
+        total = sum(sizes.values()) / (1024 * 1024) if sizes else float("nan")
+        detail = ", ".join(f"{index}={size / (1024 * 1024):.1f}" for index, size in sorted(sizes.items()))
+        print(f"{name:<14} {rate:>12,.0f} {total:>10.1f}  {detail or '(index sizes unavailable)'}")
+
+    engine.dispose()
+    if tmp_dir:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: generation backends for the agent on CPU.
+
+Each backend runs in its own subprocess so resident memory is measured cleanly.
+For every backend this reports model load time, generation tokens/s (from direct
+predict() calls), p50/p95 latency of a full get_solutions() analysis, and peak
+resident memory. Batching and the solution cache are off, so every analysis
+runs the model.
+
+Usage:
+    python benchmarks/llm_backends.py --backends hf hf-int8 onnx --analyses 10 --threads 4
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(backend, analyses, threads, max_new_tokens):
+    from ai_agent import NetworkIncidentAgent
+    from dummy_data import INCIDENT_TITLES, INCIDENT_DESCRIPTIONS
+
+    agent = NetworkIncidentAgent()
+    agent.llm_backend = backend
+    agent.llm_threads = threads
+    agent.max_new_tokens = max_new_tokens
+    agent.batch_size = 1
+
+    started = time.perf_counter()
+    tokenizer = agent.llm.pipeline.tokenizer
+    load_s = time.perf_counter() - started
+
+    incidents = [
+        (INCIDENT_TITLES[i % len(INCIDENT_TITLES)], INCIDENT_DESCRIPTIONS[i % len(INCIDENT_DESCRIPTIONS)])
+        for i in range(analyses)
+    ]
+
+    tokens = 0
+    started = time.perf_counter()
+    for title, description in incidents:
+        completion = agent.predict(f"Diagnose this network incident: {title}. {description}")
+        tokens += len(tokenizer(completion).input_ids)
+    tokens_per_s = tokens / (time.perf_counter() - started)
+
+    latencies = []
+    for title, description in incidents:
+        started = time.perf_counter()
+        agent.get_solutions(title, description, "high")
+        latencies.append(time.perf_counter() - started)
+
+    return {
+        "backend": backend,
+        "load_s": load_s,
+        "tokens_per_s": tokens_per_s,
+        "p50_s": percentile(latencies, 0.5),
+        "p95_s": percentile(latencies, 0.95),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare agent generation backends")
+    parser.add_argument("--backends", nargs="+", default=["hf", "hf-int8", "onnx"])
+    parser.add_argument("--analyses", type=int, default=10, help="analyses (and direct generations) per backend")
+    parser.add_argument("--threads", type=int, default=0, help="runtime threads (0 = runtime default)")
+    parser.add_argument("--max-new-tokens", type=int, default=200)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.analyses, args.threads, args.max_new_tokens)))
+        return
+
+    print(f"{'backend':<9} {'load s':>7} {'tokens/s':>9} {'p50 s':>7} {'p95 s':>7} {'peak RSS MiB':>13}")
+    for backend in args.backends:
+        result = subprocess.run(
+            [sys.executable, __file__, "--worker", backend, "--analyses", str(args.analyses),
+             "--threads", str(args.threads), "--max-new-tokens", str(args.max_new_tokens)],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+            print(f"{backend:<9} {error}")
+            continue
+        row = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{backend:<9} {row['load_s']:>7.1f} {row['tokens_per_s']:>9.1f} {row['p50_s']:>7.2f} "
+              f"{row['p95_s']:>7.2f} {row['peak_rss_mib']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
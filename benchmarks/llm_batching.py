@@ -0,0 +1,58 @@
+"""
+Benchmark: get_solutions throughput with and without micro-batched generation.
+
+Runs --concurrency analyses at a time against the real agent (downloads and
+loads the models on first run) for each batch size given, and reports
+analyses per second. Batch size 1 is the old one-forward-pass-per-prompt path.
+The solution cache is not attached, so every analysis runs the model.
+
+Usage:
+    python benchmarks/llm_batching.py --analyses 32 --concurrency 8 --batch-sizes 1 4 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_agent import NetworkIncidentAgent
+from dummy_data import INCIDENT_TITLES, INCIDENT_DESCRIPTIONS
+
+
+def run(batch_size, analyses, concurrency, window_ms):
+    agent = NetworkIncidentAgent()
+    agent.batch_size = batch_size
+    agent.batch_window_ms = window_ms
+    agent.llm  # load before timing
+
+    incidents = [
+        (INCIDENT_TITLES[i % len(INCIDENT_TITLES)], INCIDENT_DESCRIPTIONS[i % len(INCIDENT_DESCRIPTIONS)], "high")
+        for i in range(analyses)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda incident: agent.get_solutions(*incident), incidents))
+    elapsed = time.perf_counter() - started
+    return analyses / elapsed, agent.batching_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare LLM batch sizes")
+    parser.add_argument("--analyses", type=int, default=32, help="get_solutions calls per batch size")
+    parser.add_argument("--concurrency", type=int, default=8, help="analyses in flight at once")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--window-ms", type=float, default=20, help="batching window")
+    args = parser.parse_args()
+
+    print(f"{'batch':>5} {'analyses/s':>11}  avg batch")
+    for batch_size in args.batch_sizes:
+        rate, stats = run(batch_size, args.analyses, args.concurrency, args.window_ms)
+        avg_batch = f"{stats['avg_batch']:.1f}" if stats else "1.0"
+        print(f"{batch_size:>5} {rate:>11.2f}  {avg_batch}")
+
+
+if __name__ == "__main__":
+    main()
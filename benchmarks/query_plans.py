@@ -0,0 +1,198 @@
+"""
+Benchmark: query plans and timings for the hot incident/update/activity
+queries, before and after the query-path indexes are created.
+
+Usage:
+    python benchmarks/query_plans.py --rows 1000000
+    python benchmarks/query_plans.py --database-uri postgresql://... --drop --rows 1000000
+
+By default a throwaway SQLite file is used. Another database is only used with
+--drop, since its tables are dropped and recreated, and never if it already
+holds incidents. The script creates the schema from models.py, drops the secondary indexes, loads synthetic rows, prints
+EXPLAIN output and timings, then creates the indexes and repeats.
+"""
+
+import argparse
+import datetime
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import bindparam, func, inspect, select, text
+from extentions import db
+from models import User, Team, Incident, IncidentUpdate, ActivityLog, new_incident_id
+
+SEVERITIES = ["critical", "high", "medium", "low"]
+STATUSES = ["open", "assigned", "in_progress", "resolved", "closed"]
+BATCH_SIZE = 50000
+
+QUERIES = {
+    "incidents by status/severity (newest first)":
+        "SELECT id FROM incidents WHERE status = 'open' AND severity = 'critical' "
+        "ORDER BY created_at DESC LIMIT 50",
+    "incidents by team/status":
+        "SELECT COUNT(*) FROM incidents WHERE team_id = 2 AND status = 'in_progress'",
+    "updates for incident":
+        "SELECT id, created_at FROM incident_updates WHERE incident_id = :incident_id "
+        "ORDER BY created_at",
+    "recent activities":
+        "SELECT id FROM activity_logs ORDER BY timestamp DESC LIMIT 20",
+    "recent activities for user":
+        "SELECT id FROM activity_logs WHERE user_id = 3 ORDER BY timestamp DESC LIMIT 20",
+    "support engineers in team":
+        "SELECT id FROM users WHERE team_id = 2 AND role = 'support_engineer'",
+}
+
+
+def index_tables():
+    return [User.__table__, Incident.__table__, IncidentUpdate.__table__, ActivityLog.__table__]
+
+
+def drop_indexes(conn):
+    for table in index_tables():
+        for index in table.indexes:
+            index.drop(conn, checkfirst=True)
+
+
+def create_indexes(conn):
+    for table in index_tables():
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def load_rows(conn, num_rows, seed):
+    rng = random.Random(seed)
+    now = datetime.datetime.now()
+    
+    conn.execute(Team.__table__.insert(), [
+        {"id": i, "name": f"Team {i}", "created_at": now} for i in range(1, 11)
+    ])
+    conn.execute(User.__table__.insert(), [
+        {"id": i, "username": f"user{i}", "email": f"user{i}@example.com",
+         "role": "admin" if i == 1 else "support_engineer",
+         "team_id": rng.randint(1, 10), "created_at": now}
+        for i in range(1, 501)
+    ])
+    
+    sample_id = None
+    for start in range(0, num_rows, BATCH_SIZE):
+        incidents, updates, activities = [], [], []
+        for _ in range(min(BATCH_SIZE, num_rows - start)):
+            created_at = now - datetime.timedelta(minutes=rng.randint(0, 525600))
+            incident_id = new_incident_id(created_at)
+            sample_id = sample_id or incident_id
+            incidents.append({
+                "id": incident_id, "title": "Synthetic incident", "description": "",
+                "severity": rng.choice(SEVERITIES), "status": rng.choice(STATUSES),
+                "reporter_id": rng.randint(1, 500), "team_id": rng.randint(1, 10),
+                "created_at": created_at, "updated_at": created_at,
+            })
+            updates.append({
+                "incident_id": incident_id, "user_id": rng.randint(1, 500),
+                "content": "Synthetic update", "created_at": created_at,
+            })
+            activities.append({
+                "action_type": "incident_created", "description": "Synthetic incident created",
+                "user_id": rng.randint(1, 500), "timestamp": created_at,
+            })
+        conn.execute(Incident.__table__.insert(), incidents)
+        conn.execute(IncidentUpdate.__table__.insert(), updates)
+        conn.execute(ActivityLog.__table__.insert(), activities)
+        print(f"  loaded {start + len(incidents):,} / {num_rows:,} incidents", flush=True)
+    
+    return sample_id
+
+
+def statement(sql):
+    # Incident keys are stored in binary/uuid form, so bind them through the column type
+    stmt = text(sql)
+    if ":incident_id" in sql:
+        stmt = stmt.bindparams(bindparam("incident_id", type_=Incident.__table__.c.id.type))
+    return stmt
+
+
+def explain(conn, sql, params):
+    if conn.dialect.name == "sqlite":
+        rows = conn.execute(statement(f"EXPLAIN QUERY PLAN {sql}"), params).fetchall()
+        return [row[-1] for row in rows]
+    rows = conn.execute(statement(f"EXPLAIN ANALYZE {sql}"), params).fetchall()
+    return [row[0] for row in rows]
+
+
+def run_queries(conn, params, repeat):
+    for name, sql in QUERIES.items():
+        conn.execute(statement(sql), params).fetchall()  # warm-up
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(statement(sql), params).fetchall()
+        elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+        
+        print(f"\n{name}: {elapsed_ms:.2f} ms")
+        for line in explain(conn, sql, params):
+            print(f"    {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000000, help="number of incidents to load")
+    parser.add_argument("--database-uri", help="database to use (default: temporary SQLite file)")
+    parser.add_argument("--drop", action="store_true",
+                        help="allow dropping and recreating the tables of --database-uri")
+    parser.add_argument("--repeat", type=int, default=5, help="timed executions per query")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    if args.database_uri and not args.drop:
+        parser.error("--database-uri tables are dropped and recreated; pass --drop to confirm")
+    
+    tmp_dir = None
+    uri = args.database_uri
+    if not uri:
+        tmp_dir = tempfile.mkdtemp(prefix="incident-bench-")
+        uri = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    db.init_app(app)
+    
+    with app.app_context():
+        if not tmp_dir and inspect(db.engine).has_table(Incident.__tablename__):
+            with db.engine.connect() as conn:
+                if conn.execute(select(func.count()).select_from(Incident.__table__)).scalar():
+                    parser.error("--database-uri already holds incidents; point the benchmark at a scratch database")
+        db.drop_all()
+        db.create_all()
+        
+        with db.engine.begin() as conn:
+            drop_indexes(conn)
+            print(f"Loading {args.rows:,} incidents into {db.engine.url.render_as_string()}")
+            sample_id = load_rows(conn, args.rows, args.seed)
+        
+        params = {"incident_id": sample_id}
+        with db.engine.connect() as conn:
+            print("\n=== Without indexes ===")
+            run_queries(conn, params, args.repeat)
+        
+        with db.engine.begin() as conn:
+            start = time.perf_counter()
+            create_indexes(conn)
+            if conn.dialect.name == "sqlite":
+                conn.execute(text("ANALYZE"))
+            print(f"\nCreated indexes in {time.perf_counter() - start:.1f}s")
+        
+        with db.engine.connect() as conn:
+            print("\n=== With indexes ===")
+            run_queries(conn, params, args.repeat)
+    
+    if tmp_dir:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: top-k query latency of the similar-incident VectorStore.
+
+Fills a temporary store with synthetic 384-dim vectors (MiniLM-sized) drawn
+around --topics random centres, since real incidents cluster by topic, and
+times k-nearest queries, first with an exact scan of the memory-mapped matrix,
+then after train() with coarse-list probing, reporting recall against the exact
+results. Embedding cost is not included; that is dominated by the model.
+
+Usage:
+    python benchmarks/similarity_index.py --rows 1000000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from similarity import VectorStore, DEFAULT_DIM, normalize_rows
+
+
+def time_queries(label, store, queries, k, nprobe):
+    store.search(queries[0], k, nprobe=nprobe)  # page the matrix in
+    latencies = []
+    results = []
+    for query in queries:
+        started = time.perf_counter()
+        results.append([incident_id for incident_id, _ in store.search(query, k, nprobe=nprobe)])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    latencies.sort()
+    print(f"{label:>12} top-{k}: p50 {latencies[len(latencies) // 2]:.1f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95)]:.1f} ms, max {latencies[-1]:.1f} ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time similar-incident queries")
+    parser.add_argument("--rows", type=int, default=1000000, help="vectors in the index")
+    parser.add_argument("--batch-size", type=int, default=50000, help="vectors written per upsert")
+    parser.add_argument("--queries", type=int, default=50, help="queries to time")
+    parser.add_argument("-k", type=int, default=5, help="neighbours per query")
+    parser.add_argument("--topics", type=int, default=5000, help="clusters the vectors are drawn around")
+    parser.add_argument("--spread", type=float, default=1.0, help="noise around each topic centre")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32], help="lists probed per query")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centres = normalize_rows(rng.standard_normal((args.topics, DEFAULT_DIM)))
+    tmp_dir = tempfile.mkdtemp(prefix="similarity-index-")
+    try:
+        store = VectorStore(tmp_dir)
+
+        started = time.perf_counter()
+        for start in range(0, args.rows, args.batch_size):
+            count = min(args.batch_size, args.rows - start)
+            ids = [f"{row:036d}" for row in range(start, start + count)]
+            topics = centres[rng.integers(0, args.topics, count)]
+            store.upsert(ids, topics + rng.normal(0, args.spread / np.sqrt(DEFAULT_DIM), (count, DEFAULT_DIM)))
+        print(f"Indexed {args.rows:,} vectors in {time.perf_counter() - started:.1f}s")
+
+        # Queries near stored vectors, like a real incident near its look-alikes
+        queries = centres[rng.integers(0, args.topics, args.queries)] + rng.normal(
+            0, args.spread / np.sqrt(DEFAULT_DIM), (args.queries, DEFAULT_DIM))
+        exact = time_queries("exact", store, queries, args.k, nprobe=None)
+
+        started = time.perf_counter()
+        nlist = store.train()
+        print(f"Trained {nlist} coarse lists in {time.perf_counter() - started:.1f}s")
+        for nprobe in args.nprobe:
+            found = time_queries(f"nprobe={nprobe}", store, queries, args.k, nprobe=nprobe)
+            recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(exact, found)])
+            print(f"{'':>12} recall@{args.k} vs exact: {recall:.3f}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Circuit breaker for calls into a slow or failing dependency (the agent's model).
+
+    closed     calls go through; `failure_threshold` consecutive failures
+               (errors or blown latency budgets) open the circuit
+    open       calls are refused at once, so callers can serve a fallback,
+               for `reset_timeout` seconds
+    half_open  up to `half_open_max_calls` probe calls go through; a success
+               closes the circuit, a failure opens it again. Probes that never
+               report back stop counting after another `reset_timeout`
+
+State is per process, like the job queue.
+"""
+
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, half_open_max_calls=1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probes = 0
+        self._probe_started_at = None
+        self._stats = {'successes': 0, 'failures': 0, 'rejected': 0, 'trips': 0}
+        self._last_failure = None
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow(self):
+        """Whether a call may go ahead now (every allowed call must report record_success/record_failure)"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                self._probe_started_at = time.monotonic()
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._stats['successes'] += 1
+            self._consecutive_failures = 0
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._probes = 0
+
+    def record_failure(self, reason=None):
+        with self._lock:
+            self._stats['failures'] += 1
+            self._consecutive_failures += 1
+            self._last_failure = reason
+            if self._state == HALF_OPEN or (
+                    self._state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._trip()
+
+    def release(self):
+        """Give back an allowed call that ended without telling anything about the dependency"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._probes = 0
+            self._opened_at = None
+
+    def stats(self):
+        with self._lock:
+            self._maybe_half_open()
+            stats = dict(self._stats)
+            stats['state'] = self._state
+            stats['consecutive_failures'] = self._consecutive_failures
+            stats['last_failure'] = self._last_failure
+            stats['open_for_s'] = (
+                time.monotonic() - self._opened_at if self._state != CLOSED and self._opened_at else None
+            )
+        return stats
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probes = 0
+        self._stats['trips'] += 1
+
+    def _maybe_half_open(self):
+        now = time.monotonic()
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        elif self._state == HALF_OPEN and self._probes >= self.half_open_max_calls \
+                and now - self._probe_started_at >= self.reset_timeout:
+            # The probes were lost without a report; let new ones through rather than stay stuck
+            self._probes = 0
@@ -0,0 +1,106 @@
+"""
+Maintenance commands for the Network Incident Management System
+Registered on the Flask CLI, e.g. `flask reconcile-counters`
+"""
+
+import click
+
+
+@click.command('reconcile-counters')
+def reconcile_counters_command():
+    """Rebuild the incident_counters table from the incidents table"""
+    from models import rebuild_incident_counters
+    
+    cells = rebuild_incident_counters()
+    click.echo(f"Rebuilt incident counters ({cells} cells).")
+
+
+@click.command('rebuild-incident-rollups')
+def rebuild_incident_rollups_command():
+    """Rebuild the incident_daily_rollups table behind the incident trends"""
+    from models import rebuild_incident_rollups
+    
+    cells = rebuild_incident_rollups()
+    click.echo(f"Rebuilt incident daily roll-ups ({cells} cells).")
+
+
+@click.command('archive-incidents')
+@click.option('--older-than-days', type=int, default=None,
+              help='Archive incidents closed more than this many days ago (default: ARCHIVE_AFTER_DAYS)')
+@click.option('--batch-size', type=int, default=1000, help='Incidents moved per transaction')
+@click.option('--max-batches', type=int, default=None, help='Stop after this many batches')
+def archive_incidents_command(older_than_days, batch_size, max_batches):
+    """Move long-closed incidents and their updates to the archive tables"""
+    from flask import current_app
+    from archive import archive_closed_incidents
+    
+    if older_than_days is None:
+        older_than_days = current_app.config['ARCHIVE_AFTER_DAYS']
+    
+    moved = archive_closed_incidents(older_than_days, batch_size, max_batches)
+    click.echo(f"Archived {moved} incidents closed more than {older_than_days} days ago.")
+
+
+@click.command('roll-up-activity')
+@click.option('--max-age-days', type=int, default=None,
+              help='Keep detail rows for this many days (default: ACTIVITY_RETENTION_DAYS)')
+@click.option('--max-rows', type=int, default=None,
+              help='Keep at most this many detail rows (default: ACTIVITY_MAX_ROWS)')
+@click.option('--batch-size', type=int, default=5000, help='Rows rolled up per transaction')
+@click.option('--export-path', default=None,
+              help='Append expired rows to this JSON-lines file (default: ACTIVITY_EXPORT_PATH)')
+def roll_up_activity_command(max_age_days, max_rows, batch_size, export_path):
+    """Fold expired activity_logs rows into daily roll-ups and delete them"""
+    from flask import current_app
+    from retention import apply_activity_retention
+    
+    if max_age_days is None:
+        max_age_days = current_app.config['ACTIVITY_RETENTION_DAYS']
+    if max_rows is None:
+        max_rows = current_app.config['ACTIVITY_MAX_ROWS']
+    export_path = export_path or current_app.config['ACTIVITY_EXPORT_PATH']
+    
+    removed = apply_activity_retention(max_age_days, max_rows or None, batch_size, export_path)
+    click.echo(f"Rolled up {removed} activity rows.")
+
+
+@click.command('backfill-similarity')
+@click.option('--batch-size', type=int, default=256, help='Incidents embedded per batch')
+@click.option('--rebuild', is_flag=True, help='Re-embed incidents that are already indexed')
+@click.option('--hot-only', is_flag=True, help='Skip archived incidents')
+def backfill_similarity_command(batch_size, rebuild, hot_only):
+    """Embed existing incidents into the similar-incident index"""
+    from similarity import backfill
+    
+    embedded = backfill(batch_size, rebuild, include_archived=not hot_only)
+    click.echo(f"Embedded {embedded} incidents.")
+
+
+@click.command('ingest-cve-feeds')
+@click.argument('paths', nargs=-1, type=click.Path(exists=True))
+@click.option('--force', is_flag=True, help='Re-read feed files that have not changed since the last run')
+def ingest_cve_feeds_command(paths, force):
+    """Load NVD JSON feed files (or directories of them) into the local CVE database"""
+    from flask import current_app
+    from cve_store import get_cve_store
+    
+    store = get_cve_store()
+    if store is None:
+        raise click.ClickException('The CVE database is disabled (CVE_DB_ENABLED=false)')
+    paths = paths or ([current_app.config['CVE_FEED_DIR']] if current_app.config.get('CVE_FEED_DIR') else [])
+    if not paths:
+        raise click.ClickException('Pass feed files or directories, or set CVE_FEED_DIR')
+    
+    counts = store.ingest(paths, force=force)
+    click.echo(f"Read {counts['files']} feed files ({counts['skipped_files']} unchanged): "
+               f"{counts['added']} added, {counts['updated']} updated, {counts['deleted']} deleted, "
+               f"{counts['unchanged']} unchanged.")
+
+
+def register_commands(app):
+    app.cli.add_command(reconcile_counters_command)
+    app.cli.add_command(rebuild_incident_rollups_command)
+    app.cli.add_command(archive_incidents_command)
+    app.cli.add_command(roll_up_activity_command)
+    app.cli.add_command(backfill_similarity_command)
+    app.cli.add_command(ingest_cve_feeds_command)
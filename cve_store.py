@@ -0,0 +1,458 @@
+"""
+Offline CVE database for the agent's CVE_Search tool.
+
+NVD JSON feeds (the 1.1 yearly/modified feeds with a top-level "CVE_Items"
+array, or 2.0 API dumps with "vulnerabilities") are read from disk one entry at
+a time, so a multi-hundred-megabyte feed never has to fit in memory. Entries go
+into a SQLite table with an FTS5 index over vendor, product and description,
+which answers keyword queries with BM25 ranking in a few milliseconds.
+
+Ingestion is incremental: files whose size and mtime have not changed since the
+last run are skipped, and an entry is only rewritten when its lastModified date
+is newer than the stored one. Rejected CVEs are removed.
+
+    flask ingest-cve-feeds /data/nvd            # every *.json / *.json.gz in the directory
+"""
+
+import glob
+import gzip
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Entries written per transaction while ingesting
+INGEST_BATCH_SIZE = 2000
+
+# Free-text queries keep at most this many distinct terms
+MAX_QUERY_TERMS = 8
+
+# BM25 ranking scores every matching entry, so a query ORs only its rarest terms,
+# up to this many entries in total. When even the rarest term is more common than
+# that, all its terms must match and the newest matching entries are returned
+# unranked (FTS5 walks rowids in order and stops at the limit)
+CANDIDATE_BUDGET = 5000
+
+DEFAULT_LIMIT = 5
+
+# Document frequencies of at most this many terms are cached between ingests
+DOC_FREQ_CACHE_SIZE = 20000
+
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been being between but by can could did do does for from
+had has have having how if in into is it its may more most no not of on or our over some such than that
+the their them then there these they this those through to too under until up very was we were what
+when where which while who will with would you your issue issues problem problems error errors users
+user service services server servers
+""".split())
+
+# Top-level arrays holding the entries in the 1.1 and 2.0 feed formats
+_ITEMS_KEY = re.compile(r'"(CVE_Items|vulnerabilities)"\s*:\s*\[')
+
+
+def iter_feed_items(path, chunk_size=1 << 20):
+    """Yield the entries of an NVD JSON feed (optionally gzipped) one at a time"""
+    opener = gzip.open if path.endswith('.gz') else open
+    decoder = json.JSONDecoder()
+
+    with opener(path, 'rt', encoding='utf-8') as f:
+        buffer = ''
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return  # no entries array in this file
+            buffer += chunk
+            match = _ITEMS_KEY.search(buffer)
+            if match:
+                buffer = buffer[match.end():]
+                break
+            buffer = buffer[-64:]  # the key may straddle two chunks
+
+        position = 0
+        eof = False
+        while True:
+            # Skip separators between entries
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                if position >= len(buffer):
+                    raise ValueError('need more data')
+                item, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                # The entry runs past the end of the buffer: read on, dropping what was consumed
+                if eof:
+                    raise ValueError(f"Truncated or invalid NVD feed: {path}")
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield item
+            position = end
+
+
+def _normalize_timestamp(value):
+    # 1.1 feeds use "2023-01-31T15:15Z", 2.0 "2023-01-31T15:15:09.137"; compare as "YYYY-MM-DDTHH:MM:SS"
+    value = (value or '').rstrip('Z')[:19]
+    return value + ':00' if len(value) == 16 else value
+
+
+def _cpe_names(criteria):
+    # cpe:2.3:part:vendor:product:version:...
+    parts = criteria.split(':')
+    if len(parts) < 5:
+        return None, None
+    return parts[3].replace('_', ' '), parts[4].replace('_', ' ')
+
+
+def parse_entry(item):
+    """Flatten a 1.1 or 2.0 feed entry into a CVE row (just its id and rejected=True for rejected entries)"""
+    cve = item.get('cve', {})
+
+    if 'CVE_data_meta' in cve:
+        # 1.1 feed
+        cve_id = cve['CVE_data_meta']['ID']
+        descriptions = cve.get('description', {}).get('description_data', [])
+        description = next((d['value'] for d in descriptions if d.get('lang') == 'en'), '')
+        if description.startswith('** REJECT **'):
+            return {'id': cve_id, 'rejected': True}
+        impact = item.get('impact', {})
+        if 'baseMetricV3' in impact:
+            metric = impact['baseMetricV3']['cvssV3']
+            score, severity = metric.get('baseScore'), metric.get('baseSeverity')
+        elif 'baseMetricV2' in impact:
+            score, severity = impact['baseMetricV2']['cvssV2'].get('baseScore'), impact['baseMetricV2'].get('severity')
+        else:
+            score, severity = None, None
+        criteria = []
+        pending = list(item.get('configurations', {}).get('nodes', []))
+        while pending:
+            node = pending.pop()
+            criteria.extend(match.get('cpe23Uri', '') for match in node.get('cpe_match', []))
+            pending.extend(node.get('children', []))
+        published, last_modified = item.get('publishedDate'), item.get('lastModifiedDate')
+    else:
+        # 2.0 feed
+        cve_id = cve['id']
+        if cve.get('vulnStatus') == 'Rejected':
+            return {'id': cve_id, 'rejected': True}
+        description = next((d['value'] for d in cve.get('descriptions', []) if d.get('lang') == 'en'), '')
+        score, severity = None, None
+        metrics = cve.get('metrics', {})
+        for key in ('cvssMetricV31', 'cvssMetricV30', 'cvssMetricV2'):
+            if metrics.get(key):
+                metric = metrics[key][0]
+                score = metric['cvssData'].get('baseScore')
+                severity = metric['cvssData'].get('baseSeverity') or metric.get('baseSeverity')
+                break
+        criteria = [
+            match.get('criteria', '')
+            for configuration in cve.get('configurations', [])
+            for node in configuration.get('nodes', [])
+            for match in node.get('cpeMatch', [])
+        ]
+        published, last_modified = cve.get('published'), cve.get('lastModified')
+
+    vendors, products = [], []
+    for name in criteria:
+        vendor, product = _cpe_names(name)
+        if vendor and vendor not in vendors:
+            vendors.append(vendor)
+        if product and product not in products:
+            products.append(product)
+
+    return {
+        'id': cve_id,
+        'rejected': False,
+        'published': _normalize_timestamp(published),
+        'last_modified': _normalize_timestamp(last_modified),
+        'severity': severity,
+        'score': score,
+        'vendors': ' '.join(vendors),
+        'products': ' '.join(products),
+        'description': description
+    }
+
+
+def query_terms(text):
+    """Distinctive search terms in free text (incident descriptions are mostly filler words)"""
+    terms = []
+    # Same word boundaries as the FTS5 unicode61 tokenizer
+    for term in re.findall(r'[a-z0-9]+', (text or '').lower()):
+        if len(term) < 3 or term in STOPWORDS or term.isdigit() or term in terms:
+            continue
+        terms.append(term)
+        if len(terms) == MAX_QUERY_TERMS:
+            break
+    return terms
+
+
+def _phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+class CveStore:
+    """CVE entries in SQLite with an FTS5 index over vendors, products and descriptions"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {'queries': 0, 'total_query_ms': 0.0}
+        # term -> number of entries containing it; cleared whenever cve_feeds changes, which also
+        # catches ingests run by another process (flask ingest-cve-feeds)
+        self._doc_freq = {}
+        self._doc_freq_marker = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cves (
+                rowid INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                published TEXT,
+                last_modified TEXT,
+                severity TEXT,
+                score REAL,
+                vendors TEXT NOT NULL,
+                products TEXT NOT NULL,
+                description TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS cve_fts USING fts5(
+                vendors, products, description, content='cves', content_rowid='rowid'
+            );
+            CREATE TABLE IF NOT EXISTS cve_feeds (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                entries INTEGER NOT NULL,
+                ingested_at REAL NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS cve_vocab USING fts5vocab(cve_fts, 'row');
+        """)
+
+    def _connection(self):
+        # One connection per thread; the agent searches from its tool pool
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def ingest(self, paths, force=False):
+        """Load feed files (or directories of them); returns counts of entries added/updated/deleted/unchanged"""
+        counts = {'files': 0, 'skipped_files': 0, 'added': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        conn = self._connection()
+
+        for path in self._feed_files(paths):
+            stat = os.stat(path)
+            known = conn.execute("SELECT size, mtime_ns FROM cve_feeds WHERE path = ?", (path,)).fetchone()
+            if not force and known == (stat.st_size, stat.st_mtime_ns):
+                counts['skipped_files'] += 1
+                continue
+
+            logger.info("Ingesting CVE feed %s", path)
+            entries = 0
+            batch = []
+            for item in iter_feed_items(path):
+                batch.append(parse_entry(item))
+                if len(batch) >= INGEST_BATCH_SIZE:
+                    entries += self._apply(conn, batch, counts)
+                    batch = []
+            entries += self._apply(conn, batch, counts)
+
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cve_feeds (path, size, mtime_ns, entries, ingested_at) VALUES (?, ?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime_ns, entries, time.time())
+                )
+            counts['files'] += 1
+            with self._lock:
+                self._doc_freq.clear()
+
+        return counts
+
+    def _feed_files(self, paths):
+        for path in paths:
+            if os.path.isdir(path):
+                yield from sorted(
+                    glob.glob(os.path.join(path, '*.json')) + glob.glob(os.path.join(path, '*.json.gz'))
+                )
+            else:
+                yield path
+
+    def _apply(self, conn, entries, counts):
+        """Write one batch of parsed entries in a single transaction, touching only changed rows"""
+        if not entries:
+            return 0
+
+        ids = [entry['id'] for entry in entries]
+        existing = {}
+        with conn:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT id, rowid, last_modified, vendors, products, description FROM cves "
+                    f"WHERE id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                existing.update((row[0], row[1:]) for row in rows)
+
+            for entry in entries:
+                old = existing.get(entry['id'])
+                if old is not None and (entry['rejected'] or (entry['last_modified'] or '') > (old[1] or '')):
+                    # Remove the old text from the index before the row changes
+                    conn.execute(
+                        "INSERT INTO cve_fts (cve_fts, rowid, vendors, products, description) "
+                        "VALUES ('delete', ?, ?, ?, ?)",
+                        (old[0], old[2], old[3], old[4])
+                    )
+                    if entry['rejected']:
+                        conn.execute("DELETE FROM cves WHERE rowid = ?", (old[0],))
+                        del existing[entry['id']]
+                        counts['deleted'] += 1
+                        continue
+                    conn.execute(
+                        "UPDATE cves SET published = ?, last_modified = ?, severity = ?, score = ?, "
+                        "vendors = ?, products = ?, description = ? WHERE rowid = ?",
+                        (entry['published'], entry['last_modified'], entry['severity'], entry['score'],
+                         entry['vendors'], entry['products'], entry['description'], old[0])
+                    )
+                    rowid = old[0]
+                    counts['updated'] += 1
+                elif old is None and not entry['rejected']:
+                    rowid = conn.execute(
+                        "INSERT INTO cves (id, published, last_modified, severity, score, vendors, products, description) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (entry['id'], entry['published'], entry['last_modified'], entry['severity'], entry['score'],
+                         entry['vendors'], entry['products'], entry['description'])
+                    ).lastrowid
+                    counts['added'] += 1
+                else:
+                    counts['unchanged'] += 1
+                    continue
+
+                conn.execute(
+                    "INSERT INTO cve_fts (rowid, vendors, products, description) VALUES (?, ?, ?, ?)",
+                    (rowid, entry['vendors'], entry['products'], entry['description'])
+                )
+                # A repeated id later in the same batch compares against this version
+                existing[entry['id']] = (rowid, entry['last_modified'], entry['vendors'], entry['products'],
+                                         entry['description'])
+        return len(entries)
+
+    def search(self, query='', vendor=None, product=None, limit=DEFAULT_LIMIT):
+        """Best matching CVEs for free text, optionally restricted to a vendor and/or product"""
+        started = time.perf_counter()
+
+        filters = []
+        if vendor:
+            filters.append(f"vendors : {_phrase(vendor.replace('_', ' ').lower())}")
+        if product:
+            filters.append(f"products : {_phrase(product.replace('_', ' ').lower())}")
+        terms, operator = self._selective_terms(query_terms(query))
+        if terms:
+            filters.append('(' + f' {operator} '.join(_phrase(term) for term in terms) + ')')
+        if not filters:
+            return []
+        # Vendor/product-only lookups are unranked too
+        order = 'bm25(cve_fts, 4.0, 4.0, 1.0)' if terms and operator == 'OR' else 'cve_fts.rowid DESC'
+
+        rows = self._connection().execute(
+            "SELECT c.id, c.severity, c.score, c.vendors, c.products, c.description, c.published "
+            "FROM cve_fts JOIN cves c ON c.rowid = cve_fts.rowid "
+            f"WHERE cve_fts MATCH ? ORDER BY {order} LIMIT ?",
+            (' AND '.join(filters), limit)
+        ).fetchall()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._stats['queries'] += 1
+            self._stats['total_query_ms'] += elapsed_ms
+
+        keys = ('id', 'severity', 'score', 'vendors', 'products', 'description', 'published')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def _selective_terms(self, terms):
+        """The terms to search for and how to combine them ('OR' or 'AND'), keeping the ranking cheap"""
+        marker = self._connection().execute("SELECT COUNT(*), MAX(ingested_at) FROM cve_feeds").fetchone()
+        with self._lock:
+            if marker != self._doc_freq_marker or len(self._doc_freq) > DOC_FREQ_CACHE_SIZE:
+                self._doc_freq.clear()
+                self._doc_freq_marker = marker
+            missing = [term for term in terms if term not in self._doc_freq]
+        if missing:
+            rows = self._connection().execute(
+                f"SELECT term, doc FROM cve_vocab WHERE term IN ({','.join('?' * len(missing))})", missing
+            ).fetchall()
+            found = dict(rows)
+            with self._lock:
+                self._doc_freq.update((term, found.get(term, 0)) for term in missing)
+        with self._lock:
+            frequencies = sorted((self._doc_freq[term], term) for term in terms if self._doc_freq.get(term))
+
+        if not frequencies:
+            return [], 'OR'
+        if frequencies[0][0] > CANDIDATE_BUDGET:
+            return [term for _, term in frequencies], 'AND'
+
+        selected, candidates = [], 0
+        for frequency, term in frequencies:
+            if candidates + frequency > CANDIDATE_BUDGET:
+                break
+            selected.append(term)
+            candidates += frequency
+        return selected, 'OR'
+
+    def stats(self):
+        conn = self._connection()
+        with self._lock:
+            stats = dict(self._stats)
+        total_query_ms = stats.pop('total_query_ms')
+        stats['avg_query_ms'] = total_query_ms / stats['queries'] if stats['queries'] else 0.0
+        stats['cves'] = conn.execute("SELECT COUNT(*) FROM cves").fetchone()[0]
+        stats['feeds'], stats['last_ingest'] = conn.execute(
+            "SELECT COUNT(*), MAX(ingested_at) FROM cve_feeds"
+        ).fetchone()
+        return stats
+
+
+def format_cve_results(query, results):
+    """CVE_Search tool output for the agent"""
+    if not results:
+        return f"No matching CVEs found for '{query}'."
+    lines = [f"CVE results for '{query}':"]
+    for cve in results:
+        rating = ' '.join(str(part) for part in (cve['severity'], cve['score']) if part is not None)
+        affected = cve['products'] or cve['vendors']
+        details = ', '.join(part for part in (rating, affected[:60]) if part)
+        description = cve['description'] if len(cve['description']) <= 200 else cve['description'][:197] + '...'
+        lines.append(f"- {cve['id']}{f' ({details})' if details else ''}: {description}")
+    return '\n'.join(lines)
+
+
+def init_cve_store(app):
+    """Attach the CveStore to the app and the shared agent when CVE_DB_ENABLED is set"""
+    if not app.config.get('CVE_DB_ENABLED', True):
+        return None
+
+    from ai_agent import get_agent
+
+    store = CveStore(app.config['CVE_DB_PATH'])
+    app.extensions['cve_store'] = store
+    get_agent().cve_store = store
+    return store
+
+
+def get_cve_store():
+    from flask import current_app
+
+    return current_app.extensions.get('cve_store')
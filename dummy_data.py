@@ -5,10 +5,9 @@ This will help populate the database for analysis and visualization purposes
 
 import datetime
 import random
-import uuid
 from sqlalchemy import func
-from app import app, db
-from models import User, Team, Incident, IncidentUpdate, log_activity
+from extentions import db
+from models import User, Team, Incident, IncidentUpdate, log_activity, rebuild_incident_counters, rebuild_incident_rollups, new_incident_id
 
 # Ensures consistent random output
 random.seed(42)
@@ -128,7 +127,7 @@ def generate_dummy_incidents(num_incidents=50):
     
     for i in range(num_incidents):
         # Generate a unique incident ID
-        incident_id = str(uuid.uuid4())
+        incident_id = new_incident_id()
         
         # Randomly select a title and description
         title = random.choice(INCIDENT_TITLES)
@@ -246,6 +245,8 @@ def generate_dummy_incidents(num_incidents=50):
     return True
 
 if __name__ == "__main__":
+    from app import app
+    
     with app.app_context():
         # Check if we already have incidents in the database
         existing_count = Incident.query.count()
@@ -259,4 +260,8 @@ if __name__ == "__main__":
                 exit(0)
         
         # Generate the dummy data
-        generate_dummy_incidents(20)  # Generate 20 incidents by default
\ No newline at end of file
+        generate_dummy_incidents(20)  # Generate 20 incidents by default
+        
+        # Rows were inserted directly, so refresh the dashboard counters and the trends roll-up
+        rebuild_incident_counters()
+        rebuild_incident_rollups()
\ No newline at end of file
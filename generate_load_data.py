@@ -0,0 +1,350 @@
+"""
+High-volume synthetic dataset generator for load and performance testing.
+
+Unlike dummy_data.py this script is non-interactive, fully seeded and writes
+incidents, incident updates and activity logs with batched bulk inserts, so it
+can build databases with millions of incidents. Teams and users are generated
+in memory, and incident arrivals follow a diurnal/weekly baseline with
+superimposed incident storms (bursts of related incidents within minutes).
+
+The target database must be named explicitly; it never defaults to the app's
+database, since the load-test accounts share a well-known password. Reruns
+against the same database reuse the load-test teams and users and add
+another batch of incidents.
+
+Usage:
+    python generate_load_data.py --database-uri sqlite:////tmp/loadtest.db --incidents 1000000 --workers 4
+    python generate_load_data.py --database-uri postgresql://... --incidents 10000000
+"""
+
+import argparse
+import datetime
+import math
+import multiprocessing
+import os
+import random
+import time
+
+from sqlalchemy import create_engine, insert, make_url, select
+from werkzeug.security import generate_password_hash
+
+from dummy_data import INCIDENT_TITLES, INCIDENT_DESCRIPTIONS, UPDATE_MESSAGES, SEVERITY_WEIGHTS, STATUS_PROGRESSION
+from models import User, Team, Incident, IncidentUpdate, ActivityLog, uuid7
+
+TEAM_NAMES = [
+    "Network Operations", "Security Operations", "Application Support", "Database Operations",
+    "Cloud Infrastructure", "Site Reliability", "Identity and Access", "Edge and CDN",
+    "Storage Operations", "Platform Engineering", "Service Desk", "Observability"
+]
+
+# Relative incident rate per hour of day (business hours are busier)
+HOURLY_WEIGHTS = [0.3, 0.25, 0.2, 0.2, 0.25, 0.35, 0.6, 0.9, 1.2, 1.4, 1.5, 1.4,
+                  1.3, 1.4, 1.5, 1.4, 1.3, 1.1, 0.9, 0.7, 0.6, 0.5, 0.4, 0.35]
+
+# Relative incident rate per weekday (Monday first)
+WEEKDAY_WEIGHTS = [1.2, 1.1, 1.0, 1.0, 1.1, 0.6, 0.5]
+
+# How far incidents progress, by age in days: (max_age, weights over STATUS_PROGRESSION)
+STATUS_WEIGHTS_BY_AGE = [
+    (14, [0.4, 0.3, 0.2, 0.1, 0.0]),
+    (30, [0.2, 0.2, 0.4, 0.15, 0.05]),
+    (60, [0.1, 0.1, 0.2, 0.4, 0.2]),
+    (None, [0.05, 0.05, 0.1, 0.3, 0.5])
+]
+
+
+def build_teams_and_users(num_teams, users_per_team, seed):
+    """Build team and user rows in memory (ids are left to the database)"""
+    rng = random.Random(seed)
+    now = datetime.datetime.now()
+    password_hash = generate_password_hash("loadtest123")  # hashing is slow, share one hash
+
+    teams = []
+    for i in range(num_teams):
+        name = TEAM_NAMES[i] if i < len(TEAM_NAMES) else f"Team {i + 1}"
+        teams.append({"name": f"{name} (load)", "description": "Synthetic load-test team", "created_at": now})
+
+    users = [{
+        "username": "loadtest_admin",
+        "email": "loadtest_admin@example.com",
+        "password_hash": password_hash,
+        "role": "admin",
+        "team_id": None,
+        "created_at": now
+    }]
+    for team_idx in range(num_teams):
+        for j in range(users_per_team):
+            users.append({
+                "username": f"loadtest_t{team_idx + 1}_u{j + 1}",
+                "email": f"loadtest_t{team_idx + 1}_u{j + 1}@example.com",
+                "password_hash": password_hash,
+                "role": "support_engineer",
+                "team_idx": team_idx,
+                "created_at": now - datetime.timedelta(days=rng.randint(0, 365))
+            })
+
+    return teams, users
+
+
+def _insert_missing(conn, model, key, rows):
+    """Insert the rows whose key column value is not stored yet; returns {key value: id} for all rows"""
+    column = model.__table__.c[key]
+    ids = dict(conn.execute(
+        select(column, model.__table__.c.id).where(column.in_([row[key] for row in rows]))
+    ).all())
+    missing = [row for row in rows if row[key] not in ids]
+    if missing:
+        # Ids come from the database, so PostgreSQL sequences stay in step for the app's own inserts
+        inserted = conn.execute(
+            insert(model).returning(model.__table__.c.id, sort_by_parameter_order=True), missing
+        ).scalars().all()
+        ids.update((row[key], row_id) for row, row_id in zip(missing, inserted))
+    return ids
+
+
+def insert_teams_and_users(engine, teams, users):
+    """Insert the teams and users not present yet and return (team_ids, {team_id: [user_ids]}, admin_id)"""
+    with engine.begin() as conn:
+        team_ids_by_name = _insert_missing(conn, Team, "name", teams)
+        team_ids = [team_ids_by_name[team["name"]] for team in teams]
+
+        rows = []
+        for user in users:
+            row = dict(user)
+            team_idx = row.pop("team_idx", None)
+            if team_idx is not None:
+                row["team_id"] = team_ids[team_idx]
+            rows.append(row)
+        user_ids = _insert_missing(conn, User, "username", rows)
+
+    members = {team_id: [] for team_id in team_ids}
+    for row in rows:
+        if row["team_id"] is not None:
+            members[row["team_id"]].append(user_ids[row["username"]])
+    return team_ids, members, user_ids["loadtest_admin"]
+
+
+def plan_storms(num_storms, start, end, seed):
+    """Pick storm windows shared by all workers: (start_time, duration_minutes, title, description)"""
+    rng = random.Random(seed)
+    span = (end - start).total_seconds()
+    storms = []
+    for _ in range(num_storms):
+        storm_start = start + datetime.timedelta(seconds=rng.uniform(0, span))
+        storms.append((
+            storm_start,
+            rng.randint(10, 240),
+            rng.choice(INCIDENT_TITLES),
+            rng.choice(INCIDENT_DESCRIPTIONS)
+        ))
+    return storms
+
+
+def baseline_timestamp(rng, start, days):
+    """Draw an arrival time following the diurnal/weekly rate curve (rejection sampling)"""
+    peak = max(HOURLY_WEIGHTS) * max(WEEKDAY_WEIGHTS)
+    while True:
+        ts = start + datetime.timedelta(seconds=rng.uniform(0, days * 86400))
+        if rng.random() * peak <= HOURLY_WEIGHTS[ts.hour] * WEEKDAY_WEIGHTS[ts.weekday()]:
+            return ts
+
+
+def generate_chunk(args):
+    """Worker entry point: generate and insert incidents [offset, offset + count)"""
+    (database_uri, offset, count, seed, batch_size, days, end_ts, storms, storm_share,
+     team_ids, members, admin_id) = args
+
+    rng = random.Random(f"{seed}-{offset}")
+    engine = create_engine(database_uri)
+    start_ts = end_ts - datetime.timedelta(days=days)
+    severities = list(SEVERITY_WEIGHTS.keys())
+    severity_weights = list(SEVERITY_WEIGHTS.values())
+    all_users = [admin_id] + [user_id for team_users in members.values() for user_id in team_users]
+
+    incidents, updates, activities = [], [], []
+    written = 0
+
+    def flush():
+        with engine.begin() as conn:
+            if incidents:
+                conn.execute(Incident.__table__.insert(), incidents)
+            if updates:
+                conn.execute(IncidentUpdate.__table__.insert(), updates)
+            if activities:
+                conn.execute(ActivityLog.__table__.insert(), activities)
+        incidents.clear()
+        updates.clear()
+        activities.clear()
+
+    for _ in range(count):
+        if storms and rng.random() < storm_share:
+            # Storm: many near-identical incidents packed into a short window
+            storm_start, duration, title, description = rng.choice(storms)
+            created_at = storm_start + datetime.timedelta(minutes=rng.expovariate(3.0 / duration))
+            severity = rng.choices(severities, weights=[0.35, 0.4, 0.2, 0.05], k=1)[0]
+        else:
+            created_at = baseline_timestamp(rng, start_ts, days)
+            title = rng.choice(INCIDENT_TITLES)
+            description = rng.choice(INCIDENT_DESCRIPTIONS)
+            severity = rng.choices(severities, weights=severity_weights, k=1)[0]
+        created_at = min(created_at, end_ts)
+        incident_id = str(uuid7(created_at.timestamp(), rng.getrandbits(74)))
+
+        reporter_id = rng.choice(all_users)
+        incident = {
+            "id": incident_id,
+            "title": title,
+            "description": description,
+            "severity": severity,
+            "status": "open",
+            "reporter_id": reporter_id,
+            "assignee_id": None,
+            "team_id": None,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "resolved_at": None,
+            "closed_at": None
+        }
+        activities.append({
+            "action_type": "incident_created",
+            "description": f"Incident '{title}' created with {severity} severity",
+            "user_id": reporter_id,
+            "timestamp": created_at
+        })
+
+        age_days = (end_ts - created_at).days
+        status_weights = next(weights for max_age, weights in STATUS_WEIGHTS_BY_AGE
+                              if max_age is None or age_days <= max_age)
+        target_idx = rng.choices(range(len(STATUS_PROGRESSION)), weights=status_weights, k=1)[0]
+
+        current_time = created_at
+        for status_idx in range(1, target_idx + 1):
+            current_time = min(current_time + datetime.timedelta(hours=rng.randint(1, 48)), end_ts)
+            new_status = STATUS_PROGRESSION[status_idx]
+
+            if new_status == "assigned":
+                team_id = rng.choice(team_ids)
+                incident["team_id"] = team_id
+                incident["assignee_id"] = rng.choice(members[team_id]) if members[team_id] else None
+                activities.append({
+                    "action_type": "incident_assigned",
+                    "description": f"Incident #{incident_id} assigned to team #{team_id}",
+                    "user_id": admin_id,
+                    "timestamp": current_time
+                })
+            elif new_status == "resolved":
+                incident["resolved_at"] = current_time
+            elif new_status == "closed":
+                incident["closed_at"] = current_time
+
+            if new_status != "assigned":
+                activities.append({
+                    "action_type": "status_update",
+                    "description": f"Incident #{incident_id} status changed from "
+                                   f"{STATUS_PROGRESSION[status_idx - 1]} to {new_status}",
+                    "user_id": incident["assignee_id"] or admin_id,
+                    "timestamp": current_time
+                })
+
+            if rng.random() < 0.7:
+                updates.append({
+                    "incident_id": incident_id,
+                    "user_id": incident["assignee_id"] or reporter_id,
+                    "content": rng.choice(UPDATE_MESSAGES),
+                    "created_at": current_time
+                })
+
+            incident["status"] = new_status
+            incident["updated_at"] = current_time
+
+        incidents.append(incident)
+        if len(incidents) >= batch_size:
+            written += len(incidents)
+            flush()
+
+    written += len(incidents)
+    flush()
+    engine.dispose()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a large synthetic incident dataset")
+    parser.add_argument("--incidents", type=int, default=100000, help="number of incidents to generate")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (same seed, same data)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="incidents per insert transaction")
+    parser.add_argument("--workers", type=int, default=1, help="number of generator processes")
+    parser.add_argument("--days", type=int, default=365, help="history length in days")
+    parser.add_argument("--teams", type=int, default=8, help="number of synthetic teams")
+    parser.add_argument("--users-per-team", type=int, default=20, help="support engineers per team")
+    parser.add_argument("--storms", type=int, default=None,
+                        help="number of incident storms (default: one per 2,000 incidents)")
+    parser.add_argument("--storm-share", type=float, default=0.2,
+                        help="fraction of incidents that belong to a storm")
+    parser.add_argument("--database-uri", required=True,
+                        help="target database; must not be the app's configured database")
+    args = parser.parse_args()
+
+    # The app builds its engine while being imported, so the target has to be in place first
+    app_database_uri = os.environ.get("SQLALCHEMY_DATABASE_URI", "sqlite:///network_incidents.db")
+    os.environ["SQLALCHEMY_DATABASE_URI"] = args.database_uri
+
+    from app import app
+    from extentions import db
+    from models import rebuild_incident_counters, rebuild_incident_rollups
+
+    app_url = make_url(app_database_uri)
+    if app_url.get_backend_name() == "sqlite" and app_url.database and not os.path.isabs(app_url.database):
+        # Flask-SQLAlchemy resolves relative SQLite paths against the instance folder
+        app_url = app_url.set(database=os.path.join(app.instance_path, app_url.database))
+    with app.app_context():
+        if db.engine.url == app_url:
+            parser.error("--database-uri is the app's configured database; load data needs a database of its own")
+        db.create_all()
+        database_uri = db.engine.url.render_as_string(hide_password=False)
+
+        teams, users = build_teams_and_users(args.teams, args.users_per_team, args.seed)
+        team_ids, members, admin_id = insert_teams_and_users(db.engine, teams, users)
+
+        end_ts = datetime.datetime.now().replace(microsecond=0)
+        num_storms = args.storms if args.storms is not None else max(1, args.incidents // 2000)
+        storms = plan_storms(num_storms, end_ts - datetime.timedelta(days=args.days), end_ts, args.seed)
+
+        # Split the incident range into roughly equal chunks, several per worker
+        num_chunks = max(1, min(args.workers * 4, math.ceil(args.incidents / args.batch_size)))
+        chunk_size = math.ceil(args.incidents / num_chunks)
+        chunks = [
+            (database_uri, offset, min(chunk_size, args.incidents - offset), args.seed, args.batch_size,
+             args.days, end_ts, storms, args.storm_share, team_ids, members, admin_id)
+            for offset in range(0, args.incidents, chunk_size)
+        ]
+
+        print(f"Generating {args.incidents:,} incidents in {len(chunks)} chunks "
+              f"with {args.workers} worker(s), seed {args.seed}...")
+        started = time.perf_counter()
+        written = 0
+
+        # Release pooled connections before forking workers
+        db.engine.dispose()
+
+        if args.workers > 1:
+            with multiprocessing.Pool(args.workers) as pool:
+                for count in pool.imap_unordered(generate_chunk, chunks):
+                    written += count
+                    print(f"  {written:,} / {args.incidents:,} incidents", flush=True)
+        else:
+            for chunk in chunks:
+                written += generate_chunk(chunk)
+                print(f"  {written:,} / {args.incidents:,} incidents", flush=True)
+
+        elapsed = time.perf_counter() - started
+        print(f"Inserted {written:,} incidents in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f}/s)")
+
+        # Rows were inserted directly, so refresh the dashboard counters and the trends roll-up
+        rebuild_incident_counters()
+        rebuild_incident_rollups()
+        print("Load data generation complete.")
+
+
+if __name__ == "__main__":
+    main()
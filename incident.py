@@ -1,10 +1,12 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
-from models import Incident, IncidentUpdate, Team, User, get_incident_stats, get_recent_activities
-from ai_agent import NetworkIncidentAgent
+from models import Incident, IncidentUpdate, Team, User, get_incident_stats, get_recent_activities, incident_filters_from_args, unit_of_work
+from ai_agent import get_agent
+from ai_jobs import get_job_queue, QueueFullError, format_analysis_update
+from similarity import find_similar_incidents
+import json
 
 incident_bp = Blueprint('incident', __name__)
-ai_agent = NetworkIncidentAgent()
 
 @incident_bp.route('/dashboard')
 @login_required
@@ -13,11 +15,7 @@ def dashboard():
     stats = get_incident_stats()
     
     # Get recent incidents (limited to 5)
-    recent_incidents = sorted(
-        Incident.get_all_incidents(), 
-        key=lambda x: x.created_at,
-        reverse=True
-    )[:5]
+    recent_incidents, _ = Incident.get_incidents_page(limit=5)
     
     # Get recent activities
     recent_activities = get_recent_activities(10)
@@ -34,27 +32,27 @@ def dashboard():
 def list_incidents():
     status_filter = request.args.get('status', 'all')
     severity_filter = request.args.get('severity', 'all')
+    limit = request.args.get('limit', 50, type=int)
+    cursor = request.args.get('cursor')
     
-    # Get all incidents
-    all_incidents = Incident.get_all_incidents()
-    
-    # Apply filters
-    filtered_incidents = all_incidents
-    
-    if status_filter != 'all':
-        filtered_incidents = [inc for inc in filtered_incidents if inc.status == status_filter]
-    
-    if severity_filter != 'all':
-        filtered_incidents = [inc for inc in filtered_incidents if inc.severity == severity_filter]
+    # Filter, sort and paginate in SQL (newest first)
+    try:
+        filters = incident_filters_from_args(request.args)
+        incidents, next_cursor = Incident.get_incidents_page(limit=limit, cursor=cursor, **filters)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('incident.list_incidents'))
     
-    # Sort by created_at (newest first)
-    filtered_incidents = sorted(filtered_incidents, key=lambda x: x.created_at, reverse=True)
+    # Carry the current filters over to the next page link
+    page_args = {k: v for k, v in request.args.items() if k != 'cursor'}
     
     return render_template(
         'incidents.html',
-        incidents=filtered_incidents,
+        incidents=incidents,
         status_filter=status_filter,
-        severity_filter=severity_filter
+        severity_filter=severity_filter,
+        next_cursor=next_cursor,
+        page_args=page_args
     )
 
 @incident_bp.route('/incidents/new', methods=['GET', 'POST'])
@@ -70,47 +68,21 @@ def new_incident():
             return redirect(url_for('incident.new_incident'))
         
         # Create incident
-        incident = Incident.create_incident(
-            title=title,
-            description=description,
-            severity=severity,
-            reporter_id=current_user.id
-        )
+        with unit_of_work():
+            incident = Incident.create_incident(
+                title=title,
+                description=description,
+                severity=severity,
+                reporter_id=current_user.id
+            )
         
-        # Run AI analysis automatically on new incidents if requested
+        # Queue AI analysis of new incidents if requested; the result is posted as an update
         if request.form.get('auto_analyze') == 'on':
             try:
-                solutions = ai_agent.get_solutions(
-                    title=title,
-                    description=description,
-                    severity=severity
-                )
-                
-                # Create an incident update with the analysis
-                update_content = f"""
-                AI Analysis Results:
-                
-                Root Cause Analysis:
-                {solutions['analysis']}
-                
-                Suggested Actions:
-                {chr(10).join(f'- {action}' for action in solutions['suggested_actions'])}
-                
-                Confidence Score: {solutions['confidence_score']*100:.1f}%
-                
-                References:
-                {chr(10).join(f'- {ref["type"].upper()}: {ref["reference"]}' for ref in solutions['references'] if 'type' in ref and 'reference' in ref)}
-                """
-                
-                IncidentUpdate.create_update(
-                    incident_id=incident.id,
-                    user_id=current_user.id,
-                    content=update_content
-                )
-                
-                flash('Incident reported and AI analysis completed', 'success')
-            except Exception as e:
-                flash(f'Incident reported but AI analysis failed: {str(e)}', 'warning')
+                get_job_queue().submit(incident, current_user.id)
+                flash('Incident reported; AI analysis is running and will be added as an update', 'success')
+            except QueueFullError as e:
+                flash(f'Incident reported but AI analysis was not queued: {str(e)}', 'warning')
         else:
             flash('Incident reported successfully', 'success')
             
@@ -121,14 +93,14 @@ def new_incident():
 @incident_bp.route('/incidents/<incident_id>')
 @login_required
 def view_incident(incident_id):
-    incident = Incident.get_incident_by_id(incident_id)
+    incident = Incident.get_incident_by_id(incident_id, include_archived=True)
     
     if not incident:
         flash('Incident not found', 'danger')
         return redirect(url_for('incident.list_incidents'))
     
     # Get updates for this incident
-    updates = IncidentUpdate.get_updates_for_incident(incident_id)
+    updates = IncidentUpdate.get_updates_for_incident(incident_id, include_archived=incident.is_archived)
     
     # Get teams for assignment
     teams = Team.get_all_teams()
@@ -141,7 +113,9 @@ def view_incident(incident_id):
         incident=incident,
         updates=updates,
         teams=teams,
-        support_engineers=support_engineers
+        support_engineers=support_engineers,
+        ai_job=get_job_queue().get_active_job(incident.id),
+        similar_incidents=find_similar_incidents(incident)
     )
 
 @incident_bp.route('/incidents/<incident_id>/update', methods=['POST'])
@@ -153,22 +127,24 @@ def update_incident(incident_id):
         flash('Incident not found', 'danger')
         return redirect(url_for('incident.list_incidents'))
     
-    # Handle status update
-    new_status = request.form.get('status')
-    if new_status and new_status != incident.status:
-        incident.set_status(new_status)
-    
-    # Handle team assignment
-    team_id = request.form.get('team_id')
-    if team_id and (not incident.team_id or int(team_id) != incident.team_id):
-        assignee_id = request.form.get('assignee_id')
-        assignee_id = int(assignee_id) if assignee_id else None
-        incident.assign(int(team_id), assignee_id)
-    
-    # Handle update comment
-    update_content = request.form.get('update_content')
-    if update_content:
-        IncidentUpdate.create_update(incident_id, current_user.id, update_content)
+    # Apply all changes in a single transaction
+    with unit_of_work():
+        # Handle status update
+        new_status = request.form.get('status')
+        if new_status and new_status != incident.status:
+            incident.set_status(new_status)
+        
+        # Handle team assignment
+        team_id = request.form.get('team_id')
+        if team_id and (not incident.team_id or int(team_id) != incident.team_id):
+            assignee_id = request.form.get('assignee_id')
+            assignee_id = int(assignee_id) if assignee_id else None
+            incident.assign(int(team_id), assignee_id)
+        
+        # Handle update comment
+        update_content = request.form.get('update_content')
+        if update_content:
+            IncidentUpdate.create_update(incident_id, current_user.id, update_content)
     
     flash('Incident updated successfully', 'success')
     return redirect(url_for('incident.view_incident', incident_id=incident_id))
@@ -177,61 +153,91 @@ def update_incident(incident_id):
 @login_required
 def get_incident_suggestions(incident_id):
     """Get AI-generated suggestions for an incident"""
-    incident = Incident.get_incident_by_id(incident_id)
+    incident = Incident.get_incident_by_id(incident_id, include_archived=True)
     
     if not incident:
         return jsonify({'error': 'Incident not found'}), 404
     
-    # Get AI-generated solutions
-    solutions = ai_agent.get_solutions(
-        title=incident.title,
-        description=incident.description,
-        severity=incident.severity
-    )
+    # Queue (or join) a background analysis and let the client poll the job
+    try:
+        job = get_job_queue().submit(
+            incident, current_user.id, record_update=False, use_rules=request.args.get('full') != '1'
+        )
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '10'}
     
-    return jsonify(solutions)
+    return jsonify({
+        'job': job.to_dict(),
+        'status_url': url_for('incident.get_analysis_job', job_id=job.id)
+    }), 202
+
+@incident_bp.route('/incidents/<incident_id>/suggestions/stream')
+@login_required
+def stream_incident_suggestions(incident_id):
+    """Stream an AI analysis as server-sent events; a fresh (or not yet posted) analysis is posted as an update"""
+    incident = Incident.get_incident_by_id(incident_id, include_archived=True)
+    
+    if not incident:
+        return jsonify({'error': 'Incident not found'}), 404
+    
+    user_id = current_user.id
+    use_rules = request.args.get('full') != '1'
+    
+    def events():
+        # Send something straight away so proxies and the browser open the stream
+        yield ': analysis started\n\n'
+        try:
+            for event, data in get_agent().stream_solutions(
+                    incident.title, incident.description, incident.severity, use_rules=use_rules,
+                    incident_id=incident.id):
+                if event == 'done' and not incident.is_archived and not data['solutions'].get('degraded'):
+                    content = format_analysis_update(data['solutions'])
+                    # Cached and runbook answers reach every viewer alike; post each one once, not per viewer
+                    update = IncidentUpdate.find_update(incident.id, content) if data.get('cached') else None
+                    if update is None:
+                        update = IncidentUpdate.create_update(incident.id, user_id, content)
+                    data = dict(data, update_id=update.id)
+                yield sse_event(event, data)
+        except Exception as e:
+            # 'error' is reserved by EventSource for connection errors
+            yield sse_event('failed', {'error': str(e)})
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 @incident_bp.route('/incidents/<incident_id>/analyze', methods=['POST'])
 @login_required
 def analyze_incident(incident_id):
-    """Trigger AI analysis of an incident"""
+    """Queue AI analysis of an incident; the result is posted as an incident update"""
     incident = Incident.get_incident_by_id(incident_id)
     
     if not incident:
         flash('Incident not found', 'danger')
         return redirect(url_for('incident.list_incidents'))
     
+    # Jobs queued while the models are still loading simply wait for them
     try:
-        solutions = ai_agent.get_solutions(
-            title=incident.title,
-            description=incident.description,
-            severity=incident.severity
-        )
-        
-        # Create an incident update with the analysis
-        update_content = f"""
-        AI Analysis Results:
-        
-        Root Cause Analysis:
-        {solutions['analysis']}
-        
-        Suggested Actions:
-        {chr(10).join(f'- {action}' for action in solutions['suggested_actions'])}
-        
-        Confidence Score: {solutions['confidence_score']*100:.1f}%
-        
-        References:
-        {chr(10).join(f'- {ref["type"].upper()}: {ref["reference"]}' for ref in solutions['references'] if 'type' in ref and 'reference' in ref)}
-        """
-        
-        IncidentUpdate.create_update(
-            incident_id=incident_id,
-            user_id=current_user.id,
-            content=update_content
-        )
-        
-        flash('AI analysis completed successfully', 'success')
-    except Exception as e:
-        flash(f'Error during AI analysis: {str(e)}', 'danger')
+        # Known patterns are answered from the runbooks unless a full analysis is asked for
+        get_job_queue().submit(incident, current_user.id, use_rules=request.form.get('full_analysis') != 'on')
+        flash('AI analysis queued; the results will be added as an update when ready', 'success')
+    except QueueFullError as e:
+        flash(str(e), 'danger')
+    
+    return redirect(url_for('incident.view_incident', incident_id=incident_id))
+
+@incident_bp.route('/ai/jobs/<job_id>')
+@login_required
+def get_analysis_job(job_id):
+    """Status (and result, once done) of a background AI analysis job"""
+    job = get_job_queue().get_job(job_id)
+    
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
     
-    return redirect(url_for('incident.view_incident', incident_id=incident_id))
\ No newline at end of file
+    return jsonify(job.to_dict())
\ No newline at end of file
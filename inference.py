@@ -0,0 +1,100 @@
+"""
+Micro-batching of LLM generation across concurrent callers.
+
+Each analysis makes its own predict() calls; with several analyses running at
+once (job workers, plan threads) the model would do one batch-size-1 forward
+pass per prompt. BatchingDispatcher instead collects prompts that arrive within
+a short window (up to a maximum batch size) and generates them in one call,
+handing each caller its own completion.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class BatchingDispatcher:
+    """Runs generate_batch(prompts) -> [completion] on batches gathered from concurrent callers"""
+
+    def __init__(self, generate_batch, max_batch_size=8, max_wait_ms=20):
+        self.generate_batch = generate_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'prompts': 0, 'batches': 0, 'failed_batches': 0, 'max_batch': 0, 'total_generate_s': 0.0}
+
+    def submit(self, prompt):
+        """Queue a prompt; returns a Future resolving to its completion"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((prompt, future))
+        return future
+
+    def predict(self, prompt, timeout=None):
+        return self.submit(prompt).result(timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['avg_batch'] = stats['prompts'] / stats['batches'] if stats['batches'] else 0.0
+        stats['queued'] = self._queue.qsize()
+        return stats
+
+    def _ensure_started(self):
+        # Started lazily so the thread lives in the serving process, not a pre-fork parent
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='llm-batcher', daemon=True)
+            self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [(prompt, future) for prompt, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                completions = self.generate_batch([prompt for prompt, _ in batch])
+                if len(completions) != len(batch):
+                    raise RuntimeError(f"expected {len(batch)} completions, got {len(completions)}")
+            except Exception as e:
+                logger.exception("Batched generation of %d prompts failed", len(batch))
+                with self._stats_lock:
+                    self._stats['failed_batches'] += 1
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                self._stats['prompts'] += len(batch)
+                self._stats['batches'] += 1
+                self._stats['max_batch'] = max(self._stats['max_batch'], len(batch))
+                self._stats['total_generate_s'] += elapsed
+            for (_, future), completion in zip(batch, completions):
+                future.set_result(completion)
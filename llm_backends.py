@@ -0,0 +1,239 @@
+"""
+Text-generation backends for NetworkIncidentAgent.
+
+Every backend builds a transformers text-generation pipeline, which the agent
+wraps in langchain's HuggingFacePipeline, so batching and the rest of the agent
+work the same whichever one is selected with AI_LLM_BACKEND:
+
+    hf        plain PyTorch fp32 (the original behaviour)
+    hf-int8   PyTorch with int8 dynamic quantization of the linear layers
+    onnx      model exported to ONNX and run by ONNX Runtime
+              (needs `pip install optimum[onnxruntime]`)
+
+AI_LLM_THREADS caps the intra-op threads of the chosen runtime (0 = its default).
+
+The "stub" backend is a stand-in for load and performance tests. It needs no
+model weights or ML libraries and returns deterministic text derived from the
+prompt. AI_STUB_* settings control its latency, token rate, batching cost and
+injected failures. Embeddings are stubbed too (hashed bag of words).
+"""
+
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = {}
+
+STUB_BACKEND = "stub"
+
+
+def backend(name):
+    def register(factory):
+        BACKENDS[name] = factory
+        return factory
+    return register
+
+
+def build_pipeline(name, model_id, threads=0, max_new_tokens=200, temperature=0.7, batch_size=1):
+    """Build the text-generation pipeline for the named backend"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}' (choose from: {', '.join(sorted([*BACKENDS, STUB_BACKEND]))})")
+
+    from transformers import AutoTokenizer, pipeline
+
+    logger.info("Loading %s with the %s backend", model_id, name)
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    # GPT-2 has no pad token; batched generation pads on the left with EOS
+    tokenizer.pad_token_id = tokenizer.eos_token_id
+    tokenizer.padding_side = "left"
+
+    return pipeline(
+        "text-generation",
+        model=BACKENDS[name](model_id, threads),
+        tokenizer=tokenizer,
+        max_new_tokens=max_new_tokens,
+        temperature=temperature,
+        pad_token_id=tokenizer.eos_token_id,
+        batch_size=max(1, batch_size)
+    )
+
+
+def _set_torch_threads(threads):
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+
+
+@backend("hf")
+def load_torch_model(model_id, threads):
+    from transformers import AutoModelForCausalLM
+
+    _set_torch_threads(threads)
+    return AutoModelForCausalLM.from_pretrained(model_id).eval()
+
+
+@backend("hf-int8")
+def load_quantized_model(model_id, threads):
+    import torch
+    from transformers import AutoModelForCausalLM
+
+    _set_torch_threads(threads)
+    model = AutoModelForCausalLM.from_pretrained(model_id).eval()
+    # GPT-2 implements its projections as Conv1D, which quantize_dynamic skips
+    _conv1d_to_linear(model)
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _conv1d_to_linear(module):
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    for name, child in module.named_children():
+        if isinstance(child, Conv1D):
+            # Conv1D stores its weight as (in, out); Linear wants (out, in)
+            linear = torch.nn.Linear(child.weight.shape[0], child.weight.shape[1])
+            linear.weight.data = child.weight.data.t().contiguous()
+            linear.bias.data = child.bias.data
+            setattr(module, name, linear)
+        else:
+            _conv1d_to_linear(child)
+
+
+@backend("onnx")
+def load_onnx_model(model_id, threads):
+    try:
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForCausalLM
+    except ImportError as e:
+        raise RuntimeError("The onnx backend needs `pip install optimum[onnxruntime]`") from e
+
+    session_options = onnxruntime.SessionOptions()
+    session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        session_options.intra_op_num_threads = threads
+    return ORTModelForCausalLM.from_pretrained(
+        model_id,
+        export=True,
+        provider="CPUExecutionProvider",
+        session_options=session_options
+    )
+
+
+# --- Stand-in backend ---
+
+STUB_SENTENCES = [
+    "Root cause: the upstream link is saturated during peak hours.",
+    "Packet captures show retransmissions between the edge routers.",
+    "Check firewall rules changed in the last maintenance window.",
+    "Verify DNS resolution from the affected subnets.",
+    "Restart the affected services after draining traffic.",
+    "Roll back the most recent configuration push.",
+    "Monitor interface error counters and CPU on the core switches.",
+    "Long term, add capacity and alerting on link utilisation.",
+    "Related issues: certificate expiry and routing flaps.",
+    "Mitigate by failing over to the secondary path.",
+]
+
+
+class StubGenerationError(RuntimeError):
+    """Failure injected by StubLLM"""
+
+
+class _Generation:
+    def __init__(self, text):
+        self.text = text
+
+
+class _LLMResult:
+    def __init__(self, generations):
+        self.generations = generations
+
+
+class StubLLM:
+    """Deterministic stand-in for the HuggingFacePipeline LLM (predict, generate and stream).
+
+    A completion is max_new_tokens words chosen by a hash of the prompt and seed,
+    so the same prompt always gets the same text. Generating takes latency_ms plus
+    one token interval per word (tokens_per_s = 0 makes it instant). A batch of n
+    prompts costs 1 + batch_overhead * (n - 1) times a single prompt. Generations
+    are serialised like a single model instance. Each call fails with probability
+    failure_rate, drawn from a generator seeded with seed, so a run is repeatable
+    for the same call order.
+    """
+
+    def __init__(self, max_new_tokens=200, latency_ms=50.0, tokens_per_s=100.0, failure_rate=0.0,
+                 batch_overhead=0.1, seed=0):
+        self.max_new_tokens = max_new_tokens
+        self.latency = latency_ms / 1000.0
+        self.token_interval = 1.0 / tokens_per_s if tokens_per_s > 0 else 0.0
+        self.failure_rate = failure_rate
+        self.batch_overhead = batch_overhead
+        self.seed = seed
+
+        self._model_lock = threading.Lock()
+        self._rng_lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    def completion(self, prompt):
+        """The deterministic completion for a prompt"""
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode("utf-8")).digest()
+        rng = random.Random(digest)
+        words = []
+        while len(words) < self.max_new_tokens:
+            words.extend(rng.choice(STUB_SENTENCES).split())
+        return " " + " ".join(words[:self.max_new_tokens])
+
+    def predict(self, prompt):
+        return self.generate([prompt]).generations[0][0].text
+
+    def generate(self, prompts):
+        self._maybe_fail(len(prompts))
+        completions = [self.completion(prompt) for prompt in prompts]
+        tokens = max(len(completion.split()) for completion in completions)
+        single = self.latency + tokens * self.token_interval
+        with self._model_lock:
+            time.sleep(single * (1 + self.batch_overhead * (len(prompts) - 1)))
+        return _LLMResult([[_Generation(completion)] for completion in completions])
+
+    def stream(self, prompt):
+        self._maybe_fail(1)
+        with self._model_lock:
+            time.sleep(self.latency)
+        for word in self.completion(prompt).split():
+            # Other generations may run between tokens, as with a shared model
+            with self._model_lock:
+                time.sleep(self.token_interval)
+            yield " " + word
+
+    def _maybe_fail(self, prompts):
+        if not self.failure_rate:
+            return
+        with self._rng_lock:
+            failed = self._rng.random() < self.failure_rate
+        if failed:
+            raise StubGenerationError(f"Injected stub generation failure ({prompts} prompts)")
+
+
+class StubEmbeddings:
+    """Deterministic stand-in for HuggingFaceEmbeddings: hashed, L2-normalised bags of words"""
+
+    def __init__(self, dimensions=384):
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"[a-z0-9]+", (text or "").lower()):
+            bucket = zlib.crc32(word.encode("utf-8"))
+            vector[bucket % self.dimensions] += 1.0 if bucket & 0x80000000 else -1.0
+        norm = sum(value * value for value in vector) ** 0.5
+        return [value / norm for value in vector] if norm else vector
@@ -0,0 +1,46 @@
+"""add incident_counters table
+
+Revision ID: 3c1f8e2a9b4d
+Revises: 0a0fca074075
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f8e2a9b4d'
+down_revision = '0a0fca074075'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('incident_counters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('severity', sa.String(length=20), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=True),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Cells without a team are unique through their own partial index, since NULLs never conflict
+    op.create_index('uq_incident_counters_team_cell', 'incident_counters', ['status', 'severity', 'team_id'],
+                    unique=True, sqlite_where=sa.text('team_id IS NOT NULL'),
+                    postgresql_where=sa.text('team_id IS NOT NULL'))
+    op.create_index('uq_incident_counters_no_team_cell', 'incident_counters', ['status', 'severity'],
+                    unique=True, sqlite_where=sa.text('team_id IS NULL'), postgresql_where=sa.text('team_id IS NULL'))
+
+    # Seed the counters from the existing incidents in one pass
+    op.execute(
+        "INSERT INTO incident_counters (status, severity, team_id, count) "
+        "SELECT status, severity, team_id, COUNT(*) FROM incidents "
+        "WHERE status IS NOT NULL AND severity IS NOT NULL "
+        "GROUP BY status, severity, team_id"
+    )
+
+
+def downgrade():
+    op.drop_table('incident_counters')
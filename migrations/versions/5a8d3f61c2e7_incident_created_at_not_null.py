@@ -0,0 +1,34 @@
+"""make incidents.created_at NOT NULL
+
+Revision ID: 5a8d3f61c2e7
+Revises: 7d2b5c0e41a6
+Create Date: 2026-10-17 10:48:37.216504
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a8d3f61c2e7'
+down_revision = '7d2b5c0e41a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination orders and encodes cursors by created_at, so every row needs one;
+    # rows written without it take their last update time, else the migration time
+    op.get_bind().execute(
+        sa.text("UPDATE incidents SET created_at = COALESCE(updated_at, :now) WHERE created_at IS NULL"),
+        {'now': datetime.datetime.now()}
+    )
+    with op.batch_alter_table('incidents') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('incidents') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,34 @@
+"""add indexes for incident, update and activity query paths
+
+Revision ID: 7d2b5c0e41a6
+Revises: 3c1f8e2a9b4d
+Create Date: 2026-10-17 10:05:22.904117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2b5c0e41a6'
+down_revision = '3c1f8e2a9b4d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_incidents_status_severity_created_at', 'incidents', ['status', 'severity', 'created_at'], unique=False)
+    op.create_index('ix_incidents_team_id_status', 'incidents', ['team_id', 'status'], unique=False)
+    op.create_index('ix_incident_updates_incident_id_created_at', 'incident_updates', ['incident_id', 'created_at'], unique=False)
+    op.create_index('ix_activity_logs_timestamp', 'activity_logs', ['timestamp'], unique=False)
+    op.create_index('ix_activity_logs_user_id_timestamp', 'activity_logs', ['user_id', 'timestamp'], unique=False)
+    op.create_index('ix_users_team_id_role', 'users', ['team_id', 'role'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_team_id_role', table_name='users')
+    op.drop_index('ix_activity_logs_user_id_timestamp', table_name='activity_logs')
+    op.drop_index('ix_activity_logs_timestamp', table_name='activity_logs')
+    op.drop_index('ix_incident_updates_incident_id_created_at', table_name='incident_updates')
+    op.drop_index('ix_incidents_team_id_status', table_name='incidents')
+    op.drop_index('ix_incidents_status_severity_created_at', table_name='incidents')
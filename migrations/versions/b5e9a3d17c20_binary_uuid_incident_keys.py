@@ -0,0 +1,92 @@
+"""store incident keys as native UUID / 16-byte binary
+
+Revision ID: b5e9a3d17c20
+Revises: 5a8d3f61c2e7
+Create Date: 2026-10-17 11:48:03.557920
+
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e9a3d17c20'
+down_revision = '5a8d3f61c2e7'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def _convert_keys(convert):
+    """Fill incidents.new / incident_updates.incident_new with convert(existing key)"""
+    bind = op.get_bind()
+    
+    keys = [row[0] for row in bind.execute(sa.text("SELECT id FROM incidents"))]
+    for start in range(0, len(keys), BATCH_SIZE):
+        params = [{'old': key, 'new': convert(key)} for key in keys[start:start + BATCH_SIZE]]
+        bind.execute(sa.text("UPDATE incidents SET new = :new WHERE id = :old"), params)
+        bind.execute(sa.text("UPDATE incident_updates SET incident_new = :new WHERE incident_id = :old"), params)
+
+
+def _binary_key_type(bind):
+    # Matches models.UUIDKey: BLOB on SQLite (no numeric affinity), BINARY(16) elsewhere
+    return sa.LargeBinary(length=16) if bind.dialect.name == 'sqlite' else sa.BINARY(length=16)
+
+
+def _swap_key_columns(new_type):
+    op.drop_index('ix_incident_updates_incident_id_created_at', table_name='incident_updates')
+    
+    # Rename first, then add constraints in a second pass so they bind to the new columns
+    with op.batch_alter_table('incidents', recreate='always') as batch_op:
+        batch_op.drop_column('id')
+        batch_op.alter_column('new', new_column_name='id', existing_type=new_type, nullable=False)
+    with op.batch_alter_table('incidents', recreate='always') as batch_op:
+        batch_op.create_primary_key('pk_incidents', ['id'])
+    
+    with op.batch_alter_table('incident_updates', recreate='always') as batch_op:
+        batch_op.drop_column('incident_id')
+        batch_op.alter_column('incident_new', new_column_name='incident_id', existing_type=new_type, nullable=False)
+    with op.batch_alter_table('incident_updates', recreate='always') as batch_op:
+        batch_op.create_foreign_key('fk_incident_updates_incident_id', 'incidents', ['incident_id'], ['id'], ondelete='CASCADE')
+    
+    op.create_index('ix_incident_updates_incident_id_created_at', 'incident_updates', ['incident_id', 'created_at'], unique=False)
+
+
+def upgrade():
+    bind = op.get_bind()
+    
+    if bind.dialect.name == 'postgresql':
+        # Native uuid: the cast keeps existing values, only the storage changes
+        op.drop_constraint('incident_updates_incident_id_fkey', 'incident_updates', type_='foreignkey')
+        op.execute("ALTER TABLE incidents ALTER COLUMN id TYPE uuid USING id::uuid")
+        op.execute("ALTER TABLE incident_updates ALTER COLUMN incident_id TYPE uuid USING incident_id::uuid")
+        op.create_foreign_key('incident_updates_incident_id_fkey', 'incident_updates', 'incidents',
+                              ['incident_id'], ['id'], ondelete='CASCADE')
+        return
+    
+    # Other databases: fill 16-byte binary columns, then swap them in for the text keys
+    key_type = _binary_key_type(bind)
+    op.add_column('incidents', sa.Column('new', key_type, nullable=True))
+    op.add_column('incident_updates', sa.Column('incident_new', key_type, nullable=True))
+    _convert_keys(lambda key: uuid.UUID(key).bytes)
+    _swap_key_columns(key_type)
+
+
+def downgrade():
+    bind = op.get_bind()
+    
+    if bind.dialect.name == 'postgresql':
+        op.drop_constraint('incident_updates_incident_id_fkey', 'incident_updates', type_='foreignkey')
+        op.execute("ALTER TABLE incidents ALTER COLUMN id TYPE varchar(36) USING id::text")
+        op.execute("ALTER TABLE incident_updates ALTER COLUMN incident_id TYPE varchar(36) USING incident_id::text")
+        op.create_foreign_key('incident_updates_incident_id_fkey', 'incident_updates', 'incidents',
+                              ['incident_id'], ['id'], ondelete='CASCADE')
+        return
+    
+    op.add_column('incidents', sa.Column('new', sa.String(length=36), nullable=True))
+    op.add_column('incident_updates', sa.Column('incident_new', sa.String(length=36), nullable=True))
+    _convert_keys(lambda key: str(uuid.UUID(bytes=bytes(key))))
+    _swap_key_columns(sa.String(length=36))
@@ -0,0 +1,66 @@
+"""add incident archive tables
+
+Revision ID: c81f4e6a2d93
+Revises: b5e9a3d17c20
+Create Date: 2026-10-17 13:20:47.112684
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81f4e6a2d93'
+down_revision = 'b5e9a3d17c20'
+branch_labels = None
+depends_on = None
+
+
+def _key_type():
+    # Same storage as models.UUIDKey
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return sa.Uuid()
+    if dialect == 'sqlite':
+        return sa.LargeBinary(length=16)
+    return sa.BINARY(length=16)
+
+
+def upgrade():
+    op.create_table('incidents_archive',
+    sa.Column('id', _key_type(), nullable=False),
+    sa.Column('title', sa.String(length=128), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('severity', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('reporter_id', sa.Integer(), nullable=False),
+    sa.Column('assignee_id', sa.Integer(), nullable=True),
+    sa.Column('team_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('resolved_at', sa.DateTime(), nullable=True),
+    sa.Column('closed_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_incidents_archive_created_at', 'incidents_archive', ['created_at'], unique=False)
+    
+    op.create_table('incident_updates_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('incident_id', _key_type(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_incident_updates_archive_incident_id_created_at', 'incident_updates_archive', ['incident_id', 'created_at'], unique=False)
+    
+    op.create_index('ix_incidents_status_closed_at', 'incidents', ['status', 'closed_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_incidents_status_closed_at', table_name='incidents')
+    op.drop_index('ix_incident_updates_archive_incident_id_created_at', table_name='incident_updates_archive')
+    op.drop_table('incident_updates_archive')
+    op.drop_index('ix_incidents_archive_created_at', table_name='incidents_archive')
+    op.drop_table('incidents_archive')
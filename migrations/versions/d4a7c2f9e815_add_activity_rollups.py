@@ -0,0 +1,33 @@
+"""add activity_rollups table
+
+Revision ID: d4a7c2f9e815
+Revises: c81f4e6a2d93
+Create Date: 2026-10-17 14:02:55.640031
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7c2f9e815'
+down_revision = 'c81f4e6a2d93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('activity_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('action_type', sa.String(length=50), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'action_type', 'user_id', name='uq_activity_rollups_cell')
+    )
+
+
+def downgrade():
+    op.drop_table('activity_rollups')
@@ -0,0 +1,60 @@
+"""add incident_daily_rollups table
+
+Revision ID: e6b1d3a8f027
+Revises: d4a7c2f9e815
+Create Date: 2026-10-17 16:21:08.312457
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b1d3a8f027'
+down_revision = 'd4a7c2f9e815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('incident_daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('severity', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=True),
+    sa.Column('archived', sa.Boolean(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('resolved_count', sa.Integer(), nullable=False),
+    sa.Column('resolution_hours', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Cells without a team are unique through their own partial index, since NULLs never conflict
+    op.create_index('uq_incident_daily_rollups_team_cell', 'incident_daily_rollups',
+                    ['day', 'severity', 'status', 'team_id', 'archived'], unique=True,
+                    sqlite_where=sa.text('team_id IS NOT NULL'), postgresql_where=sa.text('team_id IS NOT NULL'))
+    op.create_index('uq_incident_daily_rollups_no_team_cell', 'incident_daily_rollups',
+                    ['day', 'severity', 'status', 'archived'], unique=True,
+                    sqlite_where=sa.text('team_id IS NULL'), postgresql_where=sa.text('team_id IS NULL'))
+
+    # Seed the roll-up from the existing hot and archived incidents, one GROUP BY each
+    if op.get_bind().dialect.name == 'sqlite':
+        hours = "(julianday(resolved_at) - julianday(created_at)) * 24.0"
+        flags = {'incidents': '0', 'incidents_archive': '1'}
+    else:
+        hours = "EXTRACT(EPOCH FROM resolved_at - created_at) / 3600.0"
+        flags = {'incidents': 'FALSE', 'incidents_archive': 'TRUE'}
+    for table, archived in flags.items():
+        op.execute(
+            "INSERT INTO incident_daily_rollups "
+            "(day, severity, status, team_id, archived, count, resolved_count, resolution_hours) "
+            f"SELECT DATE(created_at), severity, status, team_id, {archived}, COUNT(*), COUNT(resolved_at), "
+            f"COALESCE(SUM({hours}), 0.0) FROM {table} "
+            "WHERE created_at IS NOT NULL AND status IS NOT NULL AND severity IS NOT NULL "
+            "GROUP BY DATE(created_at), severity, status, team_id"
+        )
+
+
+def downgrade():
+    op.drop_table('incident_daily_rollups')
@@ -1,54 +1,30 @@
 import numpy as np
-import pandas as pd
 from sklearn.linear_model import LinearRegression
 from datetime import datetime, timedelta
-from models import Incident
+from incident_frames import load_incident_frame
 
-def prepare_data():
+def prepare_data(include_archived=False):
     """Prepare incident data for ML model"""
-    all_incidents = Incident.get_all_incidents()
-    
-    if not all_incidents:
-        return None, None
-    
-    # Convert to DataFrame
-    data = []
-    for incident in all_incidents:
-        data.append({
-            'created_at': incident.created_at,
-            'severity': incident.severity,
-            'status': incident.status
-        })
-    
-    df = pd.DataFrame(data)
+    # Only the creation time is needed for the daily counts
+    df = load_incident_frame(['created_at'], include_archived, require=['created_at'])
     
     # If no incidents, return None
     if df.empty:
         return None, None
     
-    # Convert created_at to date
-    df['date'] = df['created_at'].dt.date
-    
-    # Create time series with count of incidents per day
-    daily_incidents = df.groupby('date').size().reset_index(name='count')
-    
-    # Sort by date
-    daily_incidents = daily_incidents.sort_values('date')
-    
-    # Add features: day of week, day of month, month
-    daily_incidents['day_of_week'] = daily_incidents['date'].apply(lambda x: x.weekday())
-    daily_incidents['day_of_month'] = daily_incidents['date'].apply(lambda x: x.day)
-    daily_incidents['month'] = daily_incidents['date'].apply(lambda x: x.month)
+    # Create time series with count of incidents per day (sorted by date)
+    daily_incidents = df.groupby(df['created_at'].dt.normalize()).size()
+    dates = daily_incidents.index
     
-    # Create X (features) and y (target)
-    X = daily_incidents[['day_of_week', 'day_of_month', 'month']].values
-    y = daily_incidents['count'].values
+    # Features: day of week, day of month, month
+    X = np.column_stack([dates.weekday, dates.day, dates.month])
+    y = daily_incidents.to_numpy()
     
     return X, y
 
-def train_model():
+def train_model(include_archived=False):
     """Train a simple ML model to predict incident counts"""
-    X, y = prepare_data()
+    X, y = prepare_data(include_archived)
     
     if X is None or y is None:
         # Not enough data, return dummy model
@@ -65,9 +41,9 @@ class DummyModel:
     def predict(self, X):
         return np.random.randint(1, 5, size=X.shape[0])
 
-def predict_incidents():
+def predict_incidents(include_archived=False):
     """Predict incident counts for the next 7 days"""
-    model = train_model()
+    model = train_model(include_archived)
     
     # Generate features for the next 7 days
     future_dates = []
@@ -1,9 +1,69 @@
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+import base64
 import datetime
+import os
+import time
 import uuid
+from contextlib import contextmanager
+from flask import g
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator, BINARY, LargeBinary
 from extentions import db 
+
+
+def uuid7(timestamp=None, rand=None):
+    """Time-ordered UUID (RFC 9562 version 7): 48-bit Unix ms timestamp followed by 74 random bits"""
+    ms = int((time.time() if timestamp is None else timestamp) * 1000) & ((1 << 48) - 1)
+    if rand is None:
+        rand = int.from_bytes(os.urandom(10), 'big')
+    value = (ms << 80) | (0x7 << 76) | (((rand >> 62) & 0xFFF) << 64) | (0b10 << 62) | (rand & ((1 << 62) - 1))
+    return uuid.UUID(int=value)
+
+
+def new_incident_id(created_at=None):
+    """New incident key in its external string form"""
+    return str(uuid7(created_at.timestamp() if created_at else None))
+
+
+class UUIDKey(TypeDecorator):
+    """UUID stored as native UUID on PostgreSQL and as 16-byte binary elsewhere.
+    
+    Python code keeps seeing the canonical 36-character string form.
+    """
+    impl = BINARY(16)
+    cache_ok = True
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        if dialect.name == 'sqlite':
+            return dialect.type_descriptor(LargeBinary(16))  # BLOB, avoids NUMERIC affinity of BINARY
+        return dialect.type_descriptor(BINARY(16))
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value if dialect.name == 'postgresql' else value.bytes
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(bytes=bytes(value))
+        return str(value)
+
+
+def is_valid_incident_id(incident_id):
+    try:
+        uuid.UUID(str(incident_id))
+        return True
+    except ValueError:
+        return False
+
 class User(db.Model, UserMixin):
     __tablename__ = 'users'
     
@@ -17,6 +77,10 @@ class User(db.Model, UserMixin):
     
     # Relationships
     team = db.relationship('Team', backref=db.backref('members', lazy='dynamic'))
+    
+    __table_args__ = (
+        db.Index('ix_users_team_id_role', 'team_id', 'role'),
+    )
     incidents_reported = db.relationship('Incident', backref='reporter', foreign_keys='Incident.reporter_id')
     incidents_assigned = db.relationship('Incident', backref='assignee', foreign_keys='Incident.assignee_id')
     updates = db.relationship('IncidentUpdate', backref='user')
@@ -45,6 +109,18 @@ class User(db.Model, UserMixin):
     def get_user_by_email(email):
         return User.query.filter_by(email=email).first()
     
+    @staticmethod
+    def get_user_by_id(user_id):
+        return User.query.get(user_id)
+    
+    @staticmethod
+    def get_users_by_ids(user_ids):
+        """Fetch several users in one query, returned as an id -> User map"""
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+        if not user_ids:
+            return {}
+        return {user.id: user for user in User.query.filter(User.id.in_(user_ids)).all()}
+    
     @staticmethod
     def create_user(username, email, password, role='support_engineer'):
         user = User(username=username, email=email, role=role)
@@ -77,6 +153,14 @@ class Team(db.Model):
     def get_team_by_id(team_id):
         return Team.query.get(team_id)
     
+    @staticmethod
+    def get_teams_by_ids(team_ids):
+        """Fetch several teams in one query, returned as an id -> Team map"""
+        team_ids = {team_id for team_id in team_ids if team_id is not None}
+        if not team_ids:
+            return {}
+        return {team.id: team for team in Team.query.filter(Team.id.in_(team_ids)).all()}
+    
     @staticmethod
     def create_team(name, description=None):
         team = Team(name=name, description=description)
@@ -92,7 +176,7 @@ class Team(db.Model):
 class Incident(db.Model):
     __tablename__ = 'incidents'
     
-    id = db.Column(db.String(36), primary_key=True)
+    id = db.Column(UUIDKey, primary_key=True)
     title = db.Column(db.String(128), nullable=False)
     description = db.Column(db.Text)
     severity = db.Column(db.String(20), nullable=False)  # 'low', 'medium', 'high', 'critical'
@@ -100,7 +184,7 @@ class Incident(db.Model):
     reporter_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     assignee_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=True)
-    created_at = db.Column(db.DateTime, default=func.now())
+    created_at = db.Column(db.DateTime, nullable=False, default=func.now())
     updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
     resolved_at = db.Column(db.DateTime, nullable=True)
     closed_at = db.Column(db.DateTime, nullable=True)
@@ -108,18 +192,36 @@ class Incident(db.Model):
     # Relationships
     updates = db.relationship('IncidentUpdate', backref='incident', cascade='all, delete-orphan')
     
+    __table_args__ = (
+        db.Index('ix_incidents_status_severity_created_at', 'status', 'severity', 'created_at'),
+        db.Index('ix_incidents_team_id_status', 'team_id', 'status'),
+        db.Index('ix_incidents_status_closed_at', 'status', 'closed_at'),
+    )
+    
+    is_archived = False
+    
     def assign(self, team_id, assignee_id=None):
+        bump_incident_counter(self.status, self.severity, self.team_id, -1)
+        bump_incident_counter('assigned', self.severity, team_id, 1)
+        bump_incident_rollup(self, -1)
+        
         self.team_id = team_id
         self.assignee_id = assignee_id
         self.status = 'assigned'
         self.updated_at = datetime.datetime.now()
-        db.session.commit()
+        bump_incident_rollup(self, 1)
+        commit_or_stage()
         
         # Create activity log
         log_activity('incident_assigned', f"Incident #{self.id} assigned to team #{team_id}")
     
     def set_status(self, status):
         old_status = self.status
+        if status != old_status:
+            bump_incident_counter(old_status, self.severity, self.team_id, -1)
+            bump_incident_counter(status, self.severity, self.team_id, 1)
+            bump_incident_rollup(self, -1)
+        
         self.status = status
         self.updated_at = datetime.datetime.now()
         
@@ -128,7 +230,9 @@ class Incident(db.Model):
         elif status == 'closed' and old_status != 'closed':
             self.closed_at = datetime.datetime.now()
         
-        db.session.commit()
+        if status != old_status:
+            bump_incident_rollup(self, 1)
+        commit_or_stage()
         
         # Create activity log
         log_activity('status_update', f"Incident #{self.id} status changed from {old_status} to {status}")
@@ -150,30 +254,106 @@ class Incident(db.Model):
         }
     
     @staticmethod
-    def get_incident_by_id(incident_id):
-        return Incident.query.get(incident_id)
+    def get_incident_by_id(incident_id, include_archived=False):
+        if not is_valid_incident_id(incident_id):
+            return None
+        incident = Incident.query.get(incident_id)
+        if incident is None and include_archived:
+            incident = ArchivedIncident.query.get(incident_id)
+        return incident
+    
+    @staticmethod
+    def get_incidents_by_ids(incident_ids, include_archived=False):
+        """Fetch several incidents in one query (plus one for the archive), as an id -> Incident map"""
+        incident_ids = {incident_id for incident_id in incident_ids if is_valid_incident_id(incident_id)}
+        if not incident_ids:
+            return {}
+        incidents = {incident.id: incident for incident in Incident.query.filter(Incident.id.in_(incident_ids)).all()}
+        missing = incident_ids - incidents.keys()
+        if missing and include_archived:
+            incidents.update(
+                (incident.id, incident)
+                for incident in ArchivedIncident.query.filter(ArchivedIncident.id.in_(missing)).all()
+            )
+        return incidents
     
     @staticmethod
     def create_incident(title, description, severity, reporter_id):
-        incident_id = str(uuid.uuid4())
+        # Stamped here rather than by the database so the daily roll-up knows the day before the flush
+        created_at = datetime.datetime.now()
+        incident_id = new_incident_id(created_at)
         incident = Incident(
             id=incident_id,
             title=title,
             description=description,
             severity=severity,
-            reporter_id=reporter_id
+            status='open',
+            reporter_id=reporter_id,
+            created_at=created_at
         )
         db.session.add(incident)
-        db.session.commit()
+        bump_incident_counter('open', severity, None, 1)
+        bump_incident_rollup(incident, 1)
+        commit_or_stage()
         
         # Create activity log
         log_activity('incident_created', f"New incident created: {title}")
         
+        # Embed it for similar-incident search once the row is committed
+        from similarity import index_incident
+        after_commit(lambda: index_incident(incident_id, title, description))
+        
         return incident
     
     @staticmethod
-    def get_all_incidents():
-        return Incident.query.all()
+    def get_all_incidents(include_archived=False):
+        incidents = Incident.query.all()
+        if include_archived:
+            incidents += ArchivedIncident.query.all()
+        return incidents
+    
+    @staticmethod
+    def filter_incidents(status=None, severity=None, team_id=None, assignee_id=None,
+                         created_from=None, created_to=None):
+        """Build the incident query with every filter applied in SQL"""
+        query = Incident.query
+        
+        if status:
+            query = query.filter(Incident.status == status)
+        if severity:
+            query = query.filter(Incident.severity == severity)
+        if team_id is not None:
+            query = query.filter(Incident.team_id == team_id)
+        if assignee_id is not None:
+            query = query.filter(Incident.assignee_id == assignee_id)
+        if created_from:
+            query = query.filter(Incident.created_at >= created_from)
+        if created_to:
+            query = query.filter(Incident.created_at < created_to)
+        
+        return query
+    
+    @staticmethod
+    def get_incidents_page(limit=50, cursor=None, **filters):
+        """Return (incidents, next_cursor) ordered newest first using keyset pagination on (created_at, id)"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = Incident.filter_incidents(**filters)
+        
+        if cursor:
+            created_at, incident_id = decode_incident_cursor(cursor)
+            query = query.filter(db.or_(
+                Incident.created_at < created_at,
+                db.and_(Incident.created_at == created_at, Incident.id < incident_id)
+            ))
+        
+        incidents = query.order_by(Incident.created_at.desc(), Incident.id.desc()).limit(limit + 1).all()
+        
+        next_cursor = None
+        if len(incidents) > limit:
+            incidents = incidents[:limit]
+            next_cursor = encode_incident_cursor(incidents[-1])
+        
+        return incidents, next_cursor
     
     @staticmethod
     def get_incidents_by_status(status):
@@ -196,11 +376,15 @@ class IncidentUpdate(db.Model):
     __tablename__ = 'incident_updates'
     
     id = db.Column(db.Integer, primary_key=True)
-    incident_id = db.Column(db.String(36), db.ForeignKey('incidents.id', ondelete='CASCADE'), nullable=False)
+    incident_id = db.Column(UUIDKey, db.ForeignKey('incidents.id', ondelete='CASCADE'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=func.now())
     
+    __table_args__ = (
+        db.Index('ix_incident_updates_incident_id_created_at', 'incident_id', 'created_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -218,7 +402,7 @@ class IncidentUpdate(db.Model):
             content=content
         )
         db.session.add(update)
-        db.session.commit()
+        commit_or_stage()
         
         # Create activity log
         log_activity('incident_update', f"Update added to incident #{incident_id}")
@@ -226,8 +410,122 @@ class IncidentUpdate(db.Model):
         return update
     
     @staticmethod
-    def get_updates_for_incident(incident_id):
-        return IncidentUpdate.query.filter_by(incident_id=incident_id).order_by(IncidentUpdate.created_at).all()
+    def find_update(incident_id, content):
+        """An existing update of the incident with exactly this content, if any"""
+        return IncidentUpdate.query.filter_by(incident_id=incident_id, content=content).first()
+    
+    @staticmethod
+    def get_updates_for_incident(incident_id, include_archived=False):
+        updates = IncidentUpdate.query.filter_by(incident_id=incident_id).order_by(IncidentUpdate.created_at).all()
+        if not updates and include_archived:
+            updates = ArchivedIncidentUpdate.query.filter_by(incident_id=incident_id).order_by(ArchivedIncidentUpdate.created_at).all()
+        return updates
+
+
+class ArchivedIncident(db.Model):
+    """Closed incidents moved out of the hot incidents table by archive.py"""
+    __tablename__ = 'incidents_archive'
+    
+    id = db.Column(UUIDKey, primary_key=True)
+    title = db.Column(db.String(128), nullable=False)
+    description = db.Column(db.Text)
+    severity = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20))
+    reporter_id = db.Column(db.Integer, nullable=False)
+    assignee_id = db.Column(db.Integer, nullable=True)
+    team_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime)
+    resolved_at = db.Column(db.DateTime, nullable=True)
+    closed_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, default=func.now())
+    
+    __table_args__ = (
+        db.Index('ix_incidents_archive_created_at', 'created_at'),
+    )
+    
+    is_archived = True
+    
+    def to_dict(self):
+        return dict(Incident.to_dict(self), archived=True)
+
+
+class ArchivedIncidentUpdate(db.Model):
+    __tablename__ = 'incident_updates_archive'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    incident_id = db.Column(UUIDKey, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_incident_updates_archive_incident_id_created_at', 'incident_id', 'created_at'),
+    )
+    
+    def to_dict(self):
+        return IncidentUpdate.to_dict(self)
+
+
+class IncidentCounter(db.Model):
+    """Materialized incident counts per (status, severity, team) cell"""
+    __tablename__ = 'incident_counters'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), nullable=False)
+    severity = db.Column(db.String(20), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id', ondelete='SET NULL'), nullable=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # NULLs never conflict under a unique constraint, so cells without a team get an index of their own
+    __table_args__ = (
+        db.Index('uq_incident_counters_team_cell', 'status', 'severity', 'team_id', unique=True,
+                 sqlite_where=team_id.isnot(None), postgresql_where=team_id.isnot(None)),
+        db.Index('uq_incident_counters_no_team_cell', 'status', 'severity', unique=True,
+                 sqlite_where=team_id.is_(None), postgresql_where=team_id.is_(None)),
+    )
+    
+    def to_dict(self):
+        return {
+            'status': self.status,
+            'severity': self.severity,
+            'team_id': self.team_id,
+            'count': self.count
+        }
+
+
+class IncidentDailyRollup(db.Model):
+    """Incident counts and resolution hours per (created day, severity, status, team) cell"""
+    __tablename__ = 'incident_daily_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    severity = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id', ondelete='SET NULL'), nullable=True)
+    archived = db.Column(db.Boolean, nullable=False, default=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    resolved_count = db.Column(db.Integer, nullable=False, default=0)
+    resolution_hours = db.Column(db.Float, nullable=False, default=0.0)
+    
+    __table_args__ = (
+        db.Index('uq_incident_daily_rollups_team_cell', 'day', 'severity', 'status', 'team_id', 'archived',
+                 unique=True, sqlite_where=team_id.isnot(None), postgresql_where=team_id.isnot(None)),
+        db.Index('uq_incident_daily_rollups_no_team_cell', 'day', 'severity', 'status', 'archived',
+                 unique=True, sqlite_where=team_id.is_(None), postgresql_where=team_id.is_(None)),
+    )
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'severity': self.severity,
+            'status': self.status,
+            'team_id': self.team_id,
+            'archived': self.archived,
+            'count': self.count,
+            'resolved_count': self.resolved_count,
+            'resolution_hours': self.resolution_hours
+        }
 
 
 class ActivityLog(db.Model):
@@ -242,6 +540,11 @@ class ActivityLog(db.Model):
     # Relationship
     user = db.relationship('User', backref=db.backref('activities', lazy='dynamic'))
     
+    __table_args__ = (
+        db.Index('ix_activity_logs_timestamp', 'timestamp'),
+        db.Index('ix_activity_logs_user_id_timestamp', 'user_id', 'timestamp'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -252,14 +555,164 @@ class ActivityLog(db.Model):
         }
 
 
+MAX_PAGE_SIZE = 200
+
+
+def encode_incident_cursor(incident):
+    """Opaque pagination cursor pointing just after the given incident"""
+    raw = f"{incident.created_at.isoformat()}|{incident.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_incident_cursor(cursor):
+    """Inverse of encode_incident_cursor; raises ValueError on malformed input"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, incident_id = raw.split('|', 1)
+        created_at = datetime.datetime.fromisoformat(created_at)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    # Checked here, otherwise a bad id only fails when UUIDKey binds it into the query
+    if not is_valid_incident_id(incident_id):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return created_at, incident_id
+
+
+def incident_filters_from_args(args):
+    """Translate request query args into Incident.filter_incidents keyword arguments.
+    
+    'all' or empty values mean no filter. Raises ValueError on malformed ids or dates.
+    """
+    def value(name):
+        raw = args.get(name)
+        return None if raw in (None, '', 'all') else raw
+    
+    filters = {
+        'status': value('status'),
+        'severity': value('severity'),
+        'team_id': None,
+        'assignee_id': None,
+        'created_from': None,
+        'created_to': None
+    }
+    
+    for name in ('team_id', 'assignee_id'):
+        if value(name) is not None:
+            filters[name] = int(value(name))
+    
+    for name in ('created_from', 'created_to'):
+        if value(name) is not None:
+            filters[name] = datetime.datetime.fromisoformat(value(name))
+    
+    return filters
+
+
+class ActivityRollup(db.Model):
+    """Daily activity counts per action type and user, kept after detail rows expire"""
+    __tablename__ = 'activity_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    action_type = db.Column(db.String(50), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('day', 'action_type', 'user_id', name='uq_activity_rollups_cell'),
+    )
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'action_type': self.action_type,
+            'user_id': self.user_id,
+            'count': self.count
+        }
+
+
+def in_unit_of_work():
+    return g.get('_uow_depth', 0) > 0
+
+
+def commit_or_stage():
+    """Commit the session, or only flush it when running inside unit_of_work()"""
+    if in_unit_of_work():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+@contextmanager
+def unit_of_work():
+    """Group model mutations into a single transaction.
+    
+    Inside the block, Incident.assign/set_status/create_incident,
+    IncidentUpdate.create_update and log_activity only stage their changes;
+    one commit happens when the outermost block exits, or a rollback if it raises.
+    """
+    outermost = not in_unit_of_work()
+    if not outermost:
+        g._uow_depth += 1
+        try:
+            yield db.session
+        finally:
+            g._uow_depth -= 1
+        return
+    
+    g._uow_depth = 1
+    g._uow_audit = []
+    g._uow_after_commit = []
+    try:
+        yield db.session
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    else:
+        # Buffered audit records are released only once the data they describe is committed
+        from audit import get_audit_sink
+        
+        sink = get_audit_sink()
+        if sink is not None:
+            for record in g._uow_audit:
+                sink.enqueue(*record)
+        for callback in g._uow_after_commit:
+            callback()
+    finally:
+        g._uow_depth = 0
+        g._uow_audit = []
+        g._uow_after_commit = []
+
+
+def after_commit(callback):
+    """Run callback once the current unit of work commits (right away outside of one)"""
+    if in_unit_of_work():
+        g._uow_after_commit.append(callback)
+    else:
+        callback()
+
+
 def log_activity(action_type, description, user_id=None):
+    from audit import get_audit_sink
+    
+    # Buffered mode: hand the record to the write-behind sink instead of committing here
+    sink = get_audit_sink()
+    if sink is not None:
+        timestamp = datetime.datetime.now()
+        record = (action_type, description, user_id, timestamp)
+        if in_unit_of_work():
+            g._uow_audit.append(record)  # only enqueued if the unit of work commits
+        else:
+            sink.enqueue(*record)
+        return ActivityLog(action_type=action_type, description=description, user_id=user_id, timestamp=timestamp)
+    
     activity = ActivityLog(
         action_type=action_type,
         description=description,
         user_id=user_id
     )
     db.session.add(activity)
-    db.session.commit()
+    commit_or_stage()
     return activity
 
 
@@ -267,34 +720,198 @@ def get_recent_activities(limit=20):
     return ActivityLog.query.order_by(ActivityLog.timestamp.desc()).limit(limit).all()
 
 
+def get_activity_summary(since):
+    """Activity counts per day and action type since the given date, from roll-ups plus live rows"""
+    summary = {}
+    since_ts = datetime.datetime.combine(since, datetime.time())
+    
+    rollups = db.session.query(
+        ActivityRollup.day, ActivityRollup.action_type, func.sum(ActivityRollup.count)
+    ).filter(ActivityRollup.day >= since).group_by(ActivityRollup.day, ActivityRollup.action_type).all()
+    for day, action_type, count in rollups:
+        key = (day.isoformat(), action_type)
+        summary[key] = summary.get(key, 0) + int(count)
+    
+    day_column = func.date(ActivityLog.timestamp)
+    live = db.session.query(
+        day_column, ActivityLog.action_type, func.count(ActivityLog.id)
+    ).filter(ActivityLog.timestamp >= since_ts).group_by(day_column, ActivityLog.action_type).all()
+    for day, action_type, count in live:
+        key = (str(day)[:10], action_type)
+        summary[key] = summary.get(key, 0) + int(count)
+    
+    return [
+        {'day': day, 'action_type': action_type, 'count': count}
+        for (day, action_type), count in sorted(summary.items())
+    ]
+
+
+def upsert_cell(model, keys, values):
+    """Insert a cell or add `values` to the existing one in a single INSERT ... ON CONFLICT DO UPDATE
+
+    `keys` identify the cell and must include team_id; the conflict target is the partial unique
+    index matching whether the cell has a team, so concurrent first writes never collide.
+    """
+    table = model.__table__
+    insert = sqlite.insert if db.engine.dialect.name == 'sqlite' else postgresql.insert
+    if keys['team_id'] is None:
+        elements = [name for name in keys if name != 'team_id']
+        where = table.c.team_id.is_(None)
+    else:
+        elements = list(keys)
+        where = table.c.team_id.isnot(None)
+    
+    statement = insert(table).values(**keys, **values)
+    statement = statement.on_conflict_do_update(
+        index_elements=elements, index_where=where,
+        set_={name: table.c[name] + statement.excluded[name] for name in values}
+    )
+    db.session.execute(statement)
+
+
+def bump_incident_counter(status, severity, team_id, delta):
+    """Adjust one counter cell inside the caller's transaction (no commit)"""
+    if not status or not severity or not delta:
+        return
+    
+    upsert_cell(IncidentCounter, {'status': status, 'severity': severity, 'team_id': team_id}, {'count': delta})
+
+
+def rebuild_incident_counters():
+    """Recompute incident_counters with one GROUP BY over the hot and archived incidents"""
+    cells = {}
+    for model in (Incident, ArchivedIncident):
+        rows = db.session.query(
+            model.status, model.severity, model.team_id, func.count(model.id)
+        ).group_by(model.status, model.severity, model.team_id).all()
+        for status, severity, team_id, count in rows:
+            if status and severity:
+                key = (status, severity, team_id)
+                cells[key] = cells.get(key, 0) + count
+    
+    IncidentCounter.query.delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(IncidentCounter, [
+        {'status': status, 'severity': severity, 'team_id': team_id, 'count': count}
+        for (status, severity, team_id), count in cells.items()
+    ])
+    db.session.commit()
+    return len(cells)
+
+
+def bump_incident_rollup_cell(day, severity, status, team_id, archived=False, count=0, resolved_count=0,
+                              resolution_hours=0.0):
+    """Adjust one daily roll-up cell inside the caller's transaction (no commit)"""
+    if day is None or not status or not severity or not (count or resolved_count or resolution_hours):
+        return
+    
+    keys = {'day': day, 'severity': severity, 'status': status, 'team_id': team_id, 'archived': archived}
+    values = {'count': count, 'resolved_count': resolved_count, 'resolution_hours': resolution_hours}
+    if count > 0:
+        upsert_cell(IncidentDailyRollup, keys, values)
+        return
+    
+    # A missing cell can only be added to; removing from one means the roll-up is behind the
+    # incidents table, and a negative cell would hide that until the next rebuild
+    IncidentDailyRollup.query.filter_by(**keys).update({
+        getattr(IncidentDailyRollup, name): getattr(IncidentDailyRollup, name) + value
+        for name, value in values.items()
+    }, synchronize_session=False)
+
+
+def bump_incident_rollup(incident, delta):
+    """Add (delta=1) or remove (delta=-1) an incident's current state from the daily roll-up"""
+    if incident.created_at is None:
+        return
+    hours = (incident.resolved_at - incident.created_at).total_seconds() / 3600 if incident.resolved_at else None
+    bump_incident_rollup_cell(
+        incident.created_at.date(), incident.severity, incident.status, incident.team_id, incident.is_archived,
+        count=delta,
+        resolved_count=delta if hours is not None else 0,
+        resolution_hours=delta * hours if hours is not None else 0.0
+    )
+
+
+def incident_rollup_cells(model, *criteria):
+    """GROUP BY (day, severity, status, team) over an incidents table, with counts and resolution hours"""
+    if db.engine.dialect.name == 'sqlite':
+        hours = (func.julianday(model.resolved_at) - func.julianday(model.created_at)) * 24.0
+    else:
+        hours = func.extract('epoch', model.resolved_at - model.created_at) / 3600.0
+    day = func.date(model.created_at)
+    
+    rows = db.session.query(
+        day, model.severity, model.status, model.team_id,
+        func.count(model.id), func.count(model.resolved_at), func.coalesce(func.sum(hours), 0.0)
+    ).filter(model.created_at.isnot(None), *criteria).group_by(
+        day, model.severity, model.status, model.team_id
+    ).all()
+    
+    cells = []
+    for day, severity, status, team_id, count, resolved_count, resolution_hours in rows:
+        if status and severity:
+            if isinstance(day, str):
+                day = datetime.date.fromisoformat(day)
+            cells.append({
+                'day': day, 'severity': severity, 'status': status, 'team_id': team_id,
+                'archived': model is ArchivedIncident, 'count': count,
+                'resolved_count': resolved_count, 'resolution_hours': float(resolution_hours or 0.0)
+            })
+    return cells
+
+
+def rebuild_incident_rollups():
+    """Recompute incident_daily_rollups with one GROUP BY over the hot and archived incidents"""
+    cells = incident_rollup_cells(Incident) + incident_rollup_cells(ArchivedIncident)
+    
+    IncidentDailyRollup.query.delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(IncidentDailyRollup, cells)
+    db.session.commit()
+    return len(cells)
+
+
+def get_incident_daily_totals(start=None, end=None, include_archived=False):
+    """(day, severity, count, resolved_count, resolution_hours) rows from the roll-up, start/end inclusive"""
+    query = db.session.query(
+        IncidentDailyRollup.day, IncidentDailyRollup.severity,
+        func.sum(IncidentDailyRollup.count), func.sum(IncidentDailyRollup.resolved_count),
+        func.sum(IncidentDailyRollup.resolution_hours)
+    )
+    if start is not None:
+        query = query.filter(IncidentDailyRollup.day >= start)
+    if end is not None:
+        query = query.filter(IncidentDailyRollup.day <= end)
+    if not include_archived:
+        query = query.filter(IncidentDailyRollup.archived.is_(False))
+    
+    return [
+        (day, severity, int(count or 0), int(resolved_count or 0), float(resolution_hours or 0.0))
+        for day, severity, count, resolved_count, resolution_hours in query.group_by(
+            IncidentDailyRollup.day, IncidentDailyRollup.severity
+        ).order_by(IncidentDailyRollup.day).all()
+    ]
+
+
 def get_incident_stats():
-    total = Incident.query.count()
-    open_incidents = Incident.query.filter_by(status='open').count()
-    assigned_incidents = Incident.query.filter_by(status='assigned').count()
-    in_progress_incidents = Incident.query.filter_by(status='in_progress').count()
-    resolved_incidents = Incident.query.filter_by(status='resolved').count()
-    closed_incidents = Incident.query.filter_by(status='closed').count()
-    
-    critical = Incident.query.filter_by(severity='critical').count()
-    high = Incident.query.filter_by(severity='high').count()
-    medium = Incident.query.filter_by(severity='medium').count()
-    low = Incident.query.filter_by(severity='low').count()
+    rows = db.session.query(
+        IncidentCounter.status, IncidentCounter.severity, func.sum(IncidentCounter.count)
+    ).group_by(IncidentCounter.status, IncidentCounter.severity).all()
+    
+    by_status = {'open': 0, 'assigned': 0, 'in_progress': 0, 'resolved': 0, 'closed': 0}
+    by_severity = {'critical': 0, 'high': 0, 'medium': 0, 'low': 0}
+    total = 0
+    
+    for status, severity, count in rows:
+        count = int(count or 0)
+        total += count
+        if status in by_status:
+            by_status[status] += count
+        if severity in by_severity:
+            by_severity[severity] += count
     
     return {
         'total': total,
-        'by_status': {
-            'open': open_incidents,
-            'assigned': assigned_incidents,
-            'in_progress': in_progress_incidents,
-            'resolved': resolved_incidents,
-            'closed': closed_incidents
-        },
-        'by_severity': {
-            'critical': critical,
-            'high': high,
-            'medium': medium,
-            'low': low
-        }
+        'by_status': by_status,
+        'by_severity': by_severity
     }
 
 
@@ -322,12 +939,21 @@ def init_data():
     # Generate sample incidents if we have fewer than 5
     if Incident.query.count() < 5:
         generate_sample_incidents(15)  # Generate 15 sample incidents
+        rebuild_incident_counters()
+        rebuild_incident_rollups()
+    
+    # Populate counters for databases created before incident_counters existed
+    if IncidentCounter.query.count() == 0 and Incident.query.count() > 0:
+        rebuild_incident_counters()
+    
+    # Likewise the daily roll-up behind the incident trends
+    if IncidentDailyRollup.query.count() == 0 and Incident.query.count() > 0:
+        rebuild_incident_rollups()
         
 def generate_sample_incidents(num_incidents=15):
     """Generate sample incidents with realistic timestamps, severities, and progression"""
     import datetime
     import random
-    import uuid
     
     print(f"Generating {num_incidents} sample incidents...")
     
@@ -403,7 +1029,7 @@ def generate_sample_incidents(num_incidents=15):
     
     for i in range(num_incidents):
         # Generate a unique incident ID
-        incident_id = str(uuid.uuid4())
+        incident_id = new_incident_id()
         
         # Randomly select a title and description
         title = random.choice(incident_titles)
@@ -0,0 +1,162 @@
+"""
+Retention and roll-up for activity_logs.
+
+Detail rows older than ACTIVITY_RETENTION_DAYS, or older than the newest
+ACTIVITY_MAX_ROWS rows, are folded into daily ActivityRollup rows
+(day x action_type x user) and then deleted. Each batch is rolled up and
+deleted in a single transaction, so the job can stop at any point without
+double counting. With an export file, the batch is first written to a
+side file that is appended to the export only once the transaction has
+committed; a side file left by a crash is published or dropped at the
+start of the next run, depending on whether its batch committed.
+"""
+
+import datetime
+import json
+import logging
+import os
+
+from sqlalchemy import delete, or_, select
+
+from extentions import db
+from models import ActivityLog, ActivityRollup
+
+logger = logging.getLogger(__name__)
+
+
+def retention_filter(max_age_days=None, max_rows=None):
+    """SQL condition matching expired activity rows, or None if nothing is over budget"""
+    conditions = []
+    if max_age_days is not None:
+        cutoff = datetime.datetime.now() - datetime.timedelta(days=max_age_days)
+        conditions.append(ActivityLog.timestamp < cutoff)
+
+    if max_rows:
+        # activity_logs is append-only, so id order is arrival order: keep the newest max_rows ids
+        boundary_id = db.session.execute(
+            select(ActivityLog.id).order_by(ActivityLog.id.desc()).offset(max_rows).limit(1)
+        ).scalar()
+        if boundary_id is not None:
+            conditions.append(ActivityLog.id <= boundary_id)
+
+    if not conditions:
+        return None
+    return or_(*conditions)
+
+
+def _add_to_rollups(counts):
+    for (day, action_type, user_id), count in counts.items():
+        rollup = ActivityRollup.query.filter_by(day=day, action_type=action_type, user_id=user_id).first()
+        if rollup:
+            rollup.count += count
+        else:
+            db.session.add(ActivityRollup(day=day, action_type=action_type, user_id=user_id, count=count))
+
+
+def _pending_path(export_path):
+    return export_path + '.pending'
+
+
+def _export(rows, export_path):
+    """Write rows to the export's pending side file, to be published once they are deleted"""
+    os.makedirs(os.path.dirname(os.path.abspath(export_path)), exist_ok=True)
+    with open(_pending_path(export_path), 'w') as f:
+        for row in rows:
+            f.write(json.dumps({
+                'id': row.id,
+                'action_type': row.action_type,
+                'description': row.description,
+                'user_id': row.user_id,
+                'timestamp': row.timestamp.isoformat() if row.timestamp else None
+            }) + '\n')
+
+
+def _publish_export(export_path):
+    """Append a committed batch's pending rows to the export file"""
+    pending = _pending_path(export_path)
+    if not os.path.exists(pending):
+        return
+    with open(pending) as src, open(export_path, 'a') as dst:
+        dst.write(src.read())
+    os.remove(pending)
+
+
+def _recover_export(export_path):
+    """Deal with a pending file left by a process that died mid-batch: publish it only if the batch committed"""
+    pending = _pending_path(export_path)
+    if not os.path.exists(pending):
+        return
+    with open(pending) as f:
+        ids = [json.loads(line)['id'] for line in f if line.strip()]
+    # A batch is deleted in one transaction, so any surviving row means it never committed
+    survived = ids and db.session.execute(
+        select(ActivityLog.id).where(ActivityLog.id.in_(ids)).limit(1)
+    ).first() is not None
+    if survived:
+        _discard_export(export_path)
+    else:
+        _publish_export(export_path)
+
+
+def _discard_export(export_path):
+    pending = _pending_path(export_path)
+    if os.path.exists(pending):
+        os.remove(pending)
+
+
+def roll_up_batch(expired, batch_size=5000, export_path=None):
+    """Roll up and delete one batch of rows matching expired; returns the number of rows removed"""
+    if export_path:
+        _recover_export(export_path)
+
+    rows = db.session.execute(
+        select(ActivityLog.id, ActivityLog.action_type, ActivityLog.description,
+               ActivityLog.user_id, ActivityLog.timestamp)
+        .where(expired)
+        .order_by(ActivityLog.id)
+        .limit(batch_size)
+    ).all()
+
+    if not rows:
+        return 0
+
+    counts = {}
+    for row in rows:
+        day = row.timestamp.date() if row.timestamp else datetime.date.today()
+        key = (day, row.action_type, row.user_id)
+        counts[key] = counts.get(key, 0) + 1
+
+    try:
+        _add_to_rollups(counts)
+        db.session.execute(delete(ActivityLog).where(ActivityLog.id.in_([row.id for row in rows])))
+        if export_path:
+            _export(rows, export_path)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        if export_path:
+            _discard_export(export_path)
+        raise
+
+    if export_path:
+        _publish_export(export_path)
+    return len(rows)
+
+
+def apply_activity_retention(max_age_days=None, max_rows=None, batch_size=5000, export_path=None, max_batches=None):
+    """Roll up every activity row outside the retention budget; returns the number of rows removed"""
+    expired = retention_filter(max_age_days, max_rows)
+    if expired is None:
+        return 0
+
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        removed = roll_up_batch(expired, batch_size, export_path)
+        if not removed:
+            break
+        total += removed
+        batches += 1
+        logger.info("Rolled up %d activity rows (%d so far)", removed, total)
+
+    return total
@@ -0,0 +1,232 @@
+"""
+Rule-based fast path for well-known incident patterns.
+
+A runbook catalogue (JSON, or YAML when PyYAML is installed) lists known
+problems with the phrases that identify them and a canned analysis:
+
+    [{"id": "dns-resolution",
+      "name": "DNS resolution failure",
+      "patterns": ["dns resolution", "nxdomain", "resolver"],
+      "analysis": "...",
+      "actions": ["...", "..."],
+      "references": [{"type": "link", "reference": "https://..."}],
+      "confidence": 0.85,
+      "min_score": 2}]
+
+All patterns are compiled into one Aho-Corasick automaton, so matching an
+incident is a single pass over its text however many runbooks there are. A
+pattern found in the title scores TITLE_WEIGHT, in the description 1; the best
+runbook whose score reaches its min_score (default MIN_SCORE) wins. The agent
+returns that runbook's answer instead of running the LLM, unless the caller asks
+for a full analysis. The catalogue is re-read when its file changes.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+TITLE_WEIGHT = 2
+MIN_SCORE = 2
+DEFAULT_CONFIDENCE = 0.8
+
+
+def normalize(text):
+    """Lower-case words separated (and surrounded) by single spaces, so ' dns ' only matches whole words"""
+    return ' ' + ' '.join(re.findall(r'[a-z0-9]+', (text or '').lower())) + ' '
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every occurrence of any pattern in one pass over the text"""
+
+    def __init__(self, patterns):
+        # patterns: iterable of (pattern, value); trie nodes are dicts of char -> node index
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for pattern, value in patterns:
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][char] = next_node
+                node = next_node
+            self._out[node].append(value)
+
+        # Breadth-first: each node's failure link is the longest proper suffix that is also in the trie
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for char, child in self._goto[node].items():
+                pending.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text):
+        """Values of every pattern occurring in text (once per occurrence)"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        found = []
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found.extend(out[node])
+        return found
+
+
+class Runbook:
+    def __init__(self, entry):
+        self.id = entry['id']
+        self.name = entry.get('name', self.id)
+        self.patterns = [pattern for pattern in entry['patterns'] if normalize(pattern).strip()]
+        self.analysis = entry['analysis']
+        self.actions = list(entry.get('actions', []))
+        self.references = list(entry.get('references', []))
+        self.confidence = float(entry.get('confidence', DEFAULT_CONFIDENCE))
+        self.min_score = entry.get('min_score', MIN_SCORE)
+
+    def solutions(self):
+        """The runbook's answer, shaped like NetworkIncidentAgent.get_solutions output"""
+        return {
+            'analysis': self.analysis.strip(),
+            'confidence_score': self.confidence,
+            'suggested_actions': list(self.actions),
+            'references': [dict(reference) for reference in self.references],
+            'runbook': self.id
+        }
+
+
+def load_catalogue(path):
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            import yaml
+            entries = yaml.safe_load(f)
+        else:
+            entries = json.load(f)
+
+    runbooks = [Runbook(entry) for entry in entries]
+    ids = [runbook.id for runbook in runbooks]
+    duplicates = {runbook_id for runbook_id in ids if ids.count(runbook_id) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate runbook ids in {path}: {', '.join(sorted(duplicates))}")
+    return runbooks
+
+
+class RuleEngine:
+    """Matches incidents against the runbook catalogue at `path`, reloading it when the file changes"""
+
+    def __init__(self, path, reload_interval=5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+
+        self._lock = threading.Lock()
+        self._runbooks = {}
+        self._matcher = AhoCorasick([])
+        self._mtime = None
+        self._checked_at = 0.0
+        self._stats = {'hits': 0, 'misses': 0, 'reloads': 0, 'reload_errors': 0, 'total_match_us': 0.0}
+        self._hits_by_runbook = {}
+
+        self.reload()
+
+    def reload(self):
+        """Recompile the catalogue; keeps the previous one if the file is missing or invalid"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            runbooks = load_catalogue(self.path)
+        except Exception:
+            logger.exception("Could not load runbook catalogue %s", self.path)
+            with self._lock:
+                self._stats['reload_errors'] += 1
+            return False
+
+        matcher = AhoCorasick(
+            (normalize(pattern), (runbook.id, pattern)) for runbook in runbooks for pattern in runbook.patterns
+        )
+        with self._lock:
+            self._runbooks = {runbook.id: runbook for runbook in runbooks}
+            self._matcher = matcher
+            self._mtime = mtime
+            self._stats['reloads'] += 1
+        logger.info("Loaded %d runbooks from %s", len(runbooks), self.path)
+        return True
+
+    def match(self, title, description):
+        """The best matching Runbook for an incident, or None"""
+        self._maybe_reload()
+        started = time.perf_counter()
+
+        with self._lock:
+            matcher, runbooks = self._matcher, self._runbooks
+
+        # Each distinct pattern counts once per field, however often it repeats
+        scores = {}
+        for weight, text in ((TITLE_WEIGHT, title), (1, description)):
+            for runbook_id, _ in set(matcher.find(normalize(text))):
+                scores[runbook_id] = scores.get(runbook_id, 0) + weight
+        best = None
+        for runbook_id, score in sorted(scores.items(), key=lambda item: -item[1]):
+            runbook = runbooks.get(runbook_id)
+            if runbook is not None and score >= runbook.min_score:
+                best = runbook
+                break
+
+        elapsed_us = (time.perf_counter() - started) * 1e6
+        with self._lock:
+            self._stats['hits' if best else 'misses'] += 1
+            self._stats['total_match_us'] += elapsed_us
+            if best:
+                self._hits_by_runbook[best.id] = self._hits_by_runbook.get(best.id, 0) + 1
+        return best
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['runbooks'] = len(self._runbooks)
+            stats['hits_by_runbook'] = dict(self._hits_by_runbook)
+        lookups = stats['hits'] + stats['misses']
+        total_match_us = stats.pop('total_match_us')
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['avg_match_us'] = total_match_us / lookups if lookups else 0.0
+        return stats
+
+    def _maybe_reload(self):
+        # Stat the file at most once per reload_interval
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+
+def init_runbooks(app):
+    """Attach a RuleEngine to the app and the shared agent when RUNBOOKS_ENABLED is set"""
+    if not app.config.get('RUNBOOKS_ENABLED', True):
+        return None
+
+    from ai_agent import get_agent
+
+    engine = RuleEngine(app.config['RUNBOOK_PATH'], reload_interval=app.config.get('RUNBOOK_RELOAD_INTERVAL', 5.0))
+    app.extensions['runbooks'] = engine
+    get_agent().rules = engine
+    return engine
@@ -0,0 +1,486 @@
+"""
+Similar-incident retrieval over title + description embeddings.
+
+Vectors come from the agent's embedding model (all-MiniLM-L6-v2, 384 dims),
+L2-normalized so cosine similarity is a dot product. VectorStore keeps them in a
+directory holding:
+
+    vectors.f32  float32 matrix, one row per incident, memory-mapped and grown
+                 by doubling
+    ids.bin      incident ids as fixed-width 36-byte ASCII, row i <-> id i
+    meta.json    row count, dimension and number of coarse lists; written last,
+                 so a reader never sees a row whose vector or id is incomplete
+    centroids.f32, lists.i32
+                 once train() has run: k-means centroids and each row's nearest
+                 centroid, so a query only scores rows in its DEFAULT_NPROBE
+                 nearest lists instead of the whole matrix
+
+New and edited incidents are queued with index_incident() once their transaction
+commits, and embedded in batches by a background thread. `flask
+backfill-similarity` embeds the existing history.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer assumed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ID_WIDTH = 36
+DEFAULT_DIM = 384
+SEARCH_CHUNK_ROWS = 262144
+# Below this many rows an exact scan is fast enough, so train() leaves the index flat
+IVF_MIN_ROWS = 50000
+DEFAULT_NPROBE = 16
+
+
+def incident_text(title, description):
+    return f"{title or ''}\n{description or ''}".strip()
+
+
+def normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorStore:
+    """Append/overwrite store of normalized float32 vectors keyed by incident id"""
+
+    def __init__(self, path, dim=DEFAULT_DIM):
+        self.path = path
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._meta_mtime = None
+        self._count = 0
+        self._vectors = None
+        self._lists = None  # coarse list of each row, once centroids are trained
+        self._centroids = None
+        self._ids = []
+        self._rows = {}  # incident id -> row
+
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            self._load_meta()
+        if self._vectors is None:
+            self._map_vectors()
+
+    def __len__(self):
+        self._refresh()
+        return self._count
+
+    def __contains__(self, incident_id):
+        self._refresh()
+        return incident_id in self._rows
+
+    def get_vector(self, incident_id):
+        self._refresh()
+        rows, vectors = self._rows, self._vectors
+        row = rows.get(incident_id)
+        return None if row is None else np.array(vectors[row])
+
+    def upsert(self, ids, vectors):
+        """Store (normalized) vectors for ids, overwriting rows of ids already present"""
+        vectors = normalize_rows(vectors)
+        if vectors.shape != (len(ids), self.dim):
+            raise ValueError(f"expected {len(ids)} vectors of dimension {self.dim}, got {vectors.shape}")
+
+        with self._lock, self._file_lock():
+            self._load_meta(force=True)
+            new_rows = {}  # incident id -> row, for ids not stored yet
+            rows = []
+            for incident_id in ids:
+                row = self._rows.get(incident_id, new_rows.get(incident_id))
+                if row is None:
+                    row = new_rows[incident_id] = self._count + len(new_rows)
+                rows.append(row)
+            self._ensure_capacity(self._count + len(new_rows))
+
+            rows = np.array(rows, dtype=np.int64)
+            self._vectors[rows] = vectors
+            self._vectors.flush()
+            if self._centroids is not None:
+                self._lists[rows] = self._assign(vectors)
+                self._lists.flush()
+
+            new_ids = list(new_rows)
+            if new_ids:
+                with open(os.path.join(self.path, 'ids.bin'), 'r+b' if self._count else 'wb') as f:
+                    f.seek(self._count * ID_WIDTH)
+                    f.write(b''.join(incident_id.encode('ascii').ljust(ID_WIDTH) for incident_id in new_ids))
+                for incident_id in new_ids:
+                    self._rows[incident_id] = len(self._ids)
+                    self._ids.append(incident_id)
+                self._count += len(new_ids)
+                self._write_meta()
+        return len(new_ids)
+
+    def train(self, nlist=None, sample_size=65536, iterations=10, seed=0):
+        """Cluster the stored vectors into nlist coarse lists (spherical k-means) so search
+        only scans the lists nearest the query; returns the number of lists"""
+        with self._lock, self._file_lock():
+            self._load_meta(force=True)
+            if self._count < IVF_MIN_ROWS:
+                return 0
+            nlist = nlist or int(min(4096, max(16, 4 * np.sqrt(self._count))))
+
+            rng = np.random.default_rng(seed)
+            sample = self._vectors[np.sort(rng.choice(self._count, min(sample_size, self._count), replace=False))]
+            centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+            for _ in range(iterations):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, sample)
+                empty = ~sums.any(axis=1)
+                sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+                centroids = normalize_rows(sums)
+
+            self._centroids = centroids
+            self._map_vectors(len(self._vectors))
+            for start in range(0, self._count, SEARCH_CHUNK_ROWS):
+                stop = min(start + SEARCH_CHUNK_ROWS, self._count)
+                self._lists[start:stop] = self._assign(self._vectors[start:stop])
+            self._lists.flush()
+            centroids.tofile(os.path.join(self.path, 'centroids.f32'))
+            self._write_meta()
+        return nlist
+
+    def search(self, query, k=5, exclude=(), nprobe=DEFAULT_NPROBE):
+        """Top-k (incident id, cosine similarity) for a query vector, best first.
+
+        Once train() has run, only rows in the nprobe lists nearest the query are
+        scored (approximate); otherwise, or with nprobe=None, every row is.
+        """
+        self._refresh()
+        # One consistent view, even if a writer remaps the files meanwhile
+        with self._lock:
+            count, ids, id_rows = self._count, self._ids, self._rows
+            vectors, lists, centroids = self._vectors, self._lists, self._centroids
+        if not count:
+            return []
+
+        query = normalize_rows(query).reshape(self.dim)
+        exclude_rows = {id_rows[incident_id] for incident_id in exclude if incident_id in id_rows}
+        want = k + len(exclude_rows)
+
+        if centroids is not None and nprobe:
+            probed = np.zeros(len(centroids), dtype=bool)
+            probed[np.argsort(-(centroids @ query))[:nprobe]] = True
+            candidates = np.flatnonzero(probed[lists[:count]])
+            best_rows, best_scores = self._top(vectors[candidates] @ query, want)
+            best_rows = candidates[best_rows]
+        else:
+            # Scan in chunks so a huge memmap never needs a full-size temporary
+            best_rows = np.empty(0, dtype=np.int64)
+            best_scores = np.empty(0, dtype=np.float32)
+            for start in range(0, count, SEARCH_CHUNK_ROWS):
+                rows, scores = self._top(vectors[start:min(start + SEARCH_CHUNK_ROWS, count)] @ query, want)
+                best_rows = np.concatenate([best_rows, rows + start])
+                best_scores = np.concatenate([best_scores, scores])
+
+        results = []
+        for i in np.argsort(-best_scores):
+            row = int(best_rows[i])
+            if row in exclude_rows:
+                continue
+            results.append((ids[row], float(best_scores[i])))
+            if len(results) == k:
+                break
+        return results
+
+    @staticmethod
+    def _top(scores, want):
+        rows = np.argpartition(scores, -want)[-want:] if len(scores) > want else np.arange(len(scores))
+        return rows, scores[rows]
+
+    def _assign(self, vectors):
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _meta_mtime_now(self):
+        try:
+            return os.stat(os.path.join(self.path, 'meta.json')).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self):
+        """Pick up rows appended (or lists trained) by other processes since we last looked"""
+        mtime = self._meta_mtime_now()
+        if mtime is None or mtime == self._meta_mtime:
+            return
+        with self._lock:
+            self._load_meta()
+
+    def _load_meta(self, force=False):
+        # Caller holds self._lock; re-checks the mtime so racing readers load a change only once
+        mtime = self._meta_mtime_now()
+        if mtime is None or (not force and mtime == self._meta_mtime):
+            return
+
+        with open(os.path.join(self.path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['dim'] != self.dim:
+            raise ValueError(f"index at {self.path} has dimension {meta['dim']}, expected {self.dim}")
+
+        # Build the new mapping on copies, then swap it in, so readers never see it half updated
+        count = meta['count']
+        ids, rows = self._ids, self._rows
+        if count > len(ids):
+            with open(os.path.join(self.path, 'ids.bin'), 'rb') as f:
+                f.seek(len(ids) * ID_WIDTH)
+                raw = f.read((count - len(ids)) * ID_WIDTH)
+            ids, rows = list(ids), dict(rows)
+            for offset in range(0, len(raw), ID_WIDTH):
+                incident_id = raw[offset:offset + ID_WIDTH].decode('ascii').rstrip()
+                rows[incident_id] = len(ids)
+                ids.append(incident_id)
+
+        centroids = self._centroids
+        nlist = meta.get('nlist', 0)
+        if nlist and (centroids is None or len(centroids) != nlist or force):
+            centroids = np.fromfile(os.path.join(self.path, 'centroids.f32'), dtype=np.float32).reshape(nlist, self.dim)
+
+        self._ids, self._rows, self._centroids = ids, rows, centroids
+        self._map_vectors()
+        self._count = count
+        self._meta_mtime = mtime
+
+    def _map_vectors(self, capacity=None):
+        vectors_path = os.path.join(self.path, 'vectors.f32')
+        lists_path = os.path.join(self.path, 'lists.i32')
+        if capacity is None:
+            capacity = os.path.getsize(vectors_path) // (4 * self.dim) if os.path.exists(vectors_path) else 0
+        if capacity == 0:
+            self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            self._lists = np.zeros(0, dtype=np.int32)
+            return
+        self._vectors = np.memmap(vectors_path, dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+        if self._centroids is not None:
+            if not os.path.exists(lists_path) or os.path.getsize(lists_path) < capacity * 4:
+                with open(lists_path, 'ab') as f:
+                    f.truncate(capacity * 4)
+            self._lists = np.memmap(lists_path, dtype=np.int32, mode='r+', shape=(capacity,))
+
+    def _ensure_capacity(self, rows):
+        capacity = len(self._vectors)
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, 1024)
+        with open(os.path.join(self.path, 'vectors.f32'), 'ab') as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self._map_vectors(new_capacity)
+
+    def _write_meta(self):
+        meta_path = os.path.join(self.path, 'meta.json')
+        tmp_path = f"{meta_path}.{os.getpid()}"
+        meta = {
+            'count': self._count,
+            'dim': self.dim,
+            'nlist': 0 if self._centroids is None else len(self._centroids)
+        }
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+        self._meta_mtime = os.stat(meta_path).st_mtime_ns
+
+    def _file_lock(self):
+        return _FileLock(os.path.join(self.path, 'write.lock'))
+
+
+class _FileLock:
+    """Exclusive lock shared by every process writing to the same store"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+class SimilarityIndex:
+    """Embeds queued incidents in the background and answers similar-incident queries"""
+
+    def __init__(self, store, batch_size=64):
+        self.store = store
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def enqueue(self, incident_id, title, description):
+        self._ensure_started()
+        self._queue.put((incident_id, incident_text(title, description)))
+
+    def add(self, items):
+        """Embed and store [(incident id, text)] right away; returns the number of new rows"""
+        from ai_agent import get_agent
+
+        if not items:
+            return 0
+        vectors = get_agent().embeddings.embed_documents([text for _, text in items])
+        return self.store.upsert([incident_id for incident_id, _ in items], vectors)
+
+    def similar_to_incident(self, incident_id, k=5):
+        """Neighbours of an already-indexed incident (no embedding needed); [] if not indexed yet"""
+        vector = self.store.get_vector(incident_id)
+        if vector is None:
+            return []
+        return self.store.search(vector, k, exclude=(incident_id,))
+
+    def similar_to_text(self, text, k=5, exclude=()):
+        from ai_agent import get_agent
+
+        vector = get_agent().embeddings.embed_query(text)
+        return self.store.search(vector, k, exclude=exclude)
+
+    def _ensure_started(self):
+        # Started lazily so the thread lives in the serving process, not a pre-fork parent
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='similarity-indexer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Latest text wins when an incident was queued more than once
+            items = list(dict(batch).items())
+            started = time.perf_counter()
+            try:
+                self.add(items)
+                logger.info("Indexed %d incidents in %.2fs", len(items), time.perf_counter() - started)
+            except Exception:
+                logger.exception("Failed to index %d incidents", len(items))
+
+
+def init_similarity(app):
+    """Attach a SimilarityIndex to the app and the shared agent when SIMILARITY_ENABLED is set"""
+    if not app.config.get('SIMILARITY_ENABLED', True):
+        return None
+
+    from ai_agent import get_agent
+
+    index = SimilarityIndex(
+        VectorStore(app.config['SIMILARITY_INDEX_PATH']),
+        batch_size=app.config.get('SIMILARITY_BATCH_SIZE', 64)
+    )
+    app.extensions['similarity_index'] = index
+
+    # The agent runs plan steps on its own threads, so give the lookup an app context
+    def lookup(text, exclude_id=None):
+        with app.app_context():
+            return similar_incident_context(text, exclude_id=exclude_id)
+
+    get_agent().similar_lookup = lookup
+    return index
+
+
+def get_similarity_index():
+    from flask import current_app, has_app_context
+
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('similarity_index')
+
+
+def index_incident(incident_id, title, description):
+    """Queue an incident for (re-)embedding; a no-op when the index is disabled"""
+    index = get_similarity_index()
+    if index is not None:
+        index.enqueue(incident_id, title, description)
+
+
+def find_similar_incidents(incident, k=5):
+    """[(incident, score)] of the most similar past incidents, archived ones included"""
+    from models import Incident
+
+    index = get_similarity_index()
+    if index is None:
+        return []
+    matches = index.similar_to_incident(incident.id, k)
+    incidents = Incident.get_incidents_by_ids([incident_id for incident_id, _ in matches], include_archived=True)
+    return [(incidents[incident_id], score) for incident_id, score in matches if incident_id in incidents]
+
+
+def similar_incident_context(text, k=3, exclude_id=None):
+    """Short lines describing the past incidents most similar to text (other than exclude_id), for the agent's prompt"""
+    from models import Incident
+
+    index = get_similarity_index()
+    if index is None:
+        return []
+    matches = index.similar_to_text(text, k + 1)
+    incidents = Incident.get_incidents_by_ids([incident_id for incident_id, _ in matches], include_archived=True)
+
+    lines = []
+    for incident_id, score in matches:
+        incident = incidents.get(incident_id)
+        # Skip the incident being analysed itself; others with the same text are the best matches
+        if incident is None or (exclude_id is not None and str(incident.id) == str(exclude_id)):
+            continue
+        lines.append(f"[{incident.severity}, {incident.status}, similarity {score:.2f}] {incident.title}: {incident.description}")
+    return lines[:k]
+
+
+def backfill(batch_size=256, rebuild=False, include_archived=True):
+    """Embed every incident (optionally only those not yet indexed); returns the number embedded"""
+    from models import Incident, ArchivedIncident
+
+    index = get_similarity_index()
+    if index is None:
+        raise RuntimeError("Similarity index is disabled (SIMILARITY_ENABLED=false)")
+
+    models = [Incident, ArchivedIncident] if include_archived else [Incident]
+    embedded = 0
+    for model in models:
+        last_id = None
+        while True:
+            query = model.query.with_entities(model.id, model.title, model.description).order_by(model.id)
+            if last_id is not None:
+                query = query.filter(model.id > last_id)
+            rows = query.limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            items = [
+                (row.id, incident_text(row.title, row.description))
+                for row in rows if rebuild or row.id not in index.store
+            ]
+            if items:
+                index.add(items)
+                embedded += len(items)
+                logger.info("Backfilled %d incidents", embedded)
+
+    # Large indexes get coarse lists so queries stay fast; small ones stay exact
+    nlist = index.store.train()
+    if nlist:
+        logger.info("Trained %d coarse lists over %d vectors", nlist, len(index.store))
+    return embedded
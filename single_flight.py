@@ -0,0 +1,91 @@
+"""
+Single-flight coalescing of identical expensive computations.
+
+When several requests ask for the same thing at once (dozens of engineers
+opening a new critical incident, several admin tabs on the analysis page), the
+first caller for a key runs the computation and the others wait for it and get
+the same result, or the same exception. Nothing is kept once the flight lands;
+this only collapses calls that overlap in time.
+
+Keys are (name, key) pairs; counters are kept per name.
+"""
+
+import threading
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._stats = {}
+
+    def do(self, name, key, fn):
+        """Run fn() unless an identical call is in flight; returns (result, shared)"""
+        flight_key = (name, key)
+        with self._lock:
+            stats = self._stats.setdefault(name, {'calls': 0, 'executions': 0, 'collapsed': 0})
+            stats['calls'] += 1
+            flight = self._flights.get(flight_key)
+            if flight is not None:
+                flight.waiters += 1
+                stats['collapsed'] += 1
+                leader = False
+            else:
+                flight = self._flights[flight_key] = _Flight()
+                stats['executions'] += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[flight_key]
+            flight.done.set()
+        return flight.result, flight.waiters > 0
+
+    def stats(self):
+        with self._lock:
+            stats = {name: dict(counters) for name, counters in self._stats.items()}
+            in_flight = {}
+            for name, _ in self._flights:
+                in_flight[name] = in_flight.get(name, 0) + 1
+        for name, counters in stats.items():
+            counters['in_flight'] = in_flight.get(name, 0)
+        return stats
+
+
+def init_single_flight(app):
+    """Attach the process-wide SingleFlight group to the app and the shared agent"""
+    from ai_agent import get_agent
+
+    group = SingleFlight()
+    app.extensions['single_flight'] = group
+    get_agent().flights = group
+    return group
+
+
+def coalesce(name, key, fn):
+    """SingleFlight.do on the app's group (runs fn directly outside an app); returns only the result"""
+    from flask import current_app, has_app_context
+
+    group = current_app.extensions.get('single_flight') if has_app_context() else None
+    if group is None:
+        return fn()
+    return group.do(name, key, fn)[0]
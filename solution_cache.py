@@ -0,0 +1,196 @@
+"""
+Content-addressed cache for NetworkIncidentAgent.get_solutions results.
+
+Many incidents share the same title and description, so results are keyed on a
+hash of the normalized (title, description, severity) plus the model id and
+prompt version that produced them; changing either invalidates old entries.
+
+There are two tiers: an in-process LRU dict, and an optional SQLite file that
+survives restarts and is shared by worker processes. Both expire entries after
+AI_CACHE_TTL seconds; the memory tier is capped at AI_CACHE_MAX_ENTRIES and the
+disk tier at AI_CACHE_MAX_DISK_MB, evicting least recently used entries.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(value):
+    """Case- and whitespace-insensitive form of a free-text field"""
+    return ' '.join((value or '').split()).lower()
+
+
+def solution_cache_key(title, description, severity, model_id, prompt_version):
+    payload = json.dumps([
+        normalize_text(title),
+        normalize_text(description),
+        normalize_text(severity),
+        model_id,
+        prompt_version
+    ])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SolutionCache:
+    """Two-tier (memory LRU + SQLite) cache of get_solutions results"""
+
+    def __init__(self, path=None, ttl=7 * 24 * 3600, max_entries=1024, max_disk_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()  # key -> (stored_at, result), least recently used first
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_writes = 0
+        self._disk_bytes = 0  # approximate; recomputed whenever the disk tier is evicted
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS solutions ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                    "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_solutions_accessed_at ON solutions (accessed_at)")
+                self._disk_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM solutions").fetchone()[0]
+
+    def get(self, key):
+        """Return a copy of the cached result for key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return copy.deepcopy(entry[1])
+                del self._memory[key]
+
+        result = self._disk_get(key, now)
+        with self._lock:
+            if result is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['disk_hits'] += 1
+            self._remember(key, result[0], result[1])
+        return copy.deepcopy(result[1])
+
+    def set(self, key, value):
+        now = time.time()
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._remember(key, now, value)
+            self._stats['stores'] += 1
+        self._disk_set(key, now, value)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            with self._disk_lock, self._connect() as conn:
+                conn.execute("DELETE FROM solutions")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        if self.path:
+            with self._connect() as conn:
+                stats['disk_entries'], stats['disk_bytes'] = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM solutions"
+                ).fetchone()
+        return stats
+
+    def _remember(self, key, stored_at, value):
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _disk_get(self, key, now):
+        if not self.path:
+            return None
+        try:
+            with self._disk_lock, self._connect() as conn:
+                row = conn.execute("SELECT value, stored_at FROM solutions WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] >= self.ttl:
+                    conn.execute("DELETE FROM solutions WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE solutions SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[1], json.loads(row[0])
+        except sqlite3.Error:
+            logger.exception("Solution cache read failed")
+            return None
+
+    def _disk_set(self, key, now, value):
+        if not self.path:
+            return
+        data = json.dumps(value)
+        try:
+            with self._disk_lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO solutions (key, value, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, data, len(data), now, now)
+                )
+                self._disk_writes += 1
+                self._disk_bytes += len(data)
+                # Evicting needs a scan, so only do it when over the cap or every few writes (for TTL)
+                if self._disk_bytes > self.max_disk_bytes or self._disk_writes % 32 == 0:
+                    self._evict_disk(conn, now)
+        except sqlite3.Error:
+            logger.exception("Solution cache write failed")
+
+    def _evict_disk(self, conn, now):
+        expired = conn.execute("DELETE FROM solutions WHERE stored_at <= ?", (now - self.ttl,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM solutions").fetchone()[0]
+        evicted = 0
+        if total > self.max_disk_bytes:
+            # Drop least recently used entries until we are back under the size cap
+            for key, size in conn.execute("SELECT key, size FROM solutions ORDER BY accessed_at").fetchall():
+                if total <= self.max_disk_bytes:
+                    break
+                conn.execute("DELETE FROM solutions WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+        self._disk_bytes = total
+        with self._lock:
+            self._stats['evictions'] += expired + evicted
+
+
+def init_solution_cache(app):
+    """Attach a SolutionCache to the shared agent when AI_CACHE_ENABLED is set"""
+    if not app.config.get('AI_CACHE_ENABLED', True):
+        return None
+
+    from ai_agent import get_agent
+
+    cache = SolutionCache(
+        path=app.config.get('AI_CACHE_PATH'),
+        ttl=app.config.get('AI_CACHE_TTL', 7 * 24 * 3600),
+        max_entries=app.config.get('AI_CACHE_MAX_ENTRIES', 1024),
+        max_disk_bytes=int(app.config.get('AI_CACHE_MAX_DISK_MB', 64) * 1024 * 1024)
+    )
+    get_agent().cache = cache
+    app.extensions['solution_cache'] = cache
+    return cache
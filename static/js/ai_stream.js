@@ -0,0 +1,75 @@
+// Streams an AI analysis into the incident page over server-sent events
+
+document.addEventListener('DOMContentLoaded', function() {
+    const streamButton = document.getElementById('ai-stream-btn');
+    const output = document.getElementById('ai-stream');
+
+    if (!streamButton || !output) return;
+
+    streamButton.addEventListener('click', function() {
+        const steps = output.querySelector('.ai-stream-steps');
+        const answer = output.querySelector('.ai-stream-answer');
+        const status = output.querySelector('.ai-stream-status');
+
+        steps.innerHTML = '';
+        answer.textContent = '';
+        status.className = 'ai-stream-status small text-muted';
+        status.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Running analysis tools...';
+        output.style.display = 'block';
+        streamButton.disabled = true;
+
+        const fullAnalysis = document.getElementById('full_analysis');
+        const url = streamButton.dataset.url + (fullAnalysis && fullAnalysis.checked ? '?full=1' : '');
+        const source = new EventSource(url);
+
+        source.addEventListener('step', function(event) {
+            const step = JSON.parse(event.data);
+            const item = document.createElement('li');
+            item.className = 'list-group-item py-1 small';
+            item.innerHTML = `<i class="fas ${step.ok ? 'fa-check text-success' : 'fa-exclamation-triangle text-warning'} me-2"></i>` +
+                `<strong></strong> <span class="text-muted">(${step.elapsed.toFixed(2)}s)</span><div class="text-muted"></div>`;
+            item.querySelector('strong').textContent = step.tool.replace('_', ' ');
+            item.querySelector('div').textContent = step.output;
+            steps.appendChild(item);
+            status.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Writing analysis...';
+        });
+
+        source.addEventListener('token', function(event) {
+            answer.textContent += JSON.parse(event.data).text;
+        });
+
+        source.addEventListener('done', function(event) {
+            const result = JSON.parse(event.data);
+            source.close();
+            streamButton.disabled = false;
+            if (result.cached || result.degraded) {
+                answer.textContent = result.solutions.analysis;
+            }
+            if (result.solutions.runbook || result.solutions.degraded) {
+                const actions = result.solutions.suggested_actions.map(action => '- ' + action).join('\n');
+                answer.textContent += '\n\nSuggested actions:\n' + actions;
+            }
+            status.className = 'ai-stream-status small text-success';
+            status.innerHTML = result.update_id
+                ? '<i class="fas fa-check me-2"></i>Analysis saved as an update. <a href="">Reload</a> to see it in the timeline.'
+                : '<i class="fas fa-check me-2"></i>Analysis complete.';
+        });
+
+        source.addEventListener('failed', function(event) {
+            source.close();
+            streamButton.disabled = false;
+            status.className = 'ai-stream-status small text-danger';
+            status.textContent = 'Analysis failed: ' + JSON.parse(event.data).error;
+        });
+
+        source.onerror = function() {
+            // The server closes the stream after 'done'; anything else is a dropped connection
+            if (source.readyState !== EventSource.CLOSED) {
+                source.close();
+                streamButton.disabled = false;
+                status.className = 'ai-stream-status small text-danger';
+                status.textContent = 'Connection to the analysis stream was lost.';
+            }
+        };
+    });
+});